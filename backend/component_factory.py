@@ -10,8 +10,20 @@ class ComponentFactory:
         else:
             raise ValueError(f"Unknown component type: '{component_type}'. It has not been registered with the factory.")
 
+    @staticmethod
+    def is_registered(component_type) -> bool:
+        return isinstance(component_type, str) and component_type.lower() in ComponentFactory._component_types
+
+    @staticmethod
+    def registered_types() -> list[str]:
+        return list(ComponentFactory._component_types)
+
     @staticmethod
     def register_component(name, cls):
         name = name.lower()
         print(f"DEBUG: ComponentFactory registering '{name}' with class {cls.__name__}")
-        ComponentFactory._component_types[name] = cls
\ No newline at end of file
+        ComponentFactory._component_types[name] = cls
+
+    @staticmethod
+    def unregister_component(name):
+        ComponentFactory._component_types.pop(name.lower(), None)
@@ -1,10 +1,19 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session as SessionType
-from sqlalchemy.engine import Engine
-from typing import Optional
-from .models import Base as InventoryBase
+import configparser
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from sqlalchemy import create_engine, event, true
+from sqlalchemy.orm import sessionmaker, with_loader_criteria, Session as SessionType
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import NullPool
+from typing import Iterator, Optional
+from .models import Base as InventoryBase, Component
 from .models_custom import Base as ConfigBase
 from .models_custom import Inventory
+from . import search_index, migrations
 
 
 config_engine: Optional[Engine] = None
@@ -13,6 +22,79 @@ inventory_engine: Optional[Engine] = None
 ConfigSession: Optional[sessionmaker[SessionType]] = None
 InventorySession: Optional[sessionmaker[SessionType]] = None
 
+# Applied to every new SQLite connection; see [SQLite] in config.ini. WAL with synchronous=NORMAL
+# only fsyncs at checkpoints, which makes the app's many small commits much cheaper.
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": "268435456",
+    "cache_size": "-16000",
+    "temp_store": "MEMORY",
+}
+_PRAGMA_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA", "0", "1", "2", "3"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY", "0", "1", "2"},
+}
+sqlite_pragmas: dict[str, str] = dict(DEFAULT_SQLITE_PRAGMAS)
+
+# Warm engines for recently used inventories, most recently used last.
+MAX_CACHED_INVENTORY_ENGINES = 4
+INVENTORY_ENGINE_IDLE_SECONDS = 600
+
+
+@dataclass
+class _CachedInventory:
+    engine: Engine
+    session_factory: sessionmaker
+    last_used: float
+
+
+_inventory_cache: "OrderedDict[str, _CachedInventory]" = OrderedDict()
+_inventory_cache_lock = threading.Lock()
+
+def load_sqlite_pragmas(config_path: str) -> dict[str, str]:
+    """
+    Reads pragma overrides from the [SQLite] section of config_path. Unknown names and invalid values are
+    ignored with a warning so a typo cannot stop the app from opening its databases.
+    """
+    global sqlite_pragmas
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS)
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_path, encoding="utf-8")
+    except configparser.Error as e:
+        print(f"WARNING: Could not read SQLite settings from '{config_path}': {e}")
+        parser = configparser.ConfigParser()
+
+    if parser.has_section("SQLite"):
+        for name, value in parser.items("SQLite"):
+            value = value.strip().upper()
+            if name not in DEFAULT_SQLITE_PRAGMAS:
+                print(f"WARNING: Ignoring unknown SQLite setting '{name}' in {config_path}.")
+            elif name in _PRAGMA_CHOICES and value not in _PRAGMA_CHOICES[name]:
+                print(f"WARNING: Ignoring invalid value '{value}' for SQLite setting '{name}'.")
+            elif name not in _PRAGMA_CHOICES and not value.lstrip("-").isdigit():
+                print(f"WARNING: SQLite setting '{name}' must be an integer, got '{value}'.")
+            else:
+                pragmas[name] = value
+    sqlite_pragmas = pragmas
+    return pragmas
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+def _create_sqlite_engine(db_url: str, **engine_kwargs) -> Engine:
+    # Added connect_args for thread safety with PyQt
+    engine = create_engine(db_url, echo=False, connect_args={"check_same_thread": False}, **engine_kwargs)
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
 def initialize_databases(config_db_url: str, inventory_db_url: str):
     global config_engine, inventory_engine, ConfigSession, InventorySession
 
@@ -21,8 +103,7 @@ def initialize_databases(config_db_url: str, inventory_db_url: str):
 
     print(f"INFO: Initializing Config DB with URL: {config_db_url}")
     try:
-        # Added connect_args for thread safety with PyQt
-        config_engine = create_engine(config_db_url, echo=False, connect_args={"check_same_thread": False})
+        config_engine = _create_sqlite_engine(config_db_url)
         ConfigBase.metadata.create_all(config_engine)
         ConfigSession = sessionmaker(bind=config_engine)
         with config_engine.connect():
@@ -33,12 +114,7 @@ def initialize_databases(config_db_url: str, inventory_db_url: str):
 
     print(f"INFO: Initializing Inventory DB with URL: {inventory_db_url}")
     try:
-        # Added connect_args for thread safety with PyQt
-        inventory_engine = create_engine(inventory_db_url, echo=False, connect_args={"check_same_thread": False})
-        InventoryBase.metadata.create_all(inventory_engine)
-        InventorySession = sessionmaker(bind=inventory_engine)
-        with inventory_engine.connect():
-            print("INFO: Inventory DB connection successful (test).")
+        inventory_engine, InventorySession = _open_inventory_db(inventory_db_url)
     except Exception as e:
         print(f"CRITICAL: Failed during Inventory DB engine creation: {e}")
         raise
@@ -50,29 +126,175 @@ def initialize_databases(config_db_url: str, inventory_db_url: str):
             session.add(default_inventory)
             session.commit()
 
-def switch_inventory_db(inventory_db_url: str):
-    global inventory_engine, InventorySession
+class SharedInventorySession(SessionType):
+    """
+    A session limited to one inventory of a shared database (session.info["inventory_id"]). ORM queries,
+    bulk updates and deletes only see that inventory's components, and new components are assigned to it.
+    Core and textual statements on the components table must add inventory_scope() themselves.
+    """
+
+
+@event.listens_for(SharedInventorySession, "do_orm_execute")
+def _limit_to_inventory(execute_state):
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if execute_state.is_select or execute_state.is_update or execute_state.is_delete:
+        inventory_id = execute_state.session.info["inventory_id"]
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Component, Component.inventory_id == inventory_id, include_aliases=True))
+
+
+@event.listens_for(SharedInventorySession, "before_flush")
+def _assign_new_components(session, flush_context, instances):
+    for obj in session.new:
+        if isinstance(obj, Component):
+            obj.inventory_id = session.info["inventory_id"]
+
+
+def session_inventory_id(session: SessionType) -> str | None:
+    """The inventory a shared database session is limited to, or None for a session on an inventory's own file."""
+    return session.info.get("inventory_id")
+
 
-    # *** THE CRITICAL FIX IS HERE ***
-    # Before creating a new engine, we must dispose of the old one to close its connections
-    # and release any file locks it might be holding.
-    if inventory_engine:
-        print(f"INFO: Disposing old inventory engine connections...")
-        inventory_engine.dispose()
+def inventory_scope(session: SessionType, table=Component.__table__):
+    """WHERE clause for Core statements on the components table that limits them to the session's inventory."""
+    inventory_id = session_inventory_id(session)
+    return true() if inventory_id is None else table.c.inventory_id == inventory_id
 
-    print(f"INFO: Switching to Inventory DB: {inventory_db_url}")
+
+def _scoped_sessionmaker(engine: Engine, inventory_id: str) -> sessionmaker[SessionType]:
+    return sessionmaker(bind=engine, class_=SharedInventorySession, info={"inventory_id": inventory_id})
+
+
+def switch_inventory_db(inventory_db_url: str, inventory_id: str | None = None):
+    """
+    Makes inventory_db_url the active inventory. Engines of recently used inventories stay open in a small
+    LRU cache, so switching back to one skips engine creation, schema checks and migrations.
+
+    Args:
+        inventory_id: Open this inventory inside a shared database at inventory_db_url.
+    """
+    global inventory_engine, InventorySession
+
+    print(f"INFO: Switching to Inventory DB: {inventory_db_url}" + (f" (inventory {inventory_id})" if inventory_id else ""))
     try:
-        # Create the new engine for the new database file
-        # Added connect_args for thread safety with PyQt
-        inventory_engine = create_engine(inventory_db_url, echo=False, connect_args={"check_same_thread": False})
-        InventoryBase.metadata.create_all(inventory_engine)
-        InventorySession = sessionmaker(bind=inventory_engine)
-        with inventory_engine.connect():
-            print("INFO: New Inventory DB connection successful (test).")
+        engine, session_factory = _open_inventory_db(inventory_db_url, shared=inventory_id is not None)
+        if inventory_id is not None:
+            session_factory = _scoped_sessionmaker(engine, inventory_id)
+        inventory_engine, InventorySession = engine, session_factory
+        # The inventory switched away from is no longer protected and may now be over the cap or idle
+        _close_idle_inventory_engines(keep=engine)
     except Exception as e:
         print(f"CRITICAL: Failed during Inventory DB switch: {e}")
         raise
 
+def get_inventory_engine(inventory_db_url: str, shared: bool = False) -> Engine:
+    """
+    Returns the engine of an inventory, opening and migrating it if needed, without making it the active one.
+    shared opens (or creates) a database that holds every inventory.
+    """
+    return _open_inventory_db(inventory_db_url, shared)[0]
+
+def _set_query_only(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA query_only = ON")
+
+@contextmanager
+def inventory_file_session(db_path: str, read_only: bool = False,
+                           inventory_id: str | None = None) -> Iterator[SessionType]:
+    """
+    Yields a session on a short-lived connection to an inventory file, independent of the active inventory and
+    the engine cache, so it is safe to use from worker threads. Commits on success, rolls back on error.
+    With read_only, SQLite refuses any write on the connection; the schema is still brought up to date first.
+    inventory_id limits the session to one inventory of a shared database.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Inventory file not found: {db_path}")
+    engine = _create_sqlite_engine(f"sqlite:///{db_path}", poolclass=NullPool)
+    try:
+        migrations.run_migrations(engine)
+        # Searches through the session then match terms the same way as on the active inventory
+        search_index.detect_search_index(engine)
+        if read_only:
+            event.listen(engine, "connect", _set_query_only)
+        session_factory = sessionmaker(bind=engine) if inventory_id is None else _scoped_sessionmaker(engine, inventory_id)
+        with session_factory() as session, session.begin():
+            yield session
+    finally:
+        engine.dispose()
+
+def release_inventory_db(inventory_db_url: str):
+    """Closes the cached engine for an inventory, e.g. so its file can be deleted."""
+    global inventory_engine, InventorySession
+    with _inventory_cache_lock:
+        cached = _inventory_cache.pop(_cache_key(inventory_db_url), None)
+    if cached is None:
+        return
+    if cached.engine is inventory_engine:
+        inventory_engine, InventorySession = None, None
+    cached.engine.dispose()
+    print(f"INFO: Closed inventory engine for {inventory_db_url}")
+
+def _cache_key(inventory_db_url: str) -> str:
+    url = make_url(inventory_db_url)
+    if url.database and url.database != ":memory:":
+        return f"{url.drivername}:{os.path.normcase(os.path.abspath(url.database))}"
+    return str(url)
+
+def _open_inventory_db(inventory_db_url: str, shared: bool = False) -> tuple[Engine, sessionmaker[SessionType]]:
+    key = _cache_key(inventory_db_url)
+    with _inventory_cache_lock:
+        cached = _inventory_cache.get(key)
+        if cached is not None:
+            _inventory_cache.move_to_end(key)
+            cached.last_used = time.monotonic()
+
+    if cached is None:
+        engine = _create_sqlite_engine(inventory_db_url)
+        try:
+            if shared:
+                migrations.create_shared_schema(engine)
+            InventoryBase.metadata.create_all(engine)
+            migrations.run_migrations(engine)
+            search_index.ensure_search_index(engine)
+            with engine.connect():
+                print("INFO: Inventory DB connection successful (test).")
+        except Exception:
+            engine.dispose()
+            raise
+        cached = _CachedInventory(engine, sessionmaker(bind=engine), time.monotonic())
+        with _inventory_cache_lock:
+            _inventory_cache[key] = cached
+
+    _close_idle_inventory_engines(keep=cached.engine)
+    return cached.engine, cached.session_factory
+
+def _close_idle_inventory_engines(keep: Engine):
+    with _inventory_cache_lock:
+        evicted = _evict_inventory_engines(keep)
+    for old in evicted:
+        print(f"INFO: Closing idle inventory engine for {old.engine.url}")
+        old.engine.dispose()
+
+def _evict_inventory_engines(keep: Engine) -> list["_CachedInventory"]:
+    """
+    Drops engines idle for too long and the least recently used ones over the cap. Call with the lock held.
+    The engine of the active inventory is never dropped, even while another one is opened.
+    """
+    now = time.monotonic()
+    evicted = []
+    for key, cached in list(_inventory_cache.items()):
+        if cached.engine is keep or cached.engine is inventory_engine:
+            continue
+        if now - cached.last_used > INVENTORY_ENGINE_IDLE_SECONDS or len(_inventory_cache) > MAX_CACHED_INVENTORY_ENGINES:
+            evicted.append(_inventory_cache.pop(key))
+    return evicted
+
+def rebuild_inventory_search_index():
+    if inventory_engine is None:
+        raise RuntimeError("Inventory Database has not been initialized. Call initialize_databases() first.")
+    print(f"INFO: Rebuilding full-text search index for {inventory_engine.url}")
+    search_index.rebuild_search_index(inventory_engine)
+
 def get_config_session() -> SessionType:
     if ConfigSession is None:
         raise RuntimeError("Config Database has not been initialized. Call initialize_databases() first.")
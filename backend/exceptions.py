@@ -52,3 +52,11 @@ class DatabaseError(ComponentError):
     def __init__(self, message="Database operation failed"):
         self.message = message
         super().__init__(self.message)
+
+
+class OperationCancelledError(ComponentError):
+    """Raised when the user cancels a long-running operation; any changes it made are rolled back"""
+
+    def __init__(self, message="Operation cancelled"):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,141 @@
+import threading
+import weakref
+from dataclasses import dataclass
+from sqlalchemy import event, func, select, case
+from sqlalchemy.engine import Engine
+
+from .database import get_session, inventory_scope, session_inventory_id
+from .models import Component
+from . import database, exceptions
+
+# What the counts know of a component: (component_type, quantity, location)
+ComponentFacets = tuple[str, int, str | None]
+
+
+@dataclass(frozen=True)
+class FacetCounts:
+    """Component counts of one inventory, for filter lists and overviews."""
+    by_type: dict[str, int]
+    by_location: dict[str | None, int]
+    in_stock: int
+    out_of_stock: int
+
+    @property
+    def total(self) -> int:
+        return self.in_stock + self.out_of_stock
+
+    def adjusted(self, old: ComponentFacets | None, new: ComponentFacets | None) -> "FacetCounts":
+        """The counts after one component changed from old to new; None stands for added or deleted."""
+        by_type, by_location = dict(self.by_type), dict(self.by_location)
+        in_stock, out_of_stock = self.in_stock, self.out_of_stock
+        for facets, step in ((old, -1), (new, 1)):
+            if facets is None:
+                continue
+            component_type, quantity, location = facets
+            _add_count(by_type, component_type, step)
+            _add_count(by_location, location, step)
+            if quantity > 0:
+                in_stock += step
+            else:
+                out_of_stock += step
+        return FacetCounts(by_type, by_location, in_stock, out_of_stock)
+
+
+def _add_count(counts: dict, key, step: int):
+    count = counts.get(key, 0) + step
+    if count > 0:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+
+# Counts per engine and inventory id. Any commit on an inventory engine may have changed them (a transfer writes
+# to an ATTACHed file, a type deletion to several files), so a commit empties the cache unless its transaction
+# recorded exactly what it changed (see record_change); reading and searching never commit and leave it alone.
+_cache: "weakref.WeakKeyDictionary[Engine, dict[str | None, FacetCounts]]" = weakref.WeakKeyDictionary()
+_cache_lock = threading.Lock()
+_generation = 0
+
+# Key in Connection.info for the changes recorded in the connection's open transaction
+_CHANGES_KEY = "facet_changes"
+
+
+@event.listens_for(Engine, "commit")
+def _update_on_commit(conn):
+    changes = conn.info.pop(_CHANGES_KEY, None)
+    if conn.engine is database.config_engine:
+        return
+    if changes is None:
+        clear_cache()
+        return
+
+    global _generation
+    with _cache_lock:
+        by_inventory = _cache.get(conn.engine, {})
+        for inventory_id, old, new in changes:
+            if (counts := by_inventory.get(inventory_id)) is not None:
+                by_inventory[inventory_id] = counts.adjusted(old, new)
+        # Counts being taken right now may or may not include these changes
+        _generation += 1
+
+
+@event.listens_for(Engine, "rollback")
+def _forget_on_rollback(conn):
+    conn.info.pop(_CHANGES_KEY, None)
+
+
+def record_change(session, old: ComponentFacets | None, new: ComponentFacets | None):
+    """
+    Notes that the session's transaction changes one component from old to new, so that its commit adjusts the
+    cached counts in place instead of dropping them. Only for transactions that change nothing else the counts
+    depend on; a commit without recorded changes still empties the cache.
+    """
+    session.connection().info.setdefault(_CHANGES_KEY, []).append((session_inventory_id(session), old, new))
+
+
+def clear_cache():
+    global _generation
+    with _cache_lock:
+        _cache.clear()
+        _generation += 1
+
+
+def get_facet_counts(session=None) -> FacetCounts:
+    """
+    Counts the components of the active inventory per type, per location and by stock, with GROUP BY queries
+    instead of loading them. The result is cached until a commit changes it.
+
+    Args:
+        session: Count through the caller's session (e.g. another inventory file) instead of the active inventory.
+    """
+    owns_session = session is None
+    session = session or get_session()
+    try:
+        engine, inventory_id = session.get_bind(), session_inventory_id(session)
+        with _cache_lock:
+            cached, generation = _cache.get(engine, {}).get(inventory_id), _generation
+        if cached is not None:
+            return cached
+
+        scope = inventory_scope(session)
+        by_type, in_stock, out_of_stock = {}, 0, 0
+        for component_type, count, stocked in session.execute(
+                select(Component.component_type, func.count(), func.sum(case((Component.quantity > 0, 1), else_=0)))
+                .where(scope).group_by(Component.component_type)):
+            by_type[component_type] = count
+            in_stock += stocked
+            out_of_stock += count - stocked
+        by_location = dict(session.execute(
+            select(Component.location, func.count()).where(scope).group_by(Component.location)).all())
+        counts = FacetCounts(by_type, by_location, in_stock, out_of_stock)
+
+        with _cache_lock:
+            # A commit while counting makes the result stale; hand it out but do not keep it
+            if generation == _generation:
+                _cache.setdefault(engine, {})[inventory_id] = counts
+        return counts
+    except Exception as e:
+        raise exceptions.DatabaseError(f"Error counting components: {e}") from e
+    finally:
+        if owns_session:
+            session.close()
@@ -0,0 +1,296 @@
+import csv
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+from openpyxl.styles import Font, Alignment, PatternFill
+
+from backend.exceptions import InvalidInputError
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency, only needed for Parquet files
+    pa = pq = None
+
+
+@dataclass
+class TableData:
+    """Rows streamed from a file. rows_total is an estimate for progress reporting and may be 0 if unknown."""
+    header: tuple
+    rows: Iterator[tuple]
+    rows_total: int
+
+
+class FileFormat:
+    """
+    Reads and writes inventory rows in one file format. The import/export logic only deals in a header and
+    an iterator of value tuples, so formats stay free of any database code.
+    """
+    name = ""
+    # Extensions the format reads and writes; the first one is added to export names typed without one
+    extensions: tuple[str, ...] = ()
+    # Extensions the format can import but must not export to
+    read_only_extensions: tuple[str, ...] = ()
+    # Whether write_rows uses column widths; they cost an extra aggregate query, so they are only computed on request
+    uses_column_widths = False
+
+    def is_available(self) -> bool:
+        return True
+
+    @property
+    def readable_extensions(self) -> tuple[str, ...]:
+        return self.extensions + self.read_only_extensions
+
+    @property
+    def file_filter(self) -> str:
+        """File dialog filter for exports."""
+        return f"{self.name} Files ({' '.join('*' + ext for ext in self.extensions)})"
+
+    @property
+    def open_file_filter(self) -> str:
+        """File dialog filter for imports."""
+        return f"{self.name} Files ({' '.join('*' + ext for ext in self.readable_extensions)})"
+
+    @contextmanager
+    def open_rows(self, filename: str) -> Iterator[TableData]:
+        raise NotImplementedError
+
+    def write_rows(self, filename: str, header: list[str], rows: Iterable[tuple],
+                   column_types: list[type] | None = None, column_widths: list[float] | None = None):
+        """
+        Writes header and rows to filename. Exceptions raised while consuming rows propagate unchanged and
+        any partially written file is removed.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def _open_for_reading(self, opener):
+        """Calls opener() and turns failures into the errors the import code reports."""
+        try:
+            handle = opener()
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise InvalidInputError(f"Failed to read or parse {self.name} file: {e}") from e
+        yield handle
+
+    @staticmethod
+    @contextmanager
+    def _output(filename: str, opener):
+        """Yields opener()'s handle and closes it; the file is removed again if writing fails part way."""
+        handle = opener()
+        try:
+            yield handle
+        except BaseException:
+            handle.close()
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        handle.close()
+
+
+class ExcelFormat(FileFormat):
+    name = "Excel"
+    extensions = (".xlsx",)
+    # openpyxl writes plain workbooks, which Excel refuses to open under the macro-enabled extension
+    read_only_extensions = (".xlsm",)
+    uses_column_widths = True
+
+    @contextmanager
+    def open_rows(self, filename: str) -> Iterator[TableData]:
+        with self._open_for_reading(lambda: load_workbook(filename, read_only=True, data_only=True)) as workbook:
+            try:
+                worksheet = workbook.worksheets[0]
+                rows = worksheet.iter_rows(values_only=True)
+                header = next(rows, None) or ()
+                yield TableData(header, rows, max((worksheet.max_row or 1) - 1, 0))
+            finally:
+                workbook.close()
+
+    def write_rows(self, filename, header, rows, column_types=None, column_widths=None):
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet("Inventory")
+        # Open the target first so an unwritable path fails before any rows are streamed
+        with self._output(filename, lambda: open(filename, "wb")) as stream:
+            for index, width in enumerate(column_widths or [], start=1):
+                worksheet.column_dimensions[get_column_letter(index)].width = width
+            worksheet.append(self._header_row(worksheet, header))
+            rows_written = 0
+            for row in rows:
+                worksheet.append([self._cell(worksheet, value) for value in row])
+                rows_written += 1
+            worksheet.auto_filter.ref = f"A1:{get_column_letter(len(header))}{rows_written + 1}"
+            workbook.save(stream)
+
+    @staticmethod
+    def _header_row(worksheet, header) -> list[WriteOnlyCell]:
+        header_font = Font(bold=True, color="FFFFFF")
+        header_alignment = Alignment(horizontal='center', vertical='center')
+        header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+        cells = []
+        for title in header:
+            cell = WriteOnlyCell(worksheet, value=title)
+            cell.font = header_font
+            cell.alignment = header_alignment
+            cell.fill = header_fill
+            cells.append(cell)
+        return cells
+
+    @staticmethod
+    def _cell(worksheet, value):
+        if isinstance(value, str) and value.startswith("="):
+            # Keep text such as "=10% tolerance" a string instead of letting openpyxl store it as a formula
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.data_type = "s"
+            return cell
+        return value
+
+
+class CsvFormat(FileFormat):
+    """
+    Plain UTF-8 CSV through the stdlib csv module. Empty cells are read back as None. Text that Excel would run
+    as a formula is written with a leading apostrophe, which is removed again on import.
+    """
+    name = "CSV"
+    extensions = (".csv",)
+    FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+    @contextmanager
+    def open_rows(self, filename: str) -> Iterator[TableData]:
+        # utf-8-sig also accepts the byte order mark Excel puts in front of "CSV UTF-8" files
+        with self._open_for_reading(lambda: open(filename, "r", encoding="utf-8-sig", newline="")) as stream:
+            with stream:
+                reader = csv.reader(stream)
+                try:
+                    header = tuple(next(reader, ()))
+                except (csv.Error, UnicodeDecodeError) as e:
+                    raise InvalidInputError(f"Failed to read or parse CSV file: {e}") from e
+                yield TableData(header, self._rows(reader), 0)
+
+    @classmethod
+    def _rows(cls, reader) -> Iterator[tuple]:
+        try:
+            for row in reader:
+                yield tuple(cls._read_value(value) for value in row)
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise InvalidInputError(f"Failed to read or parse CSV file (line {reader.line_num}): {e}") from e
+
+    def write_rows(self, filename, header, rows, column_types=None, column_widths=None):
+        with self._output(filename, lambda: open(filename, "w", encoding="utf-8-sig", newline="")) as stream:
+            writer = csv.writer(stream)
+            writer.writerow(header)
+            writer.writerows((self._written_value(value) for value in row) for row in rows)
+
+    @classmethod
+    def _is_escaped(cls, value: str) -> bool:
+        # Values that already start with apostrophes get one more, so reading back strips exactly one
+        return value.lstrip("'").startswith(cls.FORMULA_PREFIXES)
+
+    @classmethod
+    def _written_value(cls, value):
+        if value is None:
+            return ""
+        if isinstance(value, str) and cls._is_escaped(value):
+            return "'" + value
+        return value
+
+    @classmethod
+    def _read_value(cls, value: str):
+        if value == "":
+            return None
+        if value.startswith("'") and cls._is_escaped(value):
+            return value[1:]
+        return value
+
+
+class ParquetFormat(FileFormat):
+    """Columnar Parquet files through pyarrow, read and written in record batches."""
+    name = "Parquet"
+    extensions = (".parquet",)
+    BATCH_SIZE = 10000
+
+    def is_available(self) -> bool:
+        return pq is not None
+
+    @contextmanager
+    def open_rows(self, filename: str) -> Iterator[TableData]:
+        with self._open_for_reading(lambda: pq.ParquetFile(filename)) as parquet_file:
+            try:
+                yield TableData(tuple(parquet_file.schema_arrow.names), self._rows(parquet_file),
+                                parquet_file.metadata.num_rows)
+            finally:
+                parquet_file.close()
+
+    def _rows(self, parquet_file) -> Iterator[tuple]:
+        for batch in parquet_file.iter_batches(batch_size=self.BATCH_SIZE):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+    def write_rows(self, filename, header, rows, column_types=None, column_widths=None):
+        types = column_types or [str] * len(header)
+        schema = pa.schema([(name, pa.int64() if column_type is int else pa.string())
+                            for name, column_type in zip(header, types)])
+        with self._output(filename, lambda: pq.ParquetWriter(filename, schema)) as writer:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.BATCH_SIZE:
+                    writer.write_batch(self._record_batch(batch, schema))
+                    batch = []
+            if batch:
+                writer.write_batch(self._record_batch(batch, schema))
+
+    @staticmethod
+    def _record_batch(rows: list[tuple], schema):
+        columns = list(zip(*rows))
+        return pa.record_batch([pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                               schema=schema)
+
+
+_formats_by_extension: dict[str, FileFormat] = {}
+
+
+def register_format(file_format: FileFormat):
+    for extension in file_format.readable_extensions:
+        _formats_by_extension[extension.lower()] = file_format
+
+
+def available_formats() -> list[FileFormat]:
+    formats = []
+    for file_format in _formats_by_extension.values():
+        if file_format.is_available() and file_format not in formats:
+            formats.append(file_format)
+    return formats
+
+
+def format_for_filename(filename: str, for_writing: bool = False) -> FileFormat:
+    """
+    Picks the format by extension.
+
+    Args:
+        filename: File to read or write.
+        for_writing: Only accept extensions the format can export to.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    file_format = _formats_by_extension.get(extension)
+    if file_format is not None and for_writing and extension not in file_format.extensions:
+        file_format = None
+    if file_format is None:
+        supported = ", ".join(ext for f in available_formats()
+                              for ext in (f.extensions if for_writing else f.readable_extensions))
+        raise InvalidInputError(f"Unsupported file type '{extension or filename}'. Supported: {supported}.")
+    if not file_format.is_available():
+        raise InvalidInputError(f"{file_format.name} files need the optional 'pyarrow' package. "
+                                f"Install it with: pip install pyarrow")
+    return file_format
+
+
+EXCEL = ExcelFormat()
+CSV = CsvFormat()
+PARQUET = ParquetFormat()
+for _file_format in (EXCEL, CSV, PARQUET):
+    register_format(_file_format)
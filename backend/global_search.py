@@ -0,0 +1,192 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from .inventory import search_components
+from .database import inventory_file_session
+from .inventory_manager import get_all_inventories, get_inventory_db_path, get_shared_db_path, run_on_all_inventories
+from .models_custom import Inventory
+
+# Rows returned per inventory. A global search is for finding where a part is, not for paging through everything.
+GLOBAL_SEARCH_LIMIT_PER_INVENTORY = 500
+# (inventory file, search) results kept in memory; an entry is also dropped as soon as its file changes
+MAX_CACHED_SEARCHES = 256
+
+_cache: OrderedDict[tuple, tuple[tuple, list]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class InventoryHit:
+    inventory_name: str
+    component_id: uuid.UUID
+    part_number: str
+    component_type: str
+    value: str
+    quantity: int
+    location: str | None
+
+
+@dataclass
+class PartStock:
+    """One part number with its stock in every inventory that has it."""
+    part_number: str
+    component_type: str
+    value: str
+    total_quantity: int = 0
+    hits: list[InventoryHit] = field(default_factory=list)
+
+
+@dataclass
+class GlobalSearchResult:
+    parts: list[PartStock]
+    # Inventory name -> why it could not be searched
+    errors: dict[str, Exception] = field(default_factory=dict)
+    inventories_searched: int = 0
+    inventories_from_cache: int = 0
+
+
+def _file_signature(db_path: str) -> tuple:
+    """
+    Changes whenever the inventory file may have changed. In WAL mode commits go to the -wal file and only reach
+    the main file at a checkpoint, so both files count.
+    """
+    signature = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def search_all_inventories(term: str | None, app_path: str, backend_type: str | None = None,
+                           inventories: list[Inventory] | None = None,
+                           limit_per_inventory: int = GLOBAL_SEARCH_LIMIT_PER_INVENTORY) -> GlobalSearchResult:
+    """
+    Searches every registered inventory file at once and totals the stock of each matching part number.
+
+    The files are queried concurrently over read-only, short-lived connections (see
+    inventory_manager.run_on_all_inventories), using the same matching as search_components. The active
+    inventory is not touched. Results are cached per file and search, keyed by the file's mtime and size, so
+    repeating a search only re-reads the inventories that changed since.
+
+    When the inventories share one database this is a single query on that file, cached as a whole, and the
+    row limit applies to all inventories together (limit_per_inventory times their number).
+
+    Args:
+        term: Search text; None or blank lists every component (up to the limit).
+        backend_type: Backend type id to restrict the results to.
+        inventories: Inventories to search instead of every registered one.
+        limit_per_inventory: Maximum rows taken from each inventory.
+
+    Returns:
+        The matching parts sorted by part number, and the inventories that could not be searched.
+    """
+    inventories = get_all_inventories() if inventories is None else inventories
+    term = term.strip() if term and term.strip() else None
+    if shared_path := get_shared_db_path(app_path):
+        return _search_shared_database(shared_path, inventories, term, backend_type, limit_per_inventory)
+
+    hits_by_inventory, to_search = {}, {}
+    for inventory in inventories:
+        db_path = get_inventory_db_path(inventory, app_path)
+        key = (os.path.normcase(os.path.abspath(db_path)), inventory.name, term, backend_type, limit_per_inventory)
+        # Taken before querying, so a write made during the query makes the next search re-read the file
+        signature = _file_signature(db_path)
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached is not None and cached[0] == signature:
+                _cache.move_to_end(key)
+                hits_by_inventory[inventory.name] = cached[1]
+                continue
+        to_search[inventory.name] = (inventory, key, signature)
+
+    def search(session):
+        return [(c.id, c.part_number, c.component_type, c.value, c.quantity, c.location)
+                for c in search_components(term, backend_type, limit=limit_per_inventory, session=session)]
+
+    errors = {}
+    fresh = run_on_all_inventories(search, app_path, [inventory for inventory, _, _ in to_search.values()],
+                                   read_only=True)
+    for name, rows in fresh.items():
+        if isinstance(rows, Exception):
+            print(f"WARNING: Global search skipped inventory '{name}': {rows}")
+            errors[name] = rows
+            continue
+        hits = [InventoryHit(name, *row) for row in rows]
+        hits_by_inventory[name] = hits
+        _, key, signature = to_search[name]
+        _store(key, signature, hits)
+
+    return _aggregate(hits_by_inventory, errors, len(inventories), len(inventories) - len(to_search))
+
+
+def _store(key: tuple, signature: tuple, hits: list[InventoryHit]):
+    with _cache_lock:
+        _cache[key] = (signature, hits)
+        while len(_cache) > MAX_CACHED_SEARCHES:
+            _cache.popitem(last=False)
+
+
+def _search_shared_database(shared_path: str, inventories: list[Inventory], term: str | None,
+                            backend_type: str | None, limit_per_inventory: int) -> GlobalSearchResult:
+    names = {inventory.id: inventory.name for inventory in inventories}
+    key = (os.path.normcase(os.path.abspath(shared_path)), tuple(sorted(names)), term, backend_type,
+           limit_per_inventory)
+    signature = _file_signature(shared_path)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            _cache.move_to_end(key)
+            hits = cached[1]
+        else:
+            hits = None
+
+    if hits is None:
+        try:
+            with inventory_file_session(shared_path, read_only=True) as session:
+                hits = [InventoryHit(names[c.inventory_id], c.id, c.part_number, c.component_type, c.value,
+                                     c.quantity, c.location)
+                        for c in search_components(term, backend_type, limit=limit_per_inventory * len(names),
+                                                   session=session)
+                        if c.inventory_id in names]
+        except Exception as e:
+            print(f"WARNING: Global search of the shared database failed: {e}")
+            return _aggregate({}, {name: e for name in names.values()}, len(inventories), 0)
+        _store(key, signature, hits)
+        from_cache = 0
+    else:
+        from_cache = len(inventories)
+
+    hits_by_inventory = {name: [] for name in names.values()}
+    for hit in hits:
+        hits_by_inventory[hit.inventory_name].append(hit)
+    return _aggregate(hits_by_inventory, {}, len(inventories), from_cache)
+
+
+def _aggregate(hits_by_inventory: dict[str, list[InventoryHit]], errors: dict[str, Exception],
+               inventories_searched: int, inventories_from_cache: int) -> GlobalSearchResult:
+    parts = {}
+    for name in sorted(hits_by_inventory):
+        for hit in hits_by_inventory[name]:
+            part = parts.get(hit.part_number)
+            if part is None:
+                part = parts[hit.part_number] = PartStock(hit.part_number, hit.component_type, hit.value)
+            part.total_quantity += hit.quantity
+            part.hits.append(hit)
+
+    return GlobalSearchResult(
+        parts=[parts[part_number] for part_number in sorted(parts)],
+        errors=errors,
+        inventories_searched=inventories_searched,
+        inventories_from_cache=inventories_from_cache,
+    )
@@ -1,152 +1,320 @@
-import pandas as pd
+import uuid
+from sqlalchemy import Integer, select, func, literal, update, bindparam, text
+from sqlalchemy.exc import SQLAlchemyError
 
 from backend.models import Component
-from backend.database import get_session
+from backend.database import get_session, inventory_scope, session_inventory_id
 from backend.component_factory import ComponentFactory
+from backend.inventory import bulk_add_components
 from backend.exceptions import DatabaseError, InvalidInputError, ComponentError
+from backend.file_formats import FileFormat, TableData, EXCEL, format_for_filename
+from backend.import_validation import RowChecker, ValidationReport, is_blank_row, validate_rows
+from backend.type_manager import type_manager
 
-from pandas import ExcelWriter
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Alignment, PatternFill
+# Sheet headers are derived from the Component columns, so a new column is exported and imported without
+# further changes here. Only headers that differ from the title-cased column name are listed.
+_HEADER_OVERRIDES = {"component_type": "Type", "id": "ID"}
+_REQUIRED_FIELDS = ("part_number", "component_type", "value", "quantity")
 
-EXCEL_COLUMNS = ["Part Number", "Type", "Value", "Quantity", "Purchase Link", "Datasheet Link"]
-REQUIRED_IMPORT_COLUMNS = ["Part Number", "Type", "Value", "Quantity"]
 
+def _header_for(field: str) -> str:
+    return _HEADER_OVERRIDES.get(field, field.replace("_", " ").title())
+
+
+def _normalize_header(header) -> str:
+    return " ".join(str(header).replace("_", " ").split()).casefold()
+
+
+# The id goes last so the sheet starts with the columns people read
+_EXPORT_ORDER = [c.name for c in Component.__table__.columns if c.name not in ("id", "inventory_id")] + ["id"]
+EXPORT_FIELDS = {_header_for(field): field for field in _EXPORT_ORDER}
+EXPORT_COLUMNS = list(EXPORT_FIELDS)
+REQUIRED_IMPORT_COLUMNS = [_header_for(field) for field in _REQUIRED_FIELDS]
+# Accepts both the exported header ("Part Number") and the column name ("part_number"), in any case
+_FIELD_BY_HEADER = {
+    **{_normalize_header(field): field for field in _EXPORT_ORDER},
+    **{_normalize_header(header): field for header, field in EXPORT_FIELDS.items()},
+}
+IMPORT_MODES = ("replace", "merge")
+IMPORT_CHUNK_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _column_widths(session, columns) -> tuple[int, list[float]]:
+    """
+    Returns the row count and a width per column from one aggregate query.
+    A write-only sheet emits its column widths before the first row, so they cannot be measured while streaming.
+    """
+    # ids are exported in their 36 character text form
+    aggregates = [literal(36) if column.name == "id" else func.max(func.length(column)) for column in columns]
+    row_count, *max_lengths = session.execute(
+        select(func.count(), *aggregates).select_from(Component).where(inventory_scope(session))).one()
+    widths = [(max(len(header), length or 0) + 2) * 1.2 for header, length in zip(EXPORT_COLUMNS, max_lengths)]
+    return row_count, widths
+
+
+def _export_rows(result, progress_callback, rows_total: int):
+    rows_done = 0
+    for row in result:
+        yield tuple(str(value) if isinstance(value, uuid.UUID) else value for value in row)
+        rows_done += 1
+        if progress_callback and rows_done % EXPORT_CHUNK_SIZE == 0:
+            progress_callback(rows_done, rows_total)
+    if progress_callback and rows_done % EXPORT_CHUNK_SIZE:
+        progress_callback(rows_done, rows_total)
+
+
+def export_inventory(filename: str, progress_callback=None, file_format: FileFormat | None = None) -> bool | None:
+    """
+    Writes the active inventory to filename, sorted by part number, in the format matching its extension.
+
+    Rows are streamed from the database straight into the file, so memory use stays flat however large the
+    inventory is.
+
+    Args:
+        filename: Path of the file to create.
+        progress_callback: Called as progress_callback(rows_done, rows_total) every EXPORT_CHUNK_SIZE rows. It may
+            raise OperationCancelledError to stop the export; the partial file is removed.
+        file_format: Overrides the format picked from the extension.
+    """
+    file_format = file_format or format_for_filename(filename, for_writing=True)
+    columns = [Component.__table__.c[EXPORT_FIELDS[header]] for header in EXPORT_COLUMNS]
+    column_types = [int if isinstance(column.type, Integer) else str for column in columns]
 
-def export_to_excel(filename: str) -> bool | None:
-    components_data = []
     session = get_session()
     try:
-        all_components = session.query(Component).order_by(Component.part_number).all()
-        for comp in all_components:
-            components_data.append({
-                "Part Number": comp.part_number,
-                "Type": comp.component_type,
-                "Value": comp.value,
-                "Quantity": comp.quantity,
-                "Purchase Link": comp.purchase_link,
-                "Datasheet Link": comp.datasheet_link,
-            })
-    except Exception as e:
+        rows_total, widths = 0, None
+        if file_format.uses_column_widths:
+            rows_total, widths = _column_widths(session, columns)
+        elif progress_callback:
+            rows_total = session.execute(
+                select(func.count()).select_from(Component).where(inventory_scope(session))).scalar()
+
+        result = session.execute(select(*columns).where(inventory_scope(session))
+                                 .order_by(Component.part_number, Component.id)
+                                 .execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        file_format.write_rows(filename, EXPORT_COLUMNS, _export_rows(result, progress_callback, rows_total),
+                               column_types=column_types, column_widths=widths)
+        return True
+    except ComponentError:
+        raise
+    except SQLAlchemyError as e:
         raise DatabaseError(f"Failed to fetch components for export: {e}") from e
+    except IOError as e:
+        raise IOError(f"Failed to write {file_format.name} file '{filename}': {e}") from e
+    except Exception as e:
+        raise Exception(f"An unexpected error occurred during {file_format.name} export formatting/writing: {e}") from e
     finally:
         session.close()
 
-    df = pd.DataFrame(components_data, columns=EXCEL_COLUMNS)
 
-    try:
-        with ExcelWriter(filename, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Inventory', index=False, header=True)
-            worksheet = writer.sheets['Inventory']
+def export_to_excel(filename: str, progress_callback=None) -> bool | None:
+    return export_inventory(filename, progress_callback, file_format=EXCEL)
 
-            for column_cells in worksheet.columns:
-                header_text = column_cells[0].value or ""
-                max_length = len(str(header_text))
-                column_letter = get_column_letter(column_cells[0].column)
 
-                for cell in column_cells:
-                    try:
-                        cell_text = str(cell.value)
-                        if cell_text and len(cell_text) > max_length:
-                            max_length = len(cell_text)
-                    except (ValueError, TypeError):
-                        pass
+def _merge_chunk(session, chunk: list[dict], fields: list[str]) -> dict[str, int]:
+    """
+    Applies one chunk of a merge import: rows whose part number is new are inserted, rows that differ from the
+    stored component in any imported column are updated in place (keeping their id), the rest are left alone.
+    """
+    table = Component.__table__
+    part_numbers = [row['part_number'] for row in chunk]
+    existing = {
+        row.part_number: row for row in session.execute(
+            select(table.c.id, table.c.part_number, *(table.c[field] for field in fields))
+            .where(table.c.part_number.in_(part_numbers), inventory_scope(session)))
+    }
 
-                adjusted_width = (max_length + 2) * 1.2
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+    inserts, updates = [], []
+    for row in chunk:
+        current = existing.get(row['part_number'])
+        if current is None:
+            inserts.append(row)
+        elif any(getattr(current, field) != row.get(field) for field in fields):
+            updates.append({**{field: row.get(field) for field in fields}, "match_id": current.id})
 
-            header_font = Font(bold=True, color="FFFFFF")
-            header_alignment = Alignment(horizontal='center', vertical='center')
-            header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+    if inserts:
+        # An id from the sheet may already belong to another part, e.g. one that was renamed; issue a new one then
+        sheet_ids = [row['id'] for row in inserts if row.get('id') is not None]
+        taken = set(session.execute(select(table.c.id).where(table.c.id.in_(sheet_ids))).scalars()) if sheet_ids else ()
+        inserts = [{**row, 'id': None} if row.get('id') in taken else row for row in inserts]
+        bulk_add_components(inserts, on_conflict="error", session=session)
+    if updates:
+        statement = update(table).where(table.c.id == bindparam("match_id")).values(
+            {field: bindparam(field) for field in fields})
+        session.execute(statement, updates)
+    return {"inserted": len(inserts), "updated": len(updates), "unchanged": len(chunk) - len(inserts) - len(updates)}
 
-            for cell in worksheet[1]:
-                cell.font = header_font
-                cell.alignment = header_alignment
-                cell.fill = header_fill
 
-            worksheet.auto_filter.ref = worksheet.dimensions
+def _row_checker(filename: str, header: tuple) -> RowChecker:
+    """Maps the header of an import file to component fields; raises if a required column is missing."""
+    column_index, column_names = {}, {}
+    for index, name in enumerate(header):
+        field = _FIELD_BY_HEADER.get(_normalize_header(name)) if name is not None else None
+        if field and field not in column_index:
+            column_index[field] = index
+            column_names[field] = str(name).strip()
+    missing_cols = [_header_for(field) for field in _REQUIRED_FIELDS if field not in column_index]
+    if missing_cols:
+        raise InvalidInputError(f"Import file '{filename}' is missing required columns: {', '.join(missing_cols)}")
+    type_properties = {
+        backend_id: list(type_manager.get_properties(type_manager.get_ui_name(backend_id)))
+        for backend_id in ComponentFactory.registered_types()
+    }
+    return RowChecker(column_index, column_names, type_properties)
 
-        return True
 
-    except IOError as e:
-        raise IOError(f"Failed to write Excel file '{filename}': {e}") from e
-    except Exception as e:
-        raise Exception(f"An unexpected error occurred during Excel export formatting/writing: {e}") from e
+def validate_import(filename: str, progress_callback=None, workers: int | None = None,
+                    file_format: FileFormat | None = None) -> ValidationReport:
+    """
+    Checks every row of an import file against the registered component types and their property schemas
+    without touching the inventory.
 
+    Args:
+        filename: Path of the file to check.
+        progress_callback: Called as progress_callback(rows_done, rows_total) as chunks are checked.
+        workers: Worker processes for large files; see import_validation.validate_rows.
+        file_format: Overrides the format picked from the extension.
 
-def import_from_excel(filename: str) -> bool | None:
+    Returns:
+        A ValidationReport with one (row, column, reason) issue per problem found.
+    """
+    file_format = file_format or format_for_filename(filename)
     try:
-        df = pd.read_excel(filename, engine='openpyxl')
+        with file_format.open_rows(filename) as table:
+            checker = _row_checker(filename, table.header)
+            return validate_rows(table.rows, checker, rows_total=table.rows_total, workers=workers,
+                                 progress_callback=progress_callback)
     except FileNotFoundError:
         raise FileNotFoundError(f"Import file not found: {filename}")
-    except Exception as e:
-        raise InvalidInputError(f"Failed to read or parse Excel file '{filename}': {e}") from e
 
-    missing_cols = [col for col in REQUIRED_IMPORT_COLUMNS if col not in df.columns]
-    if missing_cols:
-        raise InvalidInputError(f"Import file '{filename}' is missing required columns: {', '.join(missing_cols)}")
 
-    components_to_add = []
-    for i, (index, row) in enumerate(df.iterrows()):
-        try:
-            part_number = str(row["Part Number"]).strip()
-            component_type = str(row["Type"]).strip().lower()
-            value = str(row["Value"]).strip()
-            quantity = int(row["Quantity"])
-
-            purchase_link = row.get("Purchase Link")
-            purchase_link = str(purchase_link).strip() if pd.notna(purchase_link) else None
-
-            datasheet_link = row.get("Datasheet Link")
-            datasheet_link = str(datasheet_link).strip() if pd.notna(datasheet_link) else None
-
-            if not part_number:
-                raise ValueError("Part Number cannot be empty.")
-            if not component_type:
-                raise ValueError("Type cannot be empty.")
-            if not value:
-                raise ValueError("Value cannot be empty.")
-            if quantity < 0:
-                raise ValueError("Quantity cannot be negative.")
-
-            components_to_add.append({
-                'part_number': part_number,
-                'component_type': component_type,
-                'value': value,
-                'quantity': quantity,
-                'purchase_link': purchase_link if purchase_link else None,
-                'datasheet_link': datasheet_link if datasheet_link else None,
-            })
-
-        except (KeyError, ValueError, TypeError) as e:
-            raise InvalidInputError(f"Invalid data found in row {i + 2} of '{filename}': {e}") from e
-        except Exception as e:
-            raise Exception(f"Unexpected error processing row {i + 2} of '{filename}': {e}") from e
+def import_inventory(filename: str, progress_callback=None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                     mode: str = "replace", delete_missing: bool = True, skip_invalid: bool = False,
+                     file_format: FileFormat | None = None) -> dict[str, int]:
+    """
+    Loads the rows of filename (the first sheet of a workbook) into the active inventory, reading it in the
+    format matching its extension.
+
+    Rows are streamed from the file and applied chunk by chunk, so memory use does not grow with the
+    size of the file. Everything happens in one transaction: an invalid row leaves the inventory untouched
+    unless skip_invalid is set.
+
+    Args:
+        filename: Path of the file to import.
+        progress_callback: Called as progress_callback(rows_done, rows_total) after each chunk. rows_total
+            is an estimate from the file's metadata and is 0 if the format does not record it (CSV). It may
+            raise OperationCancelledError to stop the import; the transaction is rolled back.
+        chunk_size: Number of rows validated and written per batch.
+        mode: "replace" deletes every component and inserts the sheet. "merge" matches rows on part number and
+            only writes the differences; stored components keep their ids, and columns missing from the sheet
+            keep their stored values.
+        delete_missing: In merge mode, delete components whose part number is not in the sheet.
+        skip_invalid: Leave out rows that fail validation (see validate_import) instead of aborting. In merge
+            mode a skipped row still keeps its stored component from being deleted.
+        file_format: Overrides the format picked from the extension.
+
+    Returns:
+        A change summary {"inserted", "updated", "deleted", "unchanged", "skipped"}.
+    """
+    if mode not in IMPORT_MODES:
+        raise InvalidInputError(f"Unknown import mode '{mode}'. Use one of: {', '.join(IMPORT_MODES)}.")
+    file_format = file_format or format_for_filename(filename)
+    try:
+        with file_format.open_rows(filename) as table:
+            return _import_rows(filename, table, progress_callback, chunk_size, mode, delete_missing, skip_invalid)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Import file not found: {filename}")
+
 
+def import_from_excel(filename: str, progress_callback=None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                      mode: str = "replace", delete_missing: bool = True) -> dict[str, int]:
+    return import_inventory(filename, progress_callback, chunk_size, mode, delete_missing, file_format=EXCEL)
+
+
+def _import_rows(filename: str, table: TableData, progress_callback, chunk_size: int, mode: str,
+                 delete_missing: bool, skip_invalid: bool) -> dict[str, int]:
     session = get_session()
     try:
-        _ = session.query(Component).delete()
-
-        for comp_data in components_to_add:
-            try:
-                component = ComponentFactory.create_component(
-                    component_type=comp_data['component_type'],
-                    part_number=comp_data['part_number'],
-                    value=comp_data['value'],
-                    quantity=comp_data['quantity'],
-                    purchase_link=comp_data['purchase_link'],
-                    datasheet_link=comp_data['datasheet_link']
-                )
-                session.add(component)
-            except ValueError as e:
-                session.rollback()
-                raise ComponentError(
-                    f"Failed to create component for Part Number '{comp_data['part_number']}': {e}") from e
+        checker = _row_checker(filename, table.header)
+        rows_total = table.rows_total
+
+        summary = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "skipped": 0}
+        merge_fields = [field for field in checker.column_index if field not in ("id", "part_number")]
+        track_part_numbers = mode == "merge" and delete_missing
+        if mode == "replace":
+            summary["deleted"] = session.query(Component).delete()
+        elif track_part_numbers:
+            # Part numbers seen in the sheet, so the components that are missing can be deleted in one statement
+            session.execute(text("CREATE TEMP TABLE IF NOT EXISTS import_part_numbers (part_number TEXT PRIMARY KEY)"))
+            session.execute(text("DELETE FROM temp.import_part_numbers"))
+        # Part numbers of skipped rows, which must not count as missing from the sheet
+        kept_part_numbers = []
+
+        def record_part_numbers(part_numbers):
+            if part_numbers:
+                session.execute(text("INSERT OR IGNORE INTO temp.import_part_numbers (part_number) VALUES (:part_number)"),
+                                [{"part_number": part_number} for part_number in part_numbers])
+
+        def apply(chunk):
+            if mode == "replace":
+                summary["inserted"] += bulk_add_components(chunk, on_conflict="error", session=session)["inserted"]
+                return
+            for key, count in _merge_chunk(session, chunk, merge_fields).items():
+                summary[key] += count
+            if track_part_numbers:
+                record_part_numbers([row['part_number'] for row in chunk] + kept_part_numbers)
+                kept_part_numbers.clear()
+
+        def reject(row_number, reason, part_number):
+            if not skip_invalid:
+                raise InvalidInputError(f"Invalid data found in row {row_number} of '{filename}': {reason}")
+            summary["skipped"] += 1
+            if part_number:
+                kept_part_numbers.append(part_number)
+
+        seen_part_numbers = set()
+        chunk, rows_done = [], 0
+        for row_number, values in enumerate(table.rows, start=2):
+            if is_blank_row(values):
+                continue
+            component_data, problems = checker.check(values)
+            if problems:
+                reject(row_number, problems[0][1], checker.part_number(values))
+                continue
+            if component_data['part_number'] in seen_part_numbers:
+                reject(row_number, f"Part number '{component_data['part_number']}' appears more than once.", None)
+                continue
+            seen_part_numbers.add(component_data['part_number'])
+            chunk.append(component_data)
+
+            if len(chunk) >= chunk_size:
+                apply(chunk)
+                rows_done += len(chunk)
+                chunk = []
+                if progress_callback:
+                    progress_callback(rows_done, rows_total)
+        if chunk or not rows_done:
+            apply(chunk)
+            rows_done += len(chunk)
+            if progress_callback:
+                progress_callback(rows_done, max(rows_total, rows_done))
+
+        if track_part_numbers:
+            # Rows skipped after the last chunk was applied
+            record_part_numbers(kept_part_numbers)
+            inventory_id = session_inventory_id(session)
+            summary["deleted"] = session.execute(text(
+                "DELETE FROM components WHERE part_number NOT IN (SELECT part_number FROM temp.import_part_numbers)"
+                + ("" if inventory_id is None else " AND inventory_id = :inventory_id")
+            ), {"inventory_id": inventory_id}).rowcount
+            session.execute(text("DROP TABLE temp.import_part_numbers"))
 
         session.commit()
-        return True
+        return summary
 
     except ComponentError as e:
+        session.rollback()
         raise e
     except Exception as e:
         session.rollback()
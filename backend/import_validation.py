@@ -0,0 +1,251 @@
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+# Validation starts in-process; a process pool only pays off once the file has more rows than this
+PARALLEL_VALIDATION_MIN_ROWS = 20000
+VALIDATION_CHUNK_SIZE = 5000
+# Free text that is imported exactly as written instead of being trimmed
+VERBATIM_FIELDS = ("notes",)
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    """One problem found in an import file. row is the 1-based sheet row, column the header as written in the file."""
+    row: int
+    column: str
+    reason: str
+
+    def __str__(self):
+        return f"Row {self.row}, {self.column}: {self.reason}"
+
+
+@dataclass
+class ValidationReport:
+    rows_checked: int = 0
+    issues: list[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def invalid_rows(self) -> set[int]:
+        return {issue.row for issue in self.issues}
+
+    @property
+    def valid_rows(self) -> int:
+        return self.rows_checked - len(self.invalid_rows)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.issues
+
+
+def _cell_text(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _cell_quantity(value) -> int:
+    if isinstance(value, bool):
+        raise ValueError("Quantity must be a whole number.")
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"Quantity must be a whole number, got {value}.")
+        value = int(value)
+    elif isinstance(value, str):
+        try:
+            value = int(value.strip())
+        except ValueError:
+            raise ValueError(f"Invalid quantity '{value}'.")
+    elif not isinstance(value, int):
+        raise ValueError("Quantity cannot be empty." if value is None else f"Invalid quantity '{value}'.")
+    if value < 0:
+        raise ValueError("Quantity cannot be negative.")
+    return value
+
+
+def _property_issue(value: str, properties: list[str]) -> str | None:
+    """
+    Checks a value written as "Name: value, Name: value" against the properties of its type. Values that are
+    not in that form (e.g. a plain "10k") are accepted as they are.
+    """
+    parts = value.split(",")
+    if not properties or not all(":" in part for part in parts):
+        return None
+    for part in parts:
+        name, property_value = (text.strip() for text in part.split(":", 1))
+        # Same matching as the add component dialog, which accepts a shortened property name
+        if not name or not any(prop.startswith(name) for prop in properties):
+            return f"Unknown property '{name}'. Expected: {', '.join(properties)}."
+        if not property_value:
+            return f"Property '{name}' has no value."
+    return None
+
+
+def is_blank_row(values: tuple) -> bool:
+    return all(v is None or (isinstance(v, str) and not v.strip()) for v in values)
+
+
+@dataclass
+class RowChecker:
+    """
+    Validates and converts import rows. Everything it needs is held in plain data, so it can be pickled into
+    worker processes that have not loaded the type registry.
+
+    Attributes:
+        column_index: Component field -> position of its column in the row.
+        column_names: Component field -> header as written in the file, for reporting.
+        type_properties: Registered backend type id -> its property names (may be empty).
+    """
+    column_index: dict[str, int]
+    column_names: dict[str, str]
+    type_properties: dict[str, list[str]]
+
+    def cell(self, values: tuple, field_name: str):
+        index = self.column_index.get(field_name)
+        return values[index] if index is not None and index < len(values) else None
+
+    def part_number(self, values: tuple) -> str | None:
+        return _cell_text(self.cell(values, "part_number"))
+
+    def check(self, values: tuple) -> tuple[dict | None, list[tuple[str, str]]]:
+        """
+        Returns the component data for a row, or None and every (field, reason) problem found in it.
+        """
+        component_data, problems = {}, []
+        for field_name in self.column_index:
+            if field_name in VERBATIM_FIELDS:
+                raw = self.cell(values, field_name)
+                component_data[field_name] = None if raw is None or (isinstance(raw, str) and not raw.strip()) else str(raw)
+            elif field_name != "quantity":
+                component_data[field_name] = _cell_text(self.cell(values, field_name))
+
+        if not component_data.get("part_number"):
+            problems.append(("part_number", "Part Number cannot be empty."))
+
+        component_type = component_data.get("component_type")
+        if not component_type:
+            problems.append(("component_type", "Type cannot be empty."))
+        else:
+            component_type = component_data["component_type"] = component_type.lower()
+            if component_type not in self.type_properties:
+                problems.append(("component_type", f"Unknown component type '{component_type}'."))
+                component_type = None
+
+        if not component_data.get("value"):
+            problems.append(("value", "Value cannot be empty."))
+        elif component_type:
+            issue = _property_issue(component_data["value"], self.type_properties[component_type])
+            if issue:
+                problems.append(("value", issue))
+
+        try:
+            component_data["quantity"] = _cell_quantity(self.cell(values, "quantity"))
+        except ValueError as e:
+            problems.append(("quantity", str(e)))
+
+        if component_data.get("id") is not None:
+            try:
+                component_data["id"] = uuid.UUID(component_data["id"])
+            except ValueError:
+                problems.append(("id", f"Invalid ID '{component_data['id']}'."))
+
+        return (None if problems else component_data), problems
+
+    def check_chunk(self, numbered_rows: list[tuple[int, tuple]]):
+        """Returns (issues, [(row, part number) of valid rows], non-blank rows checked) for one chunk."""
+        issues, part_numbers, checked = [], [], 0
+        for row_number, values in numbered_rows:
+            if is_blank_row(values):
+                continue
+            checked += 1
+            component_data, problems = self.check(values)
+            if component_data is None:
+                issues.extend(ValidationIssue(row_number, self.column_names.get(f, f), reason) for f, reason in problems)
+            else:
+                part_numbers.append((row_number, component_data["part_number"]))
+        return issues, part_numbers, checked
+
+
+def _check_chunk(checker: RowChecker, numbered_rows: list[tuple[int, tuple]]):
+    # Module level so the process pool can pickle it
+    return checker.check_chunk(numbered_rows)
+
+
+def _chunks(rows: Iterable[tuple], chunk_size: int, first_row: int) -> Iterator[list[tuple[int, tuple]]]:
+    chunk = []
+    for row_number, values in enumerate(rows, start=first_row):
+        chunk.append((row_number, tuple(values)))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_rows(rows: Iterable[tuple], checker: RowChecker, rows_total: int = 0, first_row: int = 2,
+                  chunk_size: int = VALIDATION_CHUNK_SIZE, workers: int | None = None,
+                  progress_callback=None) -> ValidationReport:
+    """
+    Checks every row and collects all problems instead of stopping at the first one.
+
+    The first PARALLEL_VALIDATION_MIN_ROWS rows are checked in this process. Larger files continue on a pool of
+    worker processes, chunk by chunk, while this process keeps reading; only a few chunks are in flight at a time
+    so memory use stays bounded. Duplicate part numbers are found here, since they span chunks.
+
+    Args:
+        rows: Row value tuples, without the header.
+        rows_total: Estimated row count for progress reporting, 0 if unknown.
+        first_row: Sheet row number of the first row.
+        workers: Number of worker processes. Defaults to the CPU count; 1 validates in-process only.
+        progress_callback: Called as progress_callback(rows_done, rows_total) after each chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    report = ValidationReport()
+    first_row_of = {}
+    rows_done = 0
+
+    def collect(chunk_size_done, result):
+        nonlocal rows_done
+        issues, part_numbers, checked = result
+        report.rows_checked += checked
+        report.issues.extend(issues)
+        for row_number, part_number in part_numbers:
+            first = first_row_of.setdefault(part_number, row_number)
+            if first != row_number:
+                report.issues.append(ValidationIssue(
+                    row_number, checker.column_names.get("part_number", "part_number"),
+                    f"Part number '{part_number}' appears more than once (first in row {first})."))
+        rows_done += chunk_size_done
+        if progress_callback:
+            progress_callback(rows_done, max(rows_total, rows_done))
+
+    pool, pending = None, deque()
+    try:
+        rows_read = 0
+        for chunk in _chunks(rows, chunk_size, first_row):
+            rows_read += len(chunk)
+            if pool is None and workers > 1 and rows_read > PARALLEL_VALIDATION_MIN_ROWS:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            if pool is None:
+                collect(len(chunk), checker.check_chunk(chunk))
+                continue
+            pending.append((len(chunk), pool.submit(_check_chunk, checker, chunk)))
+            if len(pending) >= workers * 2:
+                size, future = pending.popleft()
+                collect(size, future.result())
+        while pending:
+            size, future = pending.popleft()
+            collect(size, future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    # Duplicates are reported after the chunk that contains them; keep the report in sheet order
+    report.issues.sort(key=lambda issue: issue.row)
+    return report
@@ -1,6 +1,9 @@
 import uuid
-from backend.models import Component
-from backend.database import get_session
+from typing import Iterable
+from sqlalchemy import or_, select, intersect, insert, update, bindparam
+from backend.models import Component, ComponentSummary
+from backend.database import get_session, inventory_scope, session_inventory_id
+from backend import search_index, property_index, facets
 from backend.component_factory import ComponentFactory
 import backend.exceptions
 
@@ -51,6 +54,142 @@ def add_component(
     finally:
         session.close()
 
+BULK_CONFLICT_MODES = ("error", "skip", "replace")
+BULK_COLUMNS = tuple(c.name for c in Component.__table__.columns if c.name not in ("id", "inventory_id"))
+# Keeps each IN (...) list under SQLite's bound-parameter limit on older builds
+_IN_CLAUSE_CHUNK = 900
+
+
+def _prepare_bulk_row(row: dict, index: int) -> dict:
+    """Validates one row for bulk_add_components and fills optional columns with None."""
+    unknown = set(row) - set(BULK_COLUMNS) - {"id"}
+    if unknown:
+        raise backend.exceptions.InvalidInputError(f"Row {index}: unknown field(s) {', '.join(sorted(unknown))}.")
+    part_number = str(row.get("part_number") or "").strip()
+    if not part_number:
+        raise backend.exceptions.InvalidInputError(f"Row {index}: Part number cannot be empty.")
+    component_type = str(row.get("component_type") or "").strip().lower()
+    if not ComponentFactory.is_registered(component_type):
+        raise backend.exceptions.InvalidInputError(
+            f"Row {index} ('{part_number}'): Unknown component type '{component_type}'.")
+    if row.get("value") is None:
+        raise backend.exceptions.InvalidInputError(f"Row {index} ('{part_number}'): Value cannot be empty.")
+    try:
+        quantity = int(row.get("quantity"))
+    except (TypeError, ValueError):
+        raise backend.exceptions.InvalidQuantityError(f"Row {index} ('{part_number}'): Quantity must be a whole number.")
+    if quantity < 0:
+        raise backend.exceptions.InvalidQuantityError(f"Row {index} ('{part_number}'): Quantity cannot be negative.")
+
+    component_id = row.get("id")
+    if component_id is None:
+        component_id = uuid.uuid4()
+    elif not isinstance(component_id, uuid.UUID):
+        try:
+            component_id = uuid.UUID(str(component_id).strip())
+        except ValueError:
+            raise backend.exceptions.InvalidInputError(f"Row {index} ('{part_number}'): Invalid id '{component_id}'.")
+
+    prepared = {name: (row.get(name) or None) for name in BULK_COLUMNS}
+    prepared.update(id=component_id, part_number=part_number, component_type=component_type,
+                    value=str(row["value"]), quantity=quantity)
+    return prepared
+
+
+def _assign_to_inventory(session, rows: list[dict], inventory_id: str) -> list[dict]:
+    """
+    Tags rows for one inventory of a shared database. Ids are unique across all of its inventories, so a row
+    whose id already belongs to another inventory's copy of the part (e.g. from a shared import file) gets a
+    new one.
+    """
+    ids = [row["id"] for row in rows]
+    taken = set()
+    for start in range(0, len(ids), _IN_CLAUSE_CHUNK):
+        chunk = ids[start:start + _IN_CLAUSE_CHUNK]
+        taken.update(session.execute(
+            select(Component.__table__.c.id).where(Component.__table__.c.id.in_(chunk))).scalars())
+    return [{**row, "inventory_id": inventory_id, "id": uuid.uuid4() if row["id"] in taken else row["id"]}
+            for row in rows]
+
+
+def bulk_add_components(rows: Iterable[dict], on_conflict: str = "error", session=None) -> dict[str, int]:
+    """
+    Adds many components in one transaction using set-based statements instead of one ORM round trip per row.
+
+    Args:
+        rows: Dicts keyed by Component column names. id is optional and generated when missing.
+        on_conflict: What to do with a part number that already exists, in the database or earlier in rows:
+            "error" raises DuplicateComponentError and writes nothing, "skip" keeps the first occurrence,
+            "replace" overwrites the stored fields (the stored component keeps its id).
+        session: Run inside the caller's session and leave committing to the caller.
+
+    Returns:
+        Counts of rows {"inserted", "updated", "skipped"}.
+    """
+    if on_conflict not in BULK_CONFLICT_MODES:
+        raise backend.exceptions.InvalidInputError(
+            f"on_conflict must be one of {', '.join(BULK_CONFLICT_MODES)}, got '{on_conflict}'.")
+
+    prepared, skipped = {}, 0
+    for index, row in enumerate(rows, start=1):
+        row = _prepare_bulk_row(row, index)
+        part_number = row["part_number"]
+        if part_number in prepared:
+            if on_conflict == "error":
+                raise backend.exceptions.DuplicateComponentError(
+                    f"Part number '{part_number}' appears more than once in the data.")
+            skipped += 1
+            if on_conflict == "skip":
+                continue
+        prepared[part_number] = row
+
+    owns_session = session is None
+    session = session or get_session()
+    try:
+        part_numbers = list(prepared)
+        existing = set()
+        for start in range(0, len(part_numbers), _IN_CLAUSE_CHUNK):
+            chunk = part_numbers[start:start + _IN_CLAUSE_CHUNK]
+            existing.update(session.execute(
+                select(Component.part_number).where(Component.part_number.in_(chunk))).scalars())
+
+        if existing and on_conflict == "error":
+            sample = ", ".join(sorted(existing)[:5])
+            raise backend.exceptions.DuplicateComponentError(
+                f"{len(existing)} part number(s) already exist, e.g. {sample}.")
+
+        new_rows = [row for pn, row in prepared.items() if pn not in existing]
+        changed_rows = [row for pn, row in prepared.items() if pn in existing]
+        if new_rows and (inventory_id := session_inventory_id(session)) is not None:
+            new_rows = _assign_to_inventory(session, new_rows, inventory_id)
+        if new_rows:
+            session.execute(insert(Component.__table__), new_rows)
+        if changed_rows and on_conflict == "replace":
+            # Core executemany; bind names must differ from the column names being set
+            statement = update(Component.__table__).where(
+                Component.__table__.c.part_number == bindparam("match_part_number"), inventory_scope(session)
+            ).values({name: bindparam(name) for name in BULK_COLUMNS if name != "part_number"})
+            # id is left out: any column key in the parameters would be added to the SET clause
+            session.execute(statement, [{**{name: row[name] for name in BULK_COLUMNS},
+                                         "match_part_number": row["part_number"]} for row in changed_rows])
+        if owns_session:
+            session.commit()
+        replaced = on_conflict == "replace"
+        return {
+            "inserted": len(new_rows),
+            "updated": len(changed_rows) if replaced else 0,
+            "skipped": skipped + (0 if replaced else len(changed_rows)),
+        }
+    except Exception as e:
+        if owns_session:
+            session.rollback()
+        if isinstance(e, backend.exceptions.ComponentError):
+            raise
+        raise backend.exceptions.DatabaseError(f"Database error during bulk add: {e}") from e
+    finally:
+        if owns_session:
+            session.close()
+
 def remove_component_quantity(component_id: uuid.UUID, quantity: int) -> Component | None:
     """Removes a specified quantity from a component. The component will remain even if its quantity becomes zero."""
     if not isinstance(quantity, int) or quantity <= 0:
@@ -70,6 +209,7 @@ def remove_component_quantity(component_id: uuid.UUID, quantity: int) -> Compone
 
         updated_component = component
         session.commit()
+        session.refresh(updated_component)
         return updated_component
 
     except Exception as e:
@@ -96,17 +236,27 @@ def delete_component_permanently(component_id: uuid.UUID) -> bool:
     finally:
         session.close()
 
-def delete_components_by_type(backend_id: str) -> int:
-    session = get_session()
+def delete_components_by_type(backend_id: str, session=None) -> int:
+    """
+    Deletes every component of backend_id and returns how many were removed.
+
+    Args:
+        session: Run inside the caller's session and leave committing to the caller.
+    """
+    owns_session = session is None
+    session = session or get_session()
     try:
         num_deleted = session.query(Component).filter_by(component_type=backend_id).delete(synchronize_session=False)
-        session.commit()
+        if owns_session:
+            session.commit()
         return num_deleted
     except Exception as e:
-        session.rollback()
+        if owns_session:
+            session.rollback()
         raise backend.exceptions.DatabaseError(f"Error deleting components by type: {e}") from e
     finally:
-        session.close()
+        if owns_session:
+            session.close()
 
 
 def update_component(component_id: uuid.UUID, data: dict) -> Component:
@@ -116,12 +266,15 @@ def update_component(component_id: uuid.UUID, data: dict) -> Component:
         if not component:
             raise backend.exceptions.ComponentNotFoundError(f"Component with ID {component_id} not found.")
 
+        old_facets = (component.component_type, component.quantity, component.location)
         for key, value in data.items():
             if hasattr(component, key):
                 setattr(component, key, value)
             else:
                 print(f"WARNING: Tried to update non-existent attribute '{key}'")
 
+        # Lets the cached type and stock counts follow the edit instead of being counted again
+        facets.record_change(session, old_facets, (component.component_type, component.quantity, component.location))
         session.commit()
         session.refresh(component)
         return component
@@ -135,6 +288,7 @@ def update_component(component_id: uuid.UUID, data: dict) -> Component:
 
 
 def get_component_by_id(component_id: uuid.UUID) -> Component | None:
+    """Loads the full component, notes included, e.g. for the details dialog of a listed ComponentSummary."""
     session = get_session()
     try:
         return session.query(Component).filter_by(id=component_id).first()
@@ -144,16 +298,210 @@ def get_component_by_id(component_id: uuid.UUID) -> Component | None:
         session.close()
 
 
-def get_all_components() -> list[Component] | None:
+def get_component_properties(component_id: uuid.UUID, session=None) -> dict[str, str]:
+    """
+    Returns the "Name: value" properties of a component in their stored order, read from the property index
+    instead of parsing Component.value. Match them to the names of its type with property_index.values_for().
+
+    Args:
+        session: Read through the caller's session instead of the active inventory.
+    """
+    owns_session = session is None
+    session = session or get_session()
+    try:
+        properties_table, components = property_index.property_table, Component.__table__
+        rows = session.execute(
+            select(properties_table.c.name, properties_table.c.value)
+            .select_from(properties_table.join(components, components.c.id == properties_table.c.component_id))
+            .where(properties_table.c.component_id == component_id, inventory_scope(session))
+            .order_by(properties_table.c.position)
+        )
+        properties = {}
+        for name, value in rows:
+            properties.setdefault(name, value)
+        return properties
+    except Exception as e:
+        raise backend.exceptions.DatabaseError(f"Error fetching properties of component {component_id}: {e}") from e
+    finally:
+        if owns_session:
+            session.close()
+
+
+def get_all_components() -> list[ComponentSummary] | None:
+    """Lists every component without its notes; see ComponentSummary."""
     session = get_session()
     try:
-        return session.query(Component).order_by(Component.part_number).all()
+        rows = session.execute(select(*ComponentSummary.columns()).order_by(Component.part_number))
+        return [ComponentSummary(*row) for row in rows]
     except Exception as e:
         raise backend.exceptions.DatabaseError(f"Error fetching all components: {e}") from e
     finally:
         session.close()
 
 
+SORTABLE_COLUMNS = {
+    "part_number": Component.part_number,
+    "component_type": Component.component_type,
+    "value": Component.value,
+    "quantity": Component.quantity,
+    "location": Component.location,
+}
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _join_full_text_match(query, match_expression: str):
+    fts, keys = search_index.fts_table, search_index.key_table
+    return (query.join(keys, keys.c.component_id == Component.id)
+            .join(fts, fts.c.rowid == keys.c.search_key)
+            .filter(fts.c[search_index.FTS_TABLE_NAME].op("MATCH")(match_expression)))
+
+
+def _property_filter(name: str, value: str):
+    properties_table = property_index.property_table
+    return Component.id.in_(select(properties_table.c.component_id).where(
+        properties_table.c.name == name, properties_table.c.value == value))
+
+
+def _range_filter(ranges: list[property_index.PropertyRange], backend_type: str | None):
+    """One IN over the components within every range, each read from the (type, name, number) index."""
+    properties_table = property_index.property_table
+    selects = []
+    for property_range in ranges:
+        select_range = select(properties_table.c.component_id).where(property_range.condition())
+        if backend_type:
+            select_range = select_range.where(properties_table.c.component_type == backend_type)
+        selects.append(select_range)
+    return Component.id.in_(selects[0] if len(selects) == 1 else intersect(*selects))
+
+
+def _build_search_query(session, term: str | None, backend_type: str | None,
+                        properties: dict[str, str] | None = None,
+                        ranges: Iterable[property_index.PropertyRange] = ()):
+    query = session.query(Component)
+    if backend_type:
+        query = query.filter(Component.component_type == backend_type)
+    for name, value in (properties or {}).items():
+        query = query.filter(_property_filter(name, value))
+    if ranges:
+        query = query.filter(_range_filter(list(ranges), backend_type))
+    if not term:
+        return query
+
+    # Token prefixes are answered from the full-text index, which also covers notes. Only when that finds nothing
+    # is the term scanned for as a substring, so "700" still finds "4700".
+    match_expression = search_index.build_match_expression(term)
+    if match_expression and search_index.is_enabled(session.get_bind()):
+        full_text_query = _join_full_text_match(query, match_expression)
+        if full_text_query.with_entities(Component.id).first() is not None:
+            return full_text_query
+    pattern = f"%{_escape_like(term)}%"
+    return query.filter(or_(
+        Component.part_number.ilike(pattern, escape="\\"),
+        Component.value.ilike(pattern, escape="\\"),
+        Component.location.ilike(pattern, escape="\\"),
+    ))
+
+
+def search_components(
+        term: str | None = None,
+        backend_type: str | None = None,
+        order_by: str = "part_number",
+        descending: bool = False,
+        limit: int | None = None,
+        offset: int = 0,
+        properties: dict[str, str] | None = None,
+        ranges: Iterable[property_index.PropertyRange] | None = None,
+        session=None
+) -> list[ComponentSummary]:
+    """
+    Returns the components matching a search term and/or type, filtered and sorted by the database. Rows are
+    ComponentSummary records without notes; use get_component_by_id() for the full component.
+
+    Args:
+        term: Case-insensitive search text. With a full-text index its tokens are matched as prefixes over part
+            number, value, location and notes; if that finds nothing, or there is no index, the term is matched as
+            a substring of part number, value and location.
+        backend_type: Backend type id (e.g. 'resistor') to restrict the results to.
+        order_by: One of the keys in SORTABLE_COLUMNS.
+        descending: Sort in descending order when True.
+        limit: Maximum number of rows to return, or None for all rows.
+        offset: Number of matching rows to skip.
+        properties: Exact property values to require, e.g. {"Tolerance (%)": "5"}, looked up in the property index.
+        ranges: Numeric limits on properties, e.g. PropertyRange("Resistance (Ω)", 4700, 10000). Values are
+            compared after unit prefixes are applied (see property_index.parse_quantity).
+        session: Search through the caller's session (e.g. another inventory file) instead of the active inventory.
+    """
+    if order_by not in SORTABLE_COLUMNS:
+        raise backend.exceptions.InvalidInputError(f"Cannot sort components by '{order_by}'.")
+
+    sort_column = SORTABLE_COLUMNS[order_by]
+    owns_session = session is None
+    session = session or get_session()
+    try:
+        query = _build_search_query(session, term.strip() if term else None, backend_type, properties, ranges)
+        if descending:
+            query = query.order_by(sort_column.desc(), Component.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Component.id.asc())
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return [ComponentSummary(*row) for row in query.with_entities(*ComponentSummary.columns())]
+    except Exception as e:
+        raise backend.exceptions.DatabaseError(f"Error searching components: {e}") from e
+    finally:
+        if owns_session:
+            session.close()
+
+
+def component_matches_search(component_id: uuid.UUID, term: str | None = None,
+                             backend_type: str | None = None, properties: dict[str, str] | None = None,
+                             ranges: Iterable[property_index.PropertyRange] | None = None) -> bool:
+    """Tells whether a single component would be returned by search_components with the same filters."""
+    if not (term and term.strip()) and not backend_type and not properties and not ranges:
+        return True
+
+    session = get_session()
+    try:
+        query = _build_search_query(session, term.strip() if term else None, backend_type, properties, ranges)
+        return query.filter(Component.id == component_id).with_entities(Component.id).first() is not None
+    except Exception as e:
+        raise backend.exceptions.DatabaseError(f"Error matching component {component_id} against search: {e}") from e
+    finally:
+        session.close()
+
+
+def full_text_search(term: str, prefix: bool = True, limit: int = 50) -> list[Component]:
+    """
+    Ranked full-text search over part number, value, location and notes.
+
+    Args:
+        term: Free text; every token must match.
+        prefix: Match tokens as prefixes when True, as whole tokens when False.
+        limit: Maximum number of results, best matches first.
+    """
+    match_expression = search_index.build_match_expression(term, prefix=prefix)
+    if not match_expression:
+        return []
+
+    session = get_session()
+    try:
+        if not search_index.is_enabled(session.get_bind()):
+            raise backend.exceptions.DatabaseError("Full-text search index is not available for this inventory.")
+        query = _join_full_text_match(session.query(Component), match_expression)
+        return query.order_by(search_index.fts_table.c.rank).limit(limit).all()
+    except backend.exceptions.DatabaseError:
+        raise
+    except Exception as e:
+        raise backend.exceptions.DatabaseError(f"Error running full-text search for '{term}': {e}") from e
+    finally:
+        session.close()
+
+
 def get_components_by_part_number(part_number: str) -> list[Component]:
     session = get_session()
     try:
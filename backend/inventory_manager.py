@@ -1,8 +1,43 @@
 import os
-from .database import get_config_session
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .database import (get_config_session, get_inventory_engine, inventory_file_session, release_inventory_db,
+                       switch_inventory_db)
+from .models import Component
 from .models_custom import Inventory
 from . import exceptions
 
+# Schema name the destination inventory is attached under during a transfer
+_TRANSFER_SCHEMA = "transfer_dst"
+# Inventories processed at the same time by run_on_all_inventories. Each one is a separate SQLite file,
+# so they do not contend for locks; the limit only bounds open files and threads.
+MAX_INVENTORY_WORKERS = 8
+# When this file exists in the app folder, every inventory lives in it instead of in its own db_path file
+SHARED_DATABASE_FILENAME = "inventories.db"
+_MIGRATION_SCHEMA = "migrate_src"
+
+
+def get_inventory_db_path(inventory: Inventory, app_path: str) -> str:
+    return inventory.db_path if os.path.isabs(inventory.db_path) else os.path.join(app_path, inventory.db_path)
+
+
+def get_shared_db_path(app_path: str) -> str | None:
+    """Returns the path of the database shared by all inventories, or None if each inventory has its own file."""
+    path = os.path.join(app_path, SHARED_DATABASE_FILENAME)
+    return path if os.path.exists(path) else None
+
+
+def open_inventory(inventory: Inventory, app_path: str):
+    """Makes inventory the active one, from the shared database if there is one, otherwise from its own file."""
+    if shared_path := get_shared_db_path(app_path):
+        switch_inventory_db(f"sqlite:///{shared_path}", inventory_id=inventory.id)
+    else:
+        switch_inventory_db(f"sqlite:///{get_inventory_db_path(inventory, app_path)}")
+
 
 def get_all_inventories():
     session = get_config_session()
@@ -14,6 +49,42 @@ def get_all_inventories():
         session.close()
 
 
+def run_on_all_inventories(operation: Callable[[Session], object], app_path: str,
+                           inventories: list[Inventory] | None = None, read_only: bool = False) -> dict[str, object]:
+    """
+    Runs operation(session) against every inventory in parallel on a thread pool.
+
+    Each inventory gets its own short-lived connection and transaction (see database.inventory_file_session),
+    which commits if the operation returns and rolls back if it raises. The active inventory and the engine
+    cache are not touched. read_only opens the connections with writes disabled. In a shared database each
+    session is limited to its inventory, and writing operations run one after the other since they would
+    only wait for each other's lock.
+
+    Returns:
+        {inventory name: the operation's result, or the exception it raised}, in inventory name order.
+    """
+    inventories = get_all_inventories() if inventories is None else inventories
+    shared_path = get_shared_db_path(app_path)
+
+    def run(inventory):
+        try:
+            if shared_path:
+                session_scope = inventory_file_session(shared_path, read_only, inventory_id=inventory.id)
+            else:
+                session_scope = inventory_file_session(get_inventory_db_path(inventory, app_path), read_only)
+            with session_scope as session:
+                return operation(session)
+        except Exception as e:
+            return e
+
+    if not inventories:
+        return {}
+    workers = 1 if shared_path and not read_only else min(MAX_INVENTORY_WORKERS, len(inventories))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(run, inventories)
+        return {inventory.name: result for inventory, result in zip(inventories, results)}
+
+
 def add_new_inventory(name: str, db_path: str) -> Inventory:
     session = get_config_session()
     try:
@@ -60,11 +131,30 @@ def delete_inventory(inventory_id: str, app_path: str) -> bool:
     finally:
         session.close()
 
+    if shared_path := get_shared_db_path(app_path):
+        try:
+            with get_inventory_engine(f"sqlite:///{shared_path}", shared=True).begin() as conn:
+                deleted = conn.execute(text("DELETE FROM components WHERE inventory_id = :inventory_id"),
+                                       {"inventory_id": inventory_id}).rowcount
+            print(f"INFO: Deleted {deleted} components of inventory '{inventory_id}' from the shared database.")
+        except Exception as e:
+            print(f"WARNING: Could not delete the components of inventory '{inventory_id}' from the shared database. "
+                  f"They are orphaned. DB entry was removed. Error: {e}")
+        # The inventory's own file, if any, is the copy left behind when the inventories were moved together
+        if not os.path.exists(db_file_path):
+            db_file_path = None
+
     if db_file_path:
+        # A cached engine keeps the file open, which blocks deleting it on Windows
+        release_inventory_db(f"sqlite:///{db_file_path}")
         try:
             if os.path.exists(db_file_path):
                 os.remove(db_file_path)
                 print(f"INFO: Successfully deleted inventory file: {db_file_path}")
+                # WAL side files are normally removed when the last connection closes, but not after a crash
+                for suffix in ("-wal", "-shm"):
+                    if os.path.exists(db_file_path + suffix):
+                        os.remove(db_file_path + suffix)
             else:
                 # The record was deleted, but the file was already gone. This is not an error.
                 print(f"WARNING: Inventory DB entry removed, but associated file was not found at '{db_file_path}'.")
@@ -72,4 +162,193 @@ def delete_inventory(inventory_id: str, app_path: str) -> bool:
             # The DB record is gone, but the file could not be deleted. This leaves an orphaned file.
             print(f"WARNING: Could not delete inventory file '{db_file_path}'. The file may be orphaned. DB entry was removed. Error: {e}")
 
-    return True
\ No newline at end of file
+    return True
+
+
+def transfer_components(source: Inventory, destination: Inventory, quantities: dict, app_path: str) -> list[Component]:
+    """
+    Moves stock from one inventory to another in a single transaction.
+
+    The destination file is ATTACHed to a connection of the source inventory, and a few set-based statements
+    check every quantity, add it to the destination and take it from the source. A destination part with the
+    same part number gets the quantity added; other parts are copied with a new id. Either every quantity
+    moves or none does. The active inventory is not switched.
+
+    With journal_mode=WAL, SQLite commits the two files one after the other. Only a crash during the COMMIT
+    itself can leave them out of step. Use journal_mode=DELETE in config.ini to close that gap as well.
+    When the inventories share one database (see migrate_to_shared_database) the same statements run
+    within that one file, so no ATTACH is needed and the commit is atomic in every journal mode.
+
+    Args:
+        quantities: {component id in the source inventory: quantity to move}.
+
+    Returns:
+        The source components with their reduced quantities.
+    """
+    requests = []
+    for component_id, quantity in quantities.items():
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            raise exceptions.InvalidQuantityError(f"Quantity to transfer must be a positive integer, got {quantity!r}.")
+        if not isinstance(component_id, uuid.UUID):
+            component_id = uuid.UUID(str(component_id))
+        requests.append({"id": component_id, "quantity": quantity, "new_id": uuid.uuid4()})
+
+    shared_path = get_shared_db_path(app_path)
+    source_path = shared_path or get_inventory_db_path(source, app_path)
+    destination_path = shared_path or get_inventory_db_path(destination, app_path)
+    if (source.id == destination.id if shared_path else
+            os.path.normcase(os.path.abspath(source_path)) == os.path.normcase(os.path.abspath(destination_path))):
+        raise exceptions.InvalidInputError("Source and destination inventory are the same.")
+    if not requests:
+        return []
+
+    try:
+        if not shared_path:
+            # Opening the destination creates or migrates its schema, including the search index triggers
+            get_inventory_engine(f"sqlite:///{destination_path}")
+        engine = get_inventory_engine(f"sqlite:///{source_path}", shared=bool(shared_path))
+    except Exception as e:
+        raise exceptions.DatabaseError(f"Could not open inventories for transfer: {e}") from e
+
+    try:
+        with engine.connect() as connection:
+            if shared_path:
+                return _move_stock(connection, source, destination, requests, "main.components",
+                                   "d.inventory_id = :destination_id", "s.inventory_id = :source_id")
+            connection.exec_driver_sql(f"ATTACH DATABASE ? AS {_TRANSFER_SCHEMA}", (destination_path,))
+            # ATTACH runs outside any SQLite transaction; end the one SQLAlchemy began for it
+            connection.commit()
+            try:
+                return _move_stock(connection, source, destination, requests, f"{_TRANSFER_SCHEMA}.components")
+            finally:
+                connection.exec_driver_sql(f"DETACH DATABASE {_TRANSFER_SCHEMA}")
+    except exceptions.ComponentError:
+        raise
+    except Exception as e:
+        raise exceptions.DatabaseError(f"Error while transferring components: {e}") from e
+
+
+def _move_stock(connection, source: Inventory, destination: Inventory, requests: list[dict], destination_table: str,
+                destination_scope: str = "1", source_scope: str = "1") -> list[Component]:
+    """
+    Runs the statements of transfer_components in one transaction on connection, whose main database holds the
+    source inventory. In a shared database both scopes pick the inventory's rows out of the same table.
+    """
+    table = Component.__table__
+    copied_columns = [c.name for c in table.columns if c.name not in ("id", "quantity", "inventory_id")]
+    copied = ", ".join(copied_columns)
+    copied_from_source = ", ".join(f"s.{name}" for name in copied_columns)
+    shared = destination_table == "main.components"
+    params = {"source_id": source.id, "destination_id": destination.id}
+
+    with connection.begin():
+        connection.execute(text(
+            "CREATE TEMP TABLE IF NOT EXISTS transfer_request "
+            "(id CHAR(32) PRIMARY KEY, quantity INTEGER NOT NULL, new_id CHAR(32) NOT NULL)"))
+        connection.execute(text("DELETE FROM temp.transfer_request"))
+        connection.execute(
+            text("INSERT INTO temp.transfer_request (id, quantity, new_id) VALUES (:id, :quantity, :new_id)")
+            .bindparams(bindparam("id", type_=table.c.id.type), bindparam("new_id", type_=table.c.id.type)),
+            requests)
+
+        problem = connection.execute(text(
+            "SELECT r.id, r.quantity, s.part_number, s.quantity FROM temp.transfer_request r "
+            f"LEFT JOIN main.components s ON s.id = r.id AND {source_scope} "
+            "WHERE s.id IS NULL OR s.quantity < r.quantity LIMIT 1"), params).first()
+        if problem:
+            request_id, wanted, part_number, available = problem
+            if part_number is None:
+                raise exceptions.ComponentNotFoundError(
+                    f"Component with id {uuid.UUID(request_id)} not found in '{source.name}'.")
+            raise exceptions.StockError(f"Not enough stock for {part_number}. Available: {available}, "
+                                        f"Tried to transfer: {wanted}")
+
+        connection.execute(text(
+            f"UPDATE {destination_table} AS d SET quantity = d.quantity + t.quantity "
+            f"FROM (SELECT s.part_number, SUM(r.quantity) AS quantity FROM temp.transfer_request r "
+            f"      JOIN main.components s ON s.id = r.id GROUP BY s.part_number) AS t "
+            f"WHERE d.part_number = t.part_number AND {destination_scope}"), params)
+        connection.execute(text(
+            f"INSERT INTO {destination_table} (id, quantity, {'inventory_id, ' if shared else ''}{copied}) "
+            f"SELECT r.new_id, r.quantity, {':destination_id, ' if shared else ''}{copied_from_source} "
+            f"FROM temp.transfer_request r JOIN main.components s ON s.id = r.id "
+            f"WHERE s.part_number NOT IN (SELECT part_number FROM {destination_table} AS d WHERE {destination_scope})"),
+            params)
+        connection.execute(text(
+            "UPDATE main.components AS s SET quantity = s.quantity - r.quantity "
+            "FROM temp.transfer_request AS r WHERE r.id = s.id"))
+        connection.execute(text("DELETE FROM temp.transfer_request"))
+
+    with Session(bind=connection) as session:
+        updated = session.query(Component).filter(Component.id.in_([r["id"] for r in requests])).all()
+        session.expunge_all()
+    return updated
+
+
+def migrate_to_shared_database(app_path: str, inventories: list[Inventory] | None = None) -> dict[str, int]:
+    """
+    Copies every inventory from its own file into one shared database, after which all inventories are opened
+    from there (see get_shared_db_path). Transfers and searches across inventories then run as single
+    statements on one file instead of ATTACHing or opening each file.
+
+    The shared database is built under a temporary name and only put in place once every inventory has been
+    copied, so a failure leaves the per-file layout in use. The original files are not changed; they stay
+    behind as a backup of the inventories as they were at migration time. A component id that is already taken
+    by an inventory copied earlier gets a new id.
+
+    Returns:
+        {inventory name: components copied}, in inventory name order.
+    """
+    shared_path = os.path.join(app_path, SHARED_DATABASE_FILENAME)
+    if os.path.exists(shared_path):
+        raise exceptions.InvalidInputError("The inventories already share one database.")
+    inventories = get_all_inventories() if inventories is None else inventories
+    building_path = shared_path + ".partial"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(building_path + suffix):
+            os.remove(building_path + suffix)
+
+    copied_columns = [c.name for c in Component.__table__.columns if c.name not in ("id", "inventory_id")]
+    src = _MIGRATION_SCHEMA
+    counts = {}
+    building_url = f"sqlite:///{building_path}"
+    try:
+        with get_inventory_engine(building_url, shared=True).connect() as connection:
+            for inventory in inventories:
+                path = get_inventory_db_path(inventory, app_path)
+                if not os.path.exists(path):
+                    counts[inventory.name] = 0
+                    continue
+                # Opening the file brings it to the current schema, so its columns match the shared table
+                get_inventory_engine(f"sqlite:///{path}")
+                connection.exec_driver_sql(f"ATTACH DATABASE ? AS {src}", (path,))
+                # ATTACH runs outside any SQLite transaction; end the one SQLAlchemy began for it
+                connection.commit()
+                try:
+                    with connection.begin():
+                        counts[inventory.name] = connection.execute(text(
+                            f"INSERT INTO main.components (id, inventory_id, {', '.join(copied_columns)}) "
+                            f"SELECT CASE WHEN s.id IN (SELECT id FROM main.components) "
+                            f"            THEN lower(hex(randomblob(16))) ELSE s.id END, "
+                            f"       :inventory_id, {', '.join(f's.{name}' for name in copied_columns)} "
+                            f"FROM {src}.components AS s"), {"inventory_id": inventory.id}).rowcount
+                except IntegrityError as e:
+                    raise exceptions.DatabaseError(
+                        f"Inventory '{inventory.name}' uses a part number more than once and cannot be moved "
+                        f"into the shared database: {e.orig}") from e
+                finally:
+                    connection.exec_driver_sql(f"DETACH DATABASE {src}")
+                print(f"INFO: Copied {counts[inventory.name]} components of '{inventory.name}' into the shared database.")
+            connection.exec_driver_sql("ANALYZE")
+            connection.commit()
+    except exceptions.ComponentError:
+        raise
+    except Exception as e:
+        raise exceptions.DatabaseError(f"Error while moving inventories into one database: {e}") from e
+    finally:
+        # Closing the last connection checkpoints the WAL into the file, so the file alone can be renamed
+        release_inventory_db(building_url)
+
+    os.replace(building_path, shared_path)
+    print(f"INFO: All inventories now share {shared_path}")
+    return counts
@@ -0,0 +1,116 @@
+from typing import Callable
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+from .models import Component
+from . import property_index
+
+# Each step upgrades an inventory database by one schema version. Steps must be idempotent: SQLite runs
+# DDL outside the surrounding transaction, so a step interrupted half-way is simply run again next time.
+Migration = tuple[int, str, Callable[[Connection], None]]
+
+
+def _add_missing_columns(conn: Connection):
+    """Adds nullable columns that inventory files created by older releases do not have yet."""
+    existing = {column["name"] for column in inspect(conn).get_columns(Component.__tablename__)}
+    for column in Component.__table__.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            raise RuntimeError(f"Cannot add required column '{column.name}' to an existing inventory.")
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(f"ALTER TABLE {Component.__tablename__} ADD COLUMN {column.name} {column_type}")
+
+
+def _create_lookup_indexes(conn: Connection):
+    """Indexes the columns used for duplicate checks, type filters and sorting."""
+    duplicate = conn.exec_driver_sql(
+        "SELECT part_number FROM components GROUP BY part_number HAVING COUNT(*) > 1 LIMIT 1"
+    ).first()
+    if duplicate:
+        print(f"WARNING: Part number '{duplicate[0]}' is used more than once; "
+              f"creating a non-unique part number index for this inventory.")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_components_part_number ON components (part_number)")
+    else:
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_components_part_number ON components (part_number)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_components_component_type ON components (component_type)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_components_location ON components (location)")
+    conn.exec_driver_sql("ANALYZE components")
+
+
+def _create_property_index(conn: Connection):
+    """Parses the "Name: value" pairs of every existing component into the property table."""
+    property_index.rebuild_property_index(conn)
+
+
+MIGRATIONS: list[Migration] = [
+    (1, "add columns missing from older inventory files", _add_missing_columns),
+    (2, "index part number, component type and location", _create_lookup_indexes),
+    (3, "add the inventory_id column used by shared databases", _add_missing_columns),
+    (4, "store component properties in an indexed table", _create_property_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# A shared database holds the components of every inventory, told apart by inventory_id. Part numbers are
+# unique per inventory, and every lookup the app makes within one inventory leads with inventory_id.
+# The plain part number index serves searches across all inventories.
+_SHARED_MARKER_INDEX = "ix_components_inventory_part_number"
+SHARED_INDEXES = [
+    f"CREATE UNIQUE INDEX IF NOT EXISTS {_SHARED_MARKER_INDEX} ON components (inventory_id, part_number)",
+    "CREATE INDEX IF NOT EXISTS ix_components_inventory_type ON components (inventory_id, component_type)",
+    "CREATE INDEX IF NOT EXISTS ix_components_inventory_location ON components (inventory_id, location)",
+    "CREATE INDEX IF NOT EXISTS ix_components_part_number ON components (part_number)",
+]
+
+
+def is_shared_database(conn: Connection) -> bool:
+    return conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (_SHARED_MARKER_INDEX,)
+    ).first() is not None
+
+
+def create_shared_schema(engine: Engine):
+    """
+    Lays out an empty database for the components of every inventory. Must run before the regular
+    create_all, which would make part numbers unique across all inventories. The database starts at
+    SCHEMA_VERSION, so the per-file migrations are skipped.
+    """
+    with engine.begin() as conn:
+        if not inspect(conn).has_table(Component.__tablename__):
+            conn.execute(CreateTable(Component.__table__))
+            conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        elif not is_shared_database(conn):
+            raise RuntimeError("The database already holds a single inventory and cannot be shared.")
+        for statement in SHARED_INDEXES:
+            conn.exec_driver_sql(statement)
+        property_index.ensure_property_index(conn)
+
+
+def get_schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Brings an inventory database up to SCHEMA_VERSION. The version is stored in SQLite's user_version header,
+    so files that are already current cost a single PRAGMA read.
+
+    Returns:
+        The schema version of the database after migrating.
+    """
+    with engine.begin() as conn:
+        version = get_schema_version(conn)
+        if version > SCHEMA_VERSION:
+            print(f"WARNING: Inventory DB schema version {version} is newer than this application "
+                  f"supports ({SCHEMA_VERSION}).")
+            return version
+        for target, description, step in MIGRATIONS:
+            if target <= version:
+                continue
+            print(f"INFO: Migrating inventory DB to schema version {target}: {description}")
+            step(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {target}")
+            version = target
+    return version
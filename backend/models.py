@@ -9,15 +9,18 @@ class Component(Base):
     __tablename__ = "components"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    part_number = Column(String, nullable=False)
-    component_type = Column(String, nullable=False)
+    part_number = Column(String, nullable=False, unique=True, index=True)
+    component_type = Column(String, nullable=False, index=True)
     value = Column(String, nullable=False)
     quantity = Column(Integer, nullable=False)
     purchase_link = Column(String, nullable=True)
     datasheet_link = Column(String, nullable=True)
-    location = Column(String, nullable=True)
+    location = Column(String, nullable=True, index=True)
     notes = Column(Text, nullable=True)
     image_path = Column(String, nullable=True) # Relative path to image
+    # Owning inventory when all inventories share one database (see migrations.create_shared_schema);
+    # always NULL in a database file of its own
+    inventory_id = Column(String, nullable=True)
 
     __mapper_args__ = {
         "polymorphic_on": component_type,
@@ -28,6 +31,27 @@ class Component(Base):
     def get_specifications(self):
         pass
 
+class ComponentSummary:
+    """
+    A component as the inventory table lists it: every column except notes, read as a plain row instead of an ORM
+    object. Fetch the full Component with inventory.get_component_by_id() when it is opened.
+    """
+    __slots__ = ("id", "part_number", "component_type", "value", "quantity", "purchase_link", "datasheet_link",
+                 "location", "image_path", "inventory_id")
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def columns(cls):
+        """The Component attributes to select, in the order __init__ takes them."""
+        return [getattr(Component, name) for name in cls.__slots__]
+
+    def __repr__(self):
+        return f"<ComponentSummary {self.part_number!r} ({self.component_type}) x{self.quantity}>"
+
+
 def create_component_class(class_name, polymorphic_id, spec_format_string):
     """Dynamically creates a Component subclass."""
     def generated_get_specifications(self):
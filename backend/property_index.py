@@ -0,0 +1,199 @@
+import re
+from dataclasses import dataclass
+from sqlalchemy import Table, Column, Integer, Float, String, UUID, MetaData, and_
+from sqlalchemy.engine import Connection
+
+PROPERTY_TABLE_NAME = "component_properties"
+
+# Unit prefixes understood in property values, e.g. "4.7k" or "100 nF"
+SI_PREFIXES = {
+    "p": 1e-12, "n": 1e-9, "u": 1e-6, "µ": 1e-6, "μ": 1e-6, "m": 1e-3,
+    "k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9,
+}
+_NUMBER_CHARACTERS = "+-0123456789."
+_NUMBER_PATTERN = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)")
+
+# One row per "Name: value" pair of Component.value, kept in step by the triggers below. Not part of the
+# inventory Base metadata: the table is created by ensure_property_index(), this Table describes it for queries.
+property_table = Table(
+    PROPERTY_TABLE_NAME, MetaData(),
+    Column("component_id", UUID(as_uuid=True), primary_key=True),
+    Column("position", Integer, primary_key=True),
+    # Copied from the component so a type filter and a range are answered from one index
+    Column("component_type", String),
+    Column("name", String, nullable=False),
+    Column("value", String, nullable=False),
+    # The value as a number in the unit of the property name, e.g. 4700 for "Resistance (Ω): 4.7k"
+    Column("numeric_value", Float),
+)
+
+def _split_value_sql(value: str) -> str:
+    """
+    SQL for a JSON array of the comma-separated pieces of a value string. Backslashes and quotes are escaped and
+    tabs and line breaks turned into spaces; any other control character leaves an invalid array (no properties).
+    """
+    escaped = f"replace(replace({value}, '\\', '\\\\'), '\"', '\\\"')"
+    escaped = f"replace(replace(replace({escaped}, char(9), ' '), char(10), ' '), char(13), ' ')"
+    pieces = f"""'["' || replace({escaped}, ',', '","') || '"]'"""
+    return f"CASE WHEN json_valid({pieces}) THEN {pieces} ELSE '[]' END"
+
+
+def _prefix_scale_sql(symbol: str) -> str:
+    cases = " ".join(f"WHEN '{prefix}' THEN {scale!r}" for prefix, scale in SI_PREFIXES.items())
+    return f"(CASE substr({symbol}, 1, 1) {cases} ELSE 1.0 END)"
+
+
+# numeric_value of a property row; the SQL twin of parse_quantity(). p is a row with name, value, run (the
+# leading number characters of the value), suffix (the rest) and unit (see property_unit). Kept in plain SQL so
+# the triggers work on any connection, e.g. the sqlite3 shell; the tests check it against parse_quantity().
+_NUMERIC_VALUE_SQL = f"""CASE WHEN p.run GLOB '[0-9]*' OR p.run GLOB '.[0-9]*'
+            OR p.run GLOB '[+-][0-9]*' OR p.run GLOB '[+-].[0-9]*'
+        THEN CAST(p.run AS REAL) * (CASE WHEN p.suffix = '' OR p.suffix = p.unit THEN 1.0
+            ELSE {_prefix_scale_sql("p.suffix")}
+                / (CASE WHEN length(p.unit) > 1 THEN {_prefix_scale_sql("p.unit")} ELSE 1.0 END) END)
+    END"""
+
+
+def _select_properties_sql(component: str, source: str = "") -> str:
+    """
+    SELECT of the property rows for one or more components, in the column order of the property table. Splits
+    the same way as parse_properties: on commas, then on the first colon of each piece.
+    """
+    name = "trim(substr(piece.value, 1, instr(piece.value, ':') - 1))"
+    property_value = "trim(substr(piece.value, instr(piece.value, ':') + 1))"
+    unit_start = "instr(p.name, '(') + 1"
+    unit_length = f"instr(substr(p.name, {unit_start}), ')') - 1"
+    return f"""SELECT p.component_id, p.position, p.component_type, p.name, p.value, {_NUMERIC_VALUE_SQL}
+        FROM (SELECT p.*,
+                substr(p.value, 1, length(p.value) - length(ltrim(p.value, '{_NUMBER_CHARACTERS}'))) AS run,
+                trim(ltrim(p.value, '{_NUMBER_CHARACTERS}')) AS suffix,
+                CASE WHEN instr(p.name, '(') > 0 AND {unit_length} >= 0
+                    THEN substr(p.name, {unit_start}, {unit_length}) ELSE '' END AS unit
+            FROM (SELECT {component}.id AS component_id, piece.key AS position,
+                    {component}.component_type AS component_type, {name} AS name, {property_value} AS value
+                FROM {source}json_each({_split_value_sql(f"{component}.value")}) AS piece
+                WHERE instr(piece.value, ':') > 0) AS p
+            WHERE p.name <> '' AND p.value <> '') AS p"""
+
+
+_COLUMNS = "component_id, position, component_type, name, value, numeric_value"
+
+_CREATE_STATEMENTS = [
+    f"""CREATE TABLE IF NOT EXISTS {PROPERTY_TABLE_NAME} (
+        component_id CHAR(32) NOT NULL,
+        position INTEGER NOT NULL,
+        component_type VARCHAR,
+        name VARCHAR NOT NULL,
+        value VARCHAR NOT NULL,
+        numeric_value FLOAT,
+        PRIMARY KEY (component_id, position)
+    ) WITHOUT ROWID""",
+    f"CREATE INDEX IF NOT EXISTS ix_component_properties_name_value ON {PROPERTY_TABLE_NAME} (name, value)",
+    f"CREATE INDEX IF NOT EXISTS ix_component_properties_type_name_numeric "
+    f"ON {PROPERTY_TABLE_NAME} (component_type, name, numeric_value)",
+    f"""CREATE TRIGGER IF NOT EXISTS component_properties_ai AFTER INSERT ON components BEGIN
+        INSERT INTO {PROPERTY_TABLE_NAME} ({_COLUMNS}) {_select_properties_sql("new")};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS component_properties_ad AFTER DELETE ON components BEGIN
+        DELETE FROM {PROPERTY_TABLE_NAME} WHERE component_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS component_properties_au
+            AFTER UPDATE OF id, value, component_type ON components BEGIN
+        DELETE FROM {PROPERTY_TABLE_NAME} WHERE component_id = old.id;
+        INSERT INTO {PROPERTY_TABLE_NAME} ({_COLUMNS}) {_select_properties_sql("new")};
+    END""",
+]
+
+
+def ensure_property_index(conn: Connection):
+    """Creates the property table and its sync triggers on an inventory database if they are missing."""
+    for statement in _CREATE_STATEMENTS:
+        conn.exec_driver_sql(statement)
+
+
+def rebuild_property_index(conn: Connection):
+    """Re-parses the value of every component, e.g. when the index is first created over an existing table."""
+    ensure_property_index(conn)
+    conn.exec_driver_sql(f"DELETE FROM {PROPERTY_TABLE_NAME}")
+    conn.exec_driver_sql(
+        f"INSERT INTO {PROPERTY_TABLE_NAME} ({_COLUMNS}) {_select_properties_sql('c', source='components AS c, ')}")
+    conn.exec_driver_sql(f"ANALYZE {PROPERTY_TABLE_NAME}")
+
+
+def parse_properties(value: str | None) -> dict[str, str]:
+    """Splits a "Name: value, Name: value" string like the index triggers do, for values not stored yet."""
+    properties = {}
+    for piece in (value or "").split(","):
+        if ":" not in piece:
+            continue
+        name, property_value = (text.strip() for text in piece.split(":", 1))
+        if name and property_value:
+            properties.setdefault(name, property_value)
+    return properties
+
+
+def values_for(property_names: list[str], stored: dict[str, str]) -> dict[str, str]:
+    """
+    Matches stored properties to the property names of a type. A stored name may be shortened (e.g. "Resistance"
+    for "Resistance (Ω)"), as imports and older releases allow.
+    """
+    values = {}
+    for property_name in property_names:
+        if property_name in stored:
+            values[property_name] = stored[property_name]
+            continue
+        matching = next((name for name in stored if property_name.startswith(name)), None)
+        if matching is not None:
+            values[property_name] = stored[matching]
+    return values
+
+
+def property_unit(property_name: str) -> str:
+    """The unit in the first parentheses of a property name: "µF" for "Capacitance (µF)", "" if there is none."""
+    start = property_name.find("(")
+    end = property_name.find(")", start + 1)
+    return property_name[start + 1:end] if start >= 0 and end >= 0 else ""
+
+
+def parse_quantity(value: str, property_name: str = "") -> float | None:
+    """
+    Reads a property value as a number in the unit of property_name, the same way the index fills numeric_value.
+    A bare number or one followed by the property's unit is taken as is; a unit prefix scales it, so "100n"
+    for "Capacitance (µF)" is 0.1 and "4.7kΩ" for "Resistance (Ω)" is 4700.
+
+    Returns:
+        The number, or None if the value does not start with one.
+    """
+    value = value.strip()
+    run = value[:len(value) - len(value.lstrip(_NUMBER_CHARACTERS))]
+    match = _NUMBER_PATTERN.match(run)
+    if not match:
+        return None
+    number = float(match.group())
+    suffix, unit = value[len(run):].strip(), property_unit(property_name)
+    if suffix in ("", unit):
+        return number * 1.0
+    unit_scale = SI_PREFIXES.get(unit[:1], 1.0) if len(unit) > 1 else 1.0
+    return number * (SI_PREFIXES.get(suffix[:1], 1.0) / unit_scale)
+
+
+# Bounds are widened by this fraction so a value given as "100n" still matches a bound of 0.1 despite rounding
+_RANGE_TOLERANCE = 1e-9
+
+
+@dataclass(frozen=True)
+class PropertyRange:
+    """Limits a numeric property, e.g. PropertyRange("Voltage (V)", minimum=25). Bounds are inclusive."""
+    name: str
+    minimum: float | None = None
+    maximum: float | None = None
+
+    def condition(self):
+        """WHERE clause on the property table for the rows within this range."""
+        numeric_value = property_table.c.numeric_value
+        conditions = [property_table.c.name == self.name, numeric_value.is_not(None)]
+        if self.minimum is not None:
+            conditions.append(numeric_value >= self.minimum - abs(self.minimum) * _RANGE_TOLERANCE)
+        if self.maximum is not None:
+            conditions.append(numeric_value <= self.maximum + abs(self.maximum) * _RANGE_TOLERANCE)
+        return and_(*conditions)
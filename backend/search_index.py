@@ -0,0 +1,154 @@
+import re
+import weakref
+from sqlalchemy import Table, Column, Integer, Float, UUID, MetaData, text
+from sqlalchemy.engine import Engine
+
+FTS_TABLE_NAME = "components_fts"
+FTS_COLUMNS = ("part_number", "value", "location", "notes")
+KEY_TABLE_NAME = "component_search_keys"
+CONTENT_VIEW_NAME = "components_search_content"
+
+# Not part of the inventory Base metadata: the virtual table is created by ensure_search_index(),
+# these Tables only describe it so queries can join against it.
+fts_table = Table(
+    FTS_TABLE_NAME, MetaData(),
+    Column("rowid", Integer),
+    Column(FTS_TABLE_NAME),
+    Column("rank", Float),
+    *(Column(name) for name in FTS_COLUMNS)
+)
+
+# components has a UUID primary key, so its implicit rowid may be renumbered by VACUUM. The index is keyed on
+# search_key instead, an INTEGER PRIMARY KEY that SQLite never renumbers.
+key_table = Table(
+    KEY_TABLE_NAME, MetaData(),
+    Column("search_key", Integer, primary_key=True),
+    Column("component_id", UUID(as_uuid=True), nullable=False, unique=True),
+)
+
+_COLUMN_LIST = ", ".join(FTS_COLUMNS)
+_KEY_OF = f"(SELECT search_key FROM {KEY_TABLE_NAME} WHERE component_id = {{}}.id)"
+
+_CREATE_STATEMENTS = [
+    f"""CREATE TABLE IF NOT EXISTS {KEY_TABLE_NAME} (
+        search_key INTEGER PRIMARY KEY,
+        component_id CHAR(32) NOT NULL UNIQUE
+    )""",
+    f"""CREATE VIEW IF NOT EXISTS {CONTENT_VIEW_NAME} AS
+        SELECT k.search_key, {", ".join(f"c.{c}" for c in FTS_COLUMNS)}
+        FROM {KEY_TABLE_NAME} AS k JOIN components AS c ON c.id = k.component_id""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE_NAME} USING fts5(
+        {_COLUMN_LIST},
+        content='{CONTENT_VIEW_NAME}', content_rowid='search_key',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS components_fts_ai AFTER INSERT ON components BEGIN
+        INSERT OR IGNORE INTO {KEY_TABLE_NAME}(component_id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE_NAME}(rowid, {_COLUMN_LIST})
+        VALUES ({_KEY_OF.format("new")}, {", ".join(f"new.{c}" for c in FTS_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS components_fts_ad AFTER DELETE ON components BEGIN
+        INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}, rowid, {_COLUMN_LIST})
+        VALUES ('delete', {_KEY_OF.format("old")}, {", ".join(f"old.{c}" for c in FTS_COLUMNS)});
+        DELETE FROM {KEY_TABLE_NAME} WHERE component_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS components_fts_au AFTER UPDATE OF id, {_COLUMN_LIST} ON components BEGIN
+        INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}, rowid, {_COLUMN_LIST})
+        VALUES ('delete', {_KEY_OF.format("old")}, {", ".join(f"old.{c}" for c in FTS_COLUMNS)});
+        UPDATE {KEY_TABLE_NAME} SET component_id = new.id WHERE component_id = old.id;
+        INSERT INTO {FTS_TABLE_NAME}(rowid, {_COLUMN_LIST})
+        VALUES ({_KEY_OF.format("new")}, {", ".join(f"new.{c}" for c in FTS_COLUMNS)});
+    END""",
+]
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Engines whose database has a usable full-text index. Weak so disposed engines drop out on their own.
+_enabled_engines = weakref.WeakSet()
+
+
+def _sync_keys(conn):
+    """Gives every component a search key and drops the keys of components that no longer exist."""
+    conn.exec_driver_sql(f"DELETE FROM {KEY_TABLE_NAME} WHERE component_id NOT IN (SELECT id FROM components)")
+    conn.exec_driver_sql(f"INSERT OR IGNORE INTO {KEY_TABLE_NAME}(component_id) SELECT id FROM components")
+
+
+def ensure_search_index(engine: Engine) -> bool:
+    """
+    Creates the FTS5 index and its sync triggers on an inventory database if they are missing.
+    A freshly created index over an existing table is populated straight away.
+
+    Returns:
+        True if the index is usable, False if this SQLite build has no FTS5 support.
+    """
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE_NAME}
+            ).first() is not None
+            for statement in _CREATE_STATEMENTS:
+                conn.exec_driver_sql(statement)
+            if not existed:
+                _sync_keys(conn)
+                conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}) VALUES ('rebuild')")
+    except Exception as e:
+        print(f"WARNING: Full-text search index unavailable, falling back to LIKE search: {e}")
+        _enabled_engines.discard(engine)
+        return False
+
+    _enabled_engines.add(engine)
+    return True
+
+
+def detect_search_index(engine: Engine) -> bool:
+    """
+    Marks an engine as searchable if its database already has the index, without creating anything. Used for
+    short-lived or read-only connections that skip ensure_search_index.
+    """
+    try:
+        with engine.connect() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE_NAME}
+            ).first() is not None
+    except Exception as e:
+        print(f"WARNING: Could not check for a full-text search index: {e}")
+        exists = False
+    if exists:
+        _enabled_engines.add(engine)
+    else:
+        _enabled_engines.discard(engine)
+    return exists
+
+
+def rebuild_search_index(engine: Engine):
+    """Re-creates the index contents from the components table, e.g. after the file was edited externally."""
+    if not ensure_search_index(engine):
+        raise RuntimeError("This SQLite build does not support FTS5 full-text search.")
+    with engine.begin() as conn:
+        _sync_keys(conn)
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}) VALUES ('rebuild')")
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}) VALUES ('optimize')")
+
+
+def is_enabled(engine: Engine | None) -> bool:
+    return engine is not None and engine in _enabled_engines
+
+
+def build_match_expression(term: str, prefix: bool = True) -> str | None:
+    """
+    Turns free text into an FTS5 MATCH expression that requires every token.
+
+    Args:
+        term: The user's search text. Punctuation is treated as a token separator.
+        prefix: Match tokens as prefixes ("470" finds "4700") instead of whole tokens.
+
+    Returns:
+        The expression, or None if the text contains no searchable tokens.
+    """
+    tokens = _TOKEN_PATTERN.findall(term or "")
+    if not tokens:
+        return None
+    suffix = "*" if prefix else ""
+    return " ".join(f'"{token}"{suffix}' for token in tokens)
@@ -1,11 +1,7 @@
+import bisect
 import json
 import re
-import os
-# --- START: MODIFIED ---
-# Instead of importing the variable, we import the module itself
-from . import database
-from .database import get_config_session, switch_inventory_db
-# --- END: MODIFIED ---
+from .database import get_config_session
 from .models import Component, create_component_class
 from .models_custom import ComponentTypeDefinition
 from .component_constants import UI_TO_BACKEND_TYPE_MAP
@@ -14,7 +10,28 @@ from . import inventory
 from . import inventory_manager
 
 
+def _with_name(names: tuple[str, ...], name: str) -> tuple[str, ...]:
+    index = bisect.bisect_left(names, name)
+    if index < len(names) and names[index] == name:
+        return names
+    return names[:index] + (name,) + names[index:]
+
+
+def _without_name(names: tuple[str, ...], name: str) -> tuple[str, ...]:
+    index = bisect.bisect_left(names, name)
+    if index < len(names) and names[index] == name:
+        return names[:index] + names[index + 1:]
+    return names
+
+
 class TypeManager:
+    """
+    Registry of component types: the built-in ones plus custom types stored in the config DB.
+
+    Sorted name lists are kept ready, so the getters used to fill combo boxes and dialogs cost nothing.
+    generation goes up on every change; a UI that caches something built from the types compares it with the
+    generation it was built at to know when to rebuild.
+    """
     _instance = None
 
     def __new__(cls, *args, **kwargs):
@@ -30,6 +47,10 @@ class TypeManager:
         self.ui_to_backend_map = {}
         self.backend_to_ui_map = {}
         self.type_properties = {}
+        self.custom_ui_names = set()
+        self._sorted_ui_names: tuple[str, ...] = ()
+        self._sorted_custom_ui_names: tuple[str, ...] = ()
+        self.generation = 0
         self._initialized = False
 
     def load_types(self):
@@ -37,10 +58,14 @@ class TypeManager:
         self.ui_to_backend_map = {}
         self.backend_to_ui_map = {}
         self.type_properties = {}
+        self.custom_ui_names = set()
 
         self._load_hardcoded_types()
         self._load_custom_types_from_db()
         self._register_all_component_classes()
+        self._sorted_ui_names = tuple(sorted(self.ui_to_backend_map))
+        self._sorted_custom_ui_names = tuple(sorted(self.custom_ui_names))
+        self.generation += 1
         self._initialized = True
 
         print(f"INFO: TypeManager loaded and registered {len(self.ui_to_backend_map)} total types.")
@@ -88,6 +113,7 @@ class TypeManager:
                 self.ui_to_backend_map[custom_type.ui_name] = custom_type.backend_id
                 self.backend_to_ui_map[custom_type.backend_id] = custom_type.ui_name
                 self.type_properties[custom_type.ui_name] = custom_type.properties
+                self.custom_ui_names.add(custom_type.ui_name)
             print(f"DEBUG: Found and loaded {len(custom_types)} custom types.")
         except Exception as e:
             print(f"CRITICAL: Failed to load custom component types from database: {e}")
@@ -95,26 +121,50 @@ class TypeManager:
             session.close()
 
     def _register_all_component_classes(self):
-        # ... (this method is unchanged)
         print(f"DEBUG: Registering all {len(self.backend_to_ui_map)} component classes with factory...")
         ComponentFactory._component_types.clear()
 
         for backend_id, ui_name in self.backend_to_ui_map.items():
-            class_name = ui_name.replace(" ", "").replace("-", "")
-
-            properties = self.get_properties(ui_name)
-            spec_format = properties[0] if properties else "Value"
-
-            component_class = create_component_class(
-                class_name=class_name,
-                polymorphic_id=backend_id,
-                spec_format_string=spec_format
-            )
-            ComponentFactory.register_component(backend_id, component_class)
+            self._register_component_class(backend_id, ui_name)
         print("DEBUG: Component class registration complete.")
 
+    def _register_component_class(self, backend_id: str, ui_name: str):
+        class_name = ui_name.replace(" ", "").replace("-", "")
+
+        properties = self.get_properties(ui_name)
+        spec_format = properties[0] if properties else "Value"
+
+        component_class = create_component_class(
+            class_name=class_name,
+            polymorphic_id=backend_id,
+            spec_format_string=spec_format
+        )
+        ComponentFactory.register_component(backend_id, component_class)
+
+    def _add_to_registry(self, ui_name: str, backend_id: str, properties: list[str]):
+        """Registers one new custom type without reloading the others."""
+        self.ui_to_backend_map[ui_name] = backend_id
+        self.backend_to_ui_map[backend_id] = ui_name
+        self.type_properties[ui_name] = list(properties)
+        self.custom_ui_names.add(ui_name)
+        self._register_component_class(backend_id, ui_name)
+        self._sorted_ui_names = _with_name(self._sorted_ui_names, ui_name)
+        self._sorted_custom_ui_names = _with_name(self._sorted_custom_ui_names, ui_name)
+        self.generation += 1
+
+    def _remove_from_registry(self, ui_name: str):
+        """Unregisters one custom type without reloading the others."""
+        backend_id = self.ui_to_backend_map.pop(ui_name, None)
+        if backend_id is not None:
+            self.backend_to_ui_map.pop(backend_id, None)
+            ComponentFactory.unregister_component(backend_id)
+        self.type_properties.pop(ui_name, None)
+        self.custom_ui_names.discard(ui_name)
+        self._sorted_ui_names = _without_name(self._sorted_ui_names, ui_name)
+        self._sorted_custom_ui_names = _without_name(self._sorted_custom_ui_names, ui_name)
+        self.generation += 1
+
     def add_new_type(self, ui_name: str, properties: list[str]):
-        # ... (this method is unchanged)
         session = get_config_session()
         try:
             backend_id = re.sub(r'\s+', '_', ui_name.strip()).lower()
@@ -138,7 +188,7 @@ class TypeManager:
             session.commit()
             print(f"INFO: Successfully added new custom type '{ui_name}' to the database.")
 
-            self.load_types()
+            self._add_to_registry(ui_name, backend_id, properties)
             return True, f"Successfully added new type '{ui_name}'."
         except Exception as e:
             session.rollback()
@@ -148,71 +198,57 @@ class TypeManager:
             session.close()
 
     def delete_custom_type(self, ui_name: str, app_path: str):
+        """
+        Deletes a custom type and its components from every inventory. The inventories are processed in
+        parallel on their own connections, so the active inventory stays open throughout. The type definition
+        is only removed once every inventory succeeded; otherwise it is kept so the delete can be retried.
+        """
         session = get_config_session()
-        original_db_url = None
         try:
             custom_type = session.query(ComponentTypeDefinition).filter_by(ui_name=ui_name).first()
             if not custom_type:
                 raise ValueError(f"No custom type named '{ui_name}' found to delete.")
 
             backend_id_to_delete = custom_type.backend_id
-            all_inventories = inventory_manager.get_all_inventories()
-
-            # --- START: MODIFIED ---
-            # Access the inventory_engine through the database module
-            if database.inventory_engine:
-                original_db_url = str(database.inventory_engine.url)
-            # --- END: MODIFIED ---
-
-            total_deleted_count = 0
-
             print(f"INFO: Deleting components of type '{backend_id_to_delete}' from ALL inventories...")
-            for inv in all_inventories:
-                db_path = inv.db_path if os.path.isabs(inv.db_path) else os.path.join(app_path, inv.db_path)
-                db_url = f"sqlite:///{db_path}"
-                switch_inventory_db(db_url)
-                num_deleted = inventory.delete_components_by_type(backend_id_to_delete)
-                total_deleted_count += num_deleted
+            results = inventory_manager.run_on_all_inventories(
+                lambda inventory_session: inventory.delete_components_by_type(backend_id_to_delete,
+                                                                              session=inventory_session),
+                app_path)
+
+            failures = {name: result for name, result in results.items() if isinstance(result, Exception)}
+            counts = "\n".join(f"- {name}: {result}" for name, result in results.items() if name not in failures)
+            if failures:
+                errors = "\n".join(f"- {name}: {error}" for name, error in failures.items())
+                print(f"ERROR: Failed to delete components of type '{ui_name}' in {len(failures)} inventories.")
+                return False, (f"Could not delete the components of '{ui_name}' in every inventory, so the type "
+                               f"was kept. Try again once these inventories are available:\n{errors}"
+                               + (f"\n\nAlready deleted:\n{counts}" if counts else ""))
 
             session.delete(custom_type)
             session.commit()
             print(f"INFO: Successfully deleted custom type definition '{ui_name}'.")
 
-            if original_db_url:
-                switch_inventory_db(original_db_url)
+            self._remove_from_registry(ui_name)
 
-            self.load_types()
-
-            msg = f"Deleted type '{ui_name}' and its {total_deleted_count} components from all inventories."
+            total_deleted_count = sum(results.values())
+            msg = (f"Deleted type '{ui_name}' and its {total_deleted_count} components from all inventories."
+                   + (f"\n\n{counts}" if counts else ""))
             return True, msg
         except Exception as e:
             session.rollback()
-            # --- START: MODIFIED ---
-            # Access the inventory_engine through the database module here as well
-            if original_db_url and database.inventory_engine and str(database.inventory_engine.url) != original_db_url:
-            # --- END: MODIFIED ---
-                try:
-                    switch_inventory_db(original_db_url)
-                    print("INFO: Restored original DB connection after an error.")
-                except Exception as restore_e:
-                    print(f"CRITICAL: Failed to restore original DB after error: {restore_e}")
             print(f"ERROR: Failed to delete custom type '{ui_name}': {e}")
             return False, str(e)
         finally:
             session.close()
 
-    def get_all_custom_ui_names(self):
-        # ... (this method is unchanged)
-        session = get_config_session()
-        try:
-            custom_types = session.query(ComponentTypeDefinition).order_by(ComponentTypeDefinition.ui_name).all()
-            return [t.ui_name for t in custom_types]
-        finally:
-            session.close()
+    def get_all_custom_ui_names(self) -> tuple[str, ...]:
+        """Names of the custom types, sorted. Read from the registry; the config DB is only read by load_types."""
+        return self._sorted_custom_ui_names
 
-    def get_all_ui_names(self):
-        # ... (this method is unchanged)
-        return sorted(list(self.ui_to_backend_map.keys()))
+    def get_all_ui_names(self) -> tuple[str, ...]:
+        """Names of every type, sorted. The same tuple is returned until the types change."""
+        return self._sorted_ui_names
 
     def get_backend_id(self, ui_name):
         # ... (this method is unchanged)
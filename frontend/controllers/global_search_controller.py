@@ -0,0 +1,70 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from frontend.ui.global_search_dialog import GlobalSearchDialog
+from backend.global_search import search_all_inventories
+
+
+class GlobalSearchWorkerSignals(QObject):
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class GlobalSearchWorker(QRunnable):
+    def __init__(self, generation: int, term: str, app_path: str):
+        super().__init__()
+        self.signals = GlobalSearchWorkerSignals()
+        self.generation = generation
+        self.term = term
+        self.app_path = app_path
+
+    def run(self):
+        try:
+            result = search_all_inventories(self.term, self.app_path)
+            self.signals.finished.emit(self.generation, result)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+
+
+class GlobalSearchController(QObject):
+    """Runs searches over every inventory off the GUI thread and shows them in a non-modal dialog."""
+    # Signal emits: inventory name, part number
+    open_in_inventory_requested = pyqtSignal(str, str)
+
+    def __init__(self, app_path: str, parent_view=None, parent=None):
+        super().__init__(parent)
+        self._app_path = app_path
+        self.view = GlobalSearchDialog(parent_view)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._generation = 0
+
+        self.view.search_requested.connect(self.search)
+        self.view.open_in_inventory_requested.connect(self.open_in_inventory_requested.emit)
+
+    def show(self, term: str = ""):
+        self.view.show()
+        self.view.raise_()
+        self.view.activateWindow()
+        if term:
+            self.view.set_search_text(term)
+            self.search(term)
+
+    def search(self, term: str):
+        # Only the latest search is shown; an older one still running is simply ignored when it finishes
+        self._generation += 1
+        worker = GlobalSearchWorker(self._generation, term, self._app_path)
+        worker.signals.finished.connect(self._handle_finished)
+        worker.signals.failed.connect(self._handle_failed)
+        self.view.set_busy(True)
+        self._pool.start(worker)
+
+    def _handle_finished(self, generation: int, result):
+        if generation == self._generation:
+            self.view.show_result(result)
+
+    def _handle_failed(self, generation: int, message: str):
+        if generation == self._generation:
+            self.view.show_error(message)
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self._pool.waitForDone(timeout_ms)
@@ -1,97 +1,322 @@
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
-from PyQt5.QtCore import QObject
+import threading
+
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+from PyQt5.QtCore import QCoreApplication, QObject, QThread, Qt, pyqtSignal
 
 from frontend.ui.main_window import InventoryUI
-from backend.import_export_logic import export_to_excel, import_from_excel
-from backend.exceptions import DatabaseError, InvalidInputError, ComponentError
+from backend.import_export_logic import export_inventory, import_inventory, validate_import
+from backend.import_validation import ValidationReport
+from backend.file_formats import available_formats
+from backend.exceptions import OperationCancelledError
+
+
+class ImportExportWorker(QObject):
+    """
+    Runs one import/export function off the GUI thread. The function receives a progress_callback, which
+    forwards progress as a signal and raises OperationCancelledError once cancel() has been called.
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object, object)  # (result, exception); exactly one of them is None
+
+    def __init__(self, job, *args, **kwargs):
+        super().__init__()
+        self.job = job
+        self.args = args
+        self.kwargs = kwargs
+        self._cancel_requested = threading.Event()
+
+    def cancel(self):
+        # Called directly from the GUI thread: this thread's event loop is busy inside run()
+        self._cancel_requested.set()
+
+    def _report_progress(self, rows_done, rows_total):
+        if self._cancel_requested.is_set():
+            raise OperationCancelledError("Cancelled by the user.")
+        self.progress.emit(rows_done, rows_total)
+
+    def run(self):
+        try:
+            self._report_progress(0, 0)
+            result = self.job(*self.args, progress_callback=self._report_progress, **self.kwargs)
+        except Exception as e:
+            self.finished.emit(None, e)
+            return
+        self.finished.emit(result, None)
 
 
 class ImportExportController(QObject):
+    # False while an import runs: it holds one write transaction until it commits, so edits made meanwhile
+    # would fail with "database is locked"
+    editing_allowed_changed = pyqtSignal(bool)
+
+    # Issues listed in the validation dialog; the rest are summarised as a count
+    MAX_LISTED_ISSUES = 500
+
     def __init__(self, view: InventoryUI, main_controller):
         super().__init__()
         self._view = view
         self._main_controller = main_controller
 
+        self._worker_thread = None
+        self._worker = None
+        self._on_worker_done = None
+        self._progress_dialog = None
+        self._progress_label = ""
+        app = QCoreApplication.instance()
+        if app:
+            app.aboutToQuit.connect(self.cleanup)
+
+    def is_busy(self) -> bool:
+        return self._worker is not None
+
     def handle_export_request(self):
+        if self._refuse_if_busy():
+            return
+        formats = available_formats()
         default_filename = "inventory_export.xlsx"
-        excel_filter = "Excel Files (*.xlsx)"
 
         filename, selected_filter = QFileDialog.getSaveFileName(
             self._view,
-            "Export Inventory to Excel",
+            "Export Inventory",
             default_filename,
-            excel_filter
+            ";;".join(file_format.file_filter for file_format in formats)
         )
 
         if filename:
-            if not filename.lower().endswith('.xlsx'):
-                filename += '.xlsx'
-            try:
-                success = export_to_excel(filename)
-                if success:
-                    self._main_controller._show_message(
-                        "Export Successful",
-                        f"Inventory successfully exported to:\n{filename}",
-                        level="info"
-                    )
-                else:
-                    self._main_controller._show_message(
-                        "Export Failed",
-                        "An unknown error occurred during export.",
-                        level="warning"
-                    )
-            except (DatabaseError, IOError, ComponentError, Exception) as e:
-                error_type = type(e).__name__
-                self._main_controller._show_message(
-                    "Export Error",
-                    f"Failed to export inventory ({error_type}):\n{e}",
-                    level="critical"
-                )
+            # Add the extension of the chosen file type if the name was typed without a supported one
+            if not any(filename.lower().endswith(ext) for file_format in formats for ext in file_format.extensions):
+                chosen = next((f for f in formats if f.file_filter == selected_filter), formats[0])
+                filename += chosen.extensions[0]
+            self._start_worker("Export Inventory", "Exporting", self._handle_export_done, filename,
+                               export_inventory, filename)
 
-    def handle_import_request(self):
-        confirm = QMessageBox.question(
-            self._view,
-            "Confirm Import",
-            "Importing data from Excel will OVERWRITE your current inventory!\n"
-            "Are you sure you want to proceed?",
-            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
-        )
+    def _handle_export_done(self, filename, success, error):
+        if error is not None:
+            if isinstance(error, OperationCancelledError):
+                self._main_controller._show_message("Export Cancelled", "The export was cancelled.", level="info")
+                return
+            error_type = type(error).__name__
+            self._main_controller._show_message(
+                "Export Error",
+                f"Failed to export inventory ({error_type}):\n{error}",
+                level="critical"
+            )
+        elif success:
+            self._main_controller._show_message(
+                "Export Successful",
+                f"Inventory successfully exported to:\n{filename}",
+                level="info"
+            )
+        else:
+            self._main_controller._show_message(
+                "Export Failed",
+                "An unknown error occurred during export.",
+                level="warning"
+            )
 
-        if confirm == QMessageBox.Yes:
-            excel_filter = "Excel Files (*.xlsx *.xls)"
+    def handle_import_request(self):
+        if self._refuse_if_busy():
+            return
+        mode = self._ask_import_mode()
+        if mode:
+            formats = available_formats()
+            all_supported = " ".join("*" + ext for file_format in formats for ext in file_format.readable_extensions)
             filename, selected_filter = QFileDialog.getOpenFileName(
                 self._view,
-                "Import Inventory from Excel",
+                "Import Inventory",
                 "",
-                excel_filter
+                ";;".join([f"All Supported Files ({all_supported})"] +
+                          [file_format.open_file_filter for file_format in formats])
             )
 
             if filename:
-                try:
-                    success = import_from_excel(filename)
-                    if success:
-                        self._main_controller._show_message(
-                            "Import Successful",
-                            f"Inventory successfully imported from:\n{filename}",
-                            level="info"
-                        )
-                        self._main_controller.load_inventory_data()
-                    else:
-                        self._main_controller._show_message(
-                            "Import Failed",
-                            "An unknown error occurred during import.",
-                            level="warning"
-                        )
-                except FileNotFoundError:
-                    self._main_controller._show_message(
-                        "Import Error",
-                        f"File not found:\n{filename}",
-                        level="critical"
-                    )
-                except (DatabaseError, InvalidInputError, ValueError, ComponentError, Exception) as e:
-                    error_type = type(e).__name__
-                    self._main_controller._show_message(
-                        "Import Error",
-                        f"Failed to import inventory ({error_type}):\n{e}",
-                        level="critical"
-                    )
+                self._start_worker("Import Inventory", "Checking", self._handle_validation_done, (filename, mode),
+                                   validate_import, filename)
+
+    def _handle_validation_done(self, request, report, error):
+        filename, mode = request
+        if error is not None:
+            self._show_import_error(filename, error)
+            return
+        if not report.is_valid and not self._confirm_partial_import(report):
+            return
+        self.editing_allowed_changed.emit(False)
+        self._start_worker("Import Inventory", "Importing", self._handle_import_done, filename,
+                           import_inventory, filename, mode=mode, skip_invalid=not report.is_valid)
+
+    def _handle_import_done(self, filename, summary, error):
+        self.editing_allowed_changed.emit(True)
+        if error is not None:
+            self._show_import_error(filename, error)
+        elif summary:
+            self._main_controller._show_message(
+                "Import Successful",
+                f"Inventory successfully imported from:\n{filename}\n\n{self._format_summary(summary)}",
+                level="info"
+            )
+            self._main_controller.load_inventory_data()
+        else:
+            self._main_controller._show_message(
+                "Import Failed",
+                "An unknown error occurred during import.",
+                level="warning"
+            )
+
+    def _show_import_error(self, filename, error):
+        if isinstance(error, OperationCancelledError):
+            self._main_controller._show_message(
+                "Import Cancelled", "The import was cancelled. The inventory was not changed.", level="info")
+        elif isinstance(error, FileNotFoundError):
+            self._main_controller._show_message(
+                "Import Error",
+                f"File not found:\n{filename}",
+                level="critical"
+            )
+        else:
+            error_type = type(error).__name__
+            self._main_controller._show_message(
+                "Import Error",
+                f"Failed to import inventory ({error_type}):\n{error}",
+                level="critical"
+            )
+
+    def _refuse_if_busy(self) -> bool:
+        if self.is_busy():
+            self._main_controller._show_message(
+                "Please Wait", "An import or export is already running.", level="info")
+            if self._progress_dialog:
+                self._progress_dialog.show()
+                self._progress_dialog.raise_()
+            return True
+        return False
+
+    def _start_worker(self, title: str, label: str, on_done, context, job, *args, **kwargs):
+        """
+        Runs job(*args, **kwargs) on a worker thread behind a non-modal progress dialog, then calls
+        on_done(context, result, error) on the GUI thread.
+        """
+        self._progress_label = label
+        self._progress_dialog = QProgressDialog(f"{label}...", "Cancel", 0, 0, self._view)
+        self._progress_dialog.setWindowTitle(title)
+        self._progress_dialog.setWindowModality(Qt.NonModal)
+        self._progress_dialog.setAutoClose(False)
+        self._progress_dialog.setAutoReset(False)
+        self._progress_dialog.setMinimumDuration(300)
+        self._progress_dialog.canceled.connect(self._cancel_worker)
+
+        self._on_worker_done = lambda result, error: on_done(context, result, error)
+        # Parented to the controller so a finishing thread is not destroyed when the next one replaces it
+        self._worker_thread = QThread(self)
+        self._worker = ImportExportWorker(job, *args, **kwargs)
+        self._worker.moveToThread(self._worker_thread)
+
+        self._worker_thread.started.connect(self._worker.run)
+        self._worker.progress.connect(self._handle_worker_progress)
+        self._worker.finished.connect(self._handle_worker_finished)
+        self._worker.finished.connect(self._worker_thread.quit)
+        self._worker_thread.finished.connect(self._worker.deleteLater)
+        self._worker_thread.finished.connect(self._worker_thread.deleteLater)
+        thread = self._worker_thread
+        self._worker_thread.finished.connect(lambda: self._on_thread_finished(thread))
+
+        self._worker_thread.start()
+
+    def _on_thread_finished(self, thread):
+        # The next stage of an import may already have started its own thread
+        if self._worker_thread is thread:
+            self._worker_thread = None
+
+    def _handle_worker_progress(self, rows_done, rows_total):
+        dialog = self._progress_dialog
+        if dialog is None or dialog.wasCanceled():
+            return
+        if rows_total:
+            dialog.setMaximum(rows_total)
+            dialog.setValue(min(rows_done, rows_total))
+            dialog.setLabelText(f"{self._progress_label}... {rows_done:,} of {rows_total:,} rows")
+        else:
+            # Total unknown (e.g. CSV): keep the busy indicator and show the running count
+            dialog.setLabelText(f"{self._progress_label}... {rows_done:,} rows")
+
+    def _cancel_worker(self):
+        if self._worker:
+            self._worker.cancel()
+            self._progress_dialog.setLabelText("Cancelling...")
+
+    def _handle_worker_finished(self, result, error):
+        on_done = self._on_worker_done
+        self._worker = None
+        self._on_worker_done = None
+        if self._progress_dialog:
+            self._progress_dialog.canceled.disconnect(self._cancel_worker)
+            self._progress_dialog.close()
+            self._progress_dialog.deleteLater()
+            self._progress_dialog = None
+        on_done(result, error)
+
+    def cleanup(self):
+        """Cancels a running import or export and waits for its thread, e.g. when the window closes."""
+        if self._worker:
+            self._worker.cancel()
+        if self._worker_thread and self._worker_thread.isRunning():
+            self._worker_thread.quit()
+            self._worker_thread.wait(5000)
+
+    def _ask_import_mode(self) -> str | None:
+        """Asks whether to merge the file into the inventory or replace it. Returns None if cancelled."""
+        box = QMessageBox(self._view)
+        box.setIcon(QMessageBox.Question)
+        box.setWindowTitle("Confirm Import")
+        box.setText("How should the file be imported?")
+        box.setInformativeText(
+            "Merge: update changed components, add new ones and remove those not in the file. "
+            "Components keep their IDs and images.\n\n"
+            "Replace: OVERWRITE your current inventory with the file."
+        )
+        merge_button = box.addButton("Merge", QMessageBox.AcceptRole)
+        replace_button = box.addButton("Replace", QMessageBox.DestructiveRole)
+        box.addButton(QMessageBox.Cancel)
+        box.setDefaultButton(merge_button)
+        box.exec_()
+        clicked = box.clickedButton()
+        if clicked is merge_button:
+            return "merge"
+        if clicked is replace_button:
+            return "replace"
+        return None
+
+    def _confirm_partial_import(self, report: ValidationReport) -> bool:
+        """Lists the problems found in the file and asks whether to import only the valid rows."""
+        invalid_rows = len(report.invalid_rows)
+        box = QMessageBox(self._view)
+        box.setWindowTitle("Import Validation")
+        box.setText(f"{invalid_rows:,} of {report.rows_checked:,} rows have problems and cannot be imported.")
+        details = [str(issue) for issue in report.issues[:self.MAX_LISTED_ISSUES]]
+        if len(report.issues) > self.MAX_LISTED_ISSUES:
+            details.append(f"... and {len(report.issues) - self.MAX_LISTED_ISSUES:,} more.")
+        box.setDetailedText("\n".join(details))
+
+        if not report.valid_rows:
+            box.setIcon(QMessageBox.Critical)
+            box.setInformativeText("Fix the file and import it again. Show Details lists every problem.")
+            box.exec_()
+            return False
+
+        box.setIcon(QMessageBox.Warning)
+        box.setInformativeText(
+            f"Import the {report.valid_rows:,} valid rows and skip the rest, or abort and fix the file first? "
+            f"Show Details lists every problem."
+        )
+        import_button = box.addButton("Import Valid Rows", QMessageBox.AcceptRole)
+        box.addButton(QMessageBox.Abort)
+        box.setDefaultButton(QMessageBox.Abort)
+        box.exec_()
+        return box.clickedButton() is import_button
+
+    @staticmethod
+    def _format_summary(summary: dict) -> str:
+        text = (f"Added: {summary['inserted']:,}   Updated: {summary['updated']:,}   "
+                f"Removed: {summary['deleted']:,}   Unchanged: {summary['unchanged']:,}")
+        if summary.get('skipped'):
+            text += f"   Skipped: {summary['skipped']:,}"
+        return text
@@ -3,9 +3,9 @@ import os
 import re
 import sys
 import shutil
-from PyQt5.QtWidgets import QMessageBox, QInputDialog, QFileDialog, QDialog
+from PyQt5.QtWidgets import QApplication, QMessageBox, QInputDialog, QFileDialog, QDialog
 from PyQt5.QtGui import QDesktopServices
-from PyQt5.QtCore import QObject, QUrl
+from PyQt5.QtCore import QObject, QUrl, Qt
 from frontend.ui.main_window import InventoryUI
 from frontend.ui.add_component_dialog import AddComponentDialog
 from frontend.ui.component_details_dialog import ComponentDetailsDialog
@@ -14,9 +14,11 @@ from frontend.controllers.generate_ideas_controller import GenerateIdeasControll
 from frontend.controllers.import_export_controller import ImportExportController
 from frontend.controllers.type_controller import TypeController
 from frontend.controllers.options_controller import OptionsController
-from backend import database, inventory_manager, settings_manager, inventory
+from frontend.controllers.search_controller import SearchController
+from frontend.controllers.global_search_controller import GlobalSearchController
+from backend import database, inventory_manager, settings_manager, inventory, facets
 from backend.models_custom import Inventory
-from backend.inventory import get_all_components, add_component, remove_component_quantity, get_component_by_id
+from backend.inventory import add_component, remove_component_quantity, get_component_by_id
 from backend.exceptions import *
 from backend.test_data_generator import generate_random_components
 from frontend.ui.transfer_dialog import TransferDialog
@@ -31,8 +33,12 @@ class MainController(QObject):
         self._app_path = app_path
         self._current_search_term = ""
         self._current_type_filter = "All Types"
+        self._current_ranges = []
         self._import_export_controller = ImportExportController(self._view, self)
+        self._search_controller = SearchController(self._view, self)
         self._idea_controller = None
+        self._global_search_controller = None
+        self._type_filter_state = None
         self._active_inventory: Inventory | None = None
         self._inventories: list[Inventory] = []
         self._connect_signals()
@@ -45,6 +51,7 @@ class MainController(QObject):
         self._view.generate_ideas_requested.connect(self.open_generate_ideas_dialog)
         self._view.export_requested.connect(self._import_export_controller.handle_export_request)
         self._view.import_requested.connect(self._import_export_controller.handle_import_request)
+        self._import_export_controller.editing_allowed_changed.connect(self._view.set_editing_enabled)
         self._view.link_clicked.connect(self.open_link_in_browser)
         self._view.search_text_changed.connect(self.handle_search_query)
         self._view.selection_changed.connect(self.on_selection_changed)
@@ -52,7 +59,10 @@ class MainController(QObject):
         self._view.details_requested.connect(self.open_details_dialog)
         self._view.duplicate_requested.connect(self.handle_duplicate_component)
         self._view.type_filter_changed.connect(self.handle_type_filter_change)
+        self._view.property_filter_changed.connect(self.handle_property_filter_change)
         self._view.delete_component_requested.connect(self.handle_delete_component_permanently)
+        self._view.load_data_failed.connect(self._handle_load_failure)
+        self._search_controller.search_failed.connect(self._handle_load_failure)
 
         mbar = self._view.menu_bar_handler
         mbar.new_inventory_action.triggered.connect(self.handle_new_inventory)
@@ -62,6 +72,9 @@ class MainController(QObject):
         mbar.toggle_select_action.triggered.connect(self.handle_toggle_select)
         mbar.add_random_action.triggered.connect(self.handle_add_random_components)
         mbar.transfer_components_action.triggered.connect(self.handle_open_transfer_dialog)
+        mbar.global_search_action.triggered.connect(self.handle_open_global_search)
+        mbar.rebuild_search_index_action.triggered.connect(self.handle_rebuild_search_index)
+        mbar.share_database_action.triggered.connect(self.handle_move_to_shared_database)
 
         label = self._view.menu_bar_handler.table_name_label
         label.wheel_up.connect(self.handle_inventory_scroll_up)
@@ -79,7 +92,9 @@ class MainController(QObject):
             else:
                 inventory_to_load = next((inv for inv in self._inventories if inv.id == startup_id), None)
             self.switch_inventory(inventory_to_load or self._inventories[0])
-            self._view.populate_type_filter(type_manager.get_all_ui_names())
+            self._refresh_type_filter()
+            self._view.menu_bar_handler.share_database_action.setEnabled(
+                inventory_manager.get_shared_db_path(self._app_path) is None)
         except (DatabaseError, Exception) as e:
             self._show_message("Fatal Startup Error", f"Could not load initial data: {e}", "critical")
         self._view._adjust_window_width()
@@ -110,10 +125,12 @@ class MainController(QObject):
 
     def switch_inventory(self, inventory_obj: Inventory):
         if self._active_inventory and self._active_inventory.id == inventory_obj.id: return
+        if self._import_export_controller.is_busy():
+            self._show_message("Please Wait", "Wait for the running import or export to finish before switching "
+                                              "inventories.", "info")
+            return
         try:
-            db_path = inventory_obj.db_path if os.path.isabs(inventory_obj.db_path) else os.path.join(self._app_path,
-                                                                                                      inventory_obj.db_path)
-            database.switch_inventory_db(f"sqlite:///{db_path}")
+            inventory_manager.open_inventory(inventory_obj, self._app_path)
             self._active_inventory = inventory_obj
             settings_manager.set_setting('last_inventory_id', inventory_obj.id)
             self.load_inventory_data()
@@ -162,27 +179,46 @@ class MainController(QObject):
                     self._show_message("Deletion Error", str(e), "critical")
 
     def handle_search_query(self, query: str):
-        self._current_search_term = query.strip().lower()
-        self.load_inventory_data()
+        self._current_search_term = query.strip()
+        self._search_controller.schedule(self._current_search_term, self._current_backend_type(),
+                                         self._current_ranges)
 
     def handle_type_filter_change(self, type_name: str):
         self._current_type_filter = type_name
+        self._current_ranges = []
+        self._view.set_filter_properties(type_manager.get_properties(type_name) if type_name != "All Types" else [])
+        self.load_inventory_data()
+
+    def handle_property_filter_change(self, ranges: list):
+        self._current_ranges = ranges
         self.load_inventory_data()
 
+    def _current_backend_type(self) -> str | None:
+        if self._current_type_filter == "All Types":
+            return None
+        return type_manager.get_backend_id(self._current_type_filter)
+
     def load_inventory_data(self):
+        self._search_controller.run_now(self._current_search_term, self._current_backend_type(),
+                                        self._current_ranges)
+        self._refresh_type_filter()
+
+    def _apply_component_change(self, component):
+        """Updates just the row for a changed component instead of reloading the whole table."""
+        if not component:
+            return
         try:
-            components = get_all_components()
-            if self._current_search_term:
-                components = [c for c in components if
-                              self._current_search_term in str(c.part_number or "").lower() or
-                              self._current_search_term in str(c.value or "").lower() or
-                              self._current_search_term in str(c.location or "").lower()]
-            if self._current_type_filter != "All Types":
-                if backend_id := type_manager.get_backend_id(self._current_type_filter):
-                    components = [c for c in components if c.component_type == backend_id]
-            self._view.display_data(components)
-        except (DatabaseError, Exception) as e:
-            self._show_message("Error", f"Could not load data: {e}", "critical")
+            if inventory.component_matches_search(component.id, self._current_search_term,
+                                                  self._current_backend_type(), ranges=self._current_ranges):
+                self._view.upsert_component(component)
+            else:
+                self._view.remove_component(component.id)
+            self._refresh_type_filter()
+        except DatabaseError:
+            self.load_inventory_data()
+
+    def _handle_load_failure(self, message: str):
+        self._show_message("Error", f"Could not load data: {message}", "critical")
 
     def open_add_component_dialog(self):
         dialog = AddComponentDialog(self._view)
@@ -195,25 +231,58 @@ class MainController(QObject):
         if type_controller.open_add_type_dialog():
             source_dialog.refresh_type_list()
             self.load_inventory_data()
+
+    def _refresh_type_filter(self):
+        """Lists the types the inventory has, with their counts. Counts are cached until the next change."""
+        try:
+            counts = facets.get_facet_counts()
+        except (DatabaseError, RuntimeError) as e:
+            print(f"WARNING: Could not count components: {e}")
+            counts = None
+        # Only rebuild the combo box when the types or the counts changed since it was filled
+        state = (type_manager.generation, counts, self._current_type_filter)
+        if state == self._type_filter_state:
+            return
+        self._type_filter_state = state
+        if counts is None:
             self._view.populate_type_filter(type_manager.get_all_ui_names())
+        else:
+            self._populate_type_filter_with_counts(counts)
+        if self._view.current_type_filter() != self._current_type_filter:
+            # The selected type was deleted
+            self.handle_type_filter_change(self._view.current_type_filter())
+
+    def _populate_type_filter_with_counts(self, counts: facets.FacetCounts):
+        ui_counts = {}
+        for backend_id, count in counts.by_type.items():
+            if ui_name := type_manager.get_ui_name(backend_id):
+                ui_counts[ui_name] = count
+        shown = [name for name in type_manager.get_all_ui_names()
+                 if ui_counts.get(name) or name == self._current_type_filter]
+        self._view.populate_type_filter(shown, ui_counts, counts.total)
+        locations = len(counts.by_location)
+        self._view.type_filter_combo.setToolTip(
+            f"{counts.total:,} components in {locations:,} location{'' if locations == 1 else 's'}: "
+            f"{counts.in_stock:,} in stock, {counts.out_of_stock:,} out of stock")
 
     def handle_manage_types(self):
         type_controller = TypeController(self._view, self._app_path)
         if type_controller.open_add_type_dialog():
             self.load_inventory_data()
-            self._view.populate_type_filter(type_manager.get_all_ui_names())
 
     def handle_options(self):
         current_settings = {
             'api_key': self._api_key,
             'ai_model': self._openai_model,
             'startup_inventory_id': settings_manager.get_setting('startup_inventory_id', 'last_used'),
-            'theme': settings_manager.get_setting('theme', 'Fusion')
+            'theme': settings_manager.get_setting('theme', 'Fusion'),
+            'search_debounce_ms': self._search_controller.debounce_ms()
         }
         options_controller = OptionsController(self._view, self._inventories, current_settings)
         if options_controller.show_dialog():
             self._openai_model = settings_manager.get_setting('ai_model', self._openai_model)
             self._api_key = settings_manager.get_setting('api_key', self._api_key)
+            self._search_controller.set_debounce_ms(settings_manager.get_setting('search_debounce_ms'))
             if settings_manager.get_setting('theme') != current_settings['theme']:
                 self._show_message("Settings Saved", "Please restart for the new theme to take effect.", "info")
             else:
@@ -224,16 +293,17 @@ class MainController(QObject):
             source_image_path = component_data.pop('source_image_path', None)
             new_component = add_component(**component_data)
             if source_image_path and new_component:
-                self._handle_image_update(new_component.id, source_image_path)
+                new_component = self._handle_image_update(new_component.id, source_image_path) or new_component
             self._show_message("Success", f"Component '{component_data['part_number']}' added.", "info")
-            self.load_inventory_data()
+            self._apply_component_change(new_component)
         except (DuplicateComponentError, InvalidInputError) as e:
             self._show_message("Input Error", str(e), "warning")
         except Exception as e:
             self._show_message("Error", f"An unexpected error occurred: {e}", "critical")
 
-    def _handle_image_update(self, component_id: uuid.UUID, source_path: str) -> bool:
-        if not source_path or not os.path.exists(source_path): return False
+    def _handle_image_update(self, component_id: uuid.UUID, source_path: str):
+        """Copies the image next to the app and returns the updated component, or None on failure."""
+        if not source_path or not os.path.exists(source_path): return None
         try:
             dest_dir = os.path.join(self._app_path, "assets", "component_images")
             os.makedirs(dest_dir, exist_ok=True)
@@ -242,18 +312,18 @@ class MainController(QObject):
             dest_path = os.path.join(dest_dir, new_filename)
             shutil.copy(source_path, dest_path)
             relative_path = os.path.join("assets", "component_images", new_filename)
-            inventory.update_component(component_id, {"image_path": relative_path})
-            return True
+            return inventory.update_component(component_id, {"image_path": relative_path})
         except Exception as e:
             self._show_message("Image Error", f"Could not save image: {e}", "critical")
-            return False
+            return None
 
     def handle_duplicate_component(self, component_id: uuid.UUID):
         try:
             if not (component_to_duplicate := get_component_by_id(component_id)):
                 raise ComponentNotFoundError("Component not found.")
             dialog = AddComponentDialog(self._view)
-            dialog.populate_from_component(component_to_duplicate, self._app_path)
+            dialog.populate_from_component(component_to_duplicate, self._app_path,
+                                           inventory.get_component_properties(component_id))
             dialog.component_data_collected.connect(self._add_new_component)
             dialog.manage_types_requested.connect(self.open_manage_types_dialog)
             dialog.exec_()
@@ -262,35 +332,45 @@ class MainController(QObject):
 
     def handle_inline_update(self, component_id: uuid.UUID, data: dict):
         try:
-            inventory.update_component(component_id, data)
+            self._apply_component_change(inventory.update_component(component_id, data))
         except (DatabaseError, ComponentNotFoundError) as e:
             self._show_message("Update Error", f"Could not save changes: {e}", "critical")
             self.load_inventory_data()
 
+    def _refuse_while_importing(self) -> bool:
+        """Tells the user that changes cannot be saved while an import has the inventory locked."""
+        if self._view.is_editing_enabled():
+            return False
+        self._show_message("Please Wait", "An import is running, so changes cannot be saved until it finishes.",
+                           "info")
+        return True
+
     def open_details_dialog(self, component_id: uuid.UUID):
         try:
             if not (component := get_component_by_id(component_id)):
                 raise ComponentNotFoundError("Component may have been deleted.")
             ui_name = type_manager.get_ui_name(component.component_type)
             properties = type_manager.get_properties(ui_name)
-            dialog = ComponentDetailsDialog(component, properties, self._app_path, self._view)
+            dialog = ComponentDetailsDialog(component, properties, self._app_path, self._view,
+                                            property_values=inventory.get_component_properties(component_id))
 
             def on_image_change_requested(comp_id_str):
+                if self._refuse_while_importing():
+                    return
                 filepath, _ = QFileDialog.getOpenFileName(dialog, "Select New Image", "", "Image Files (*.png *.jpg)")
-                if filepath and self._handle_image_update(uuid.UUID(comp_id_str), filepath):
-                    if updated_comp := get_component_by_id(uuid.UUID(comp_id_str)):
-                        dialog.component = updated_comp
-                        dialog._populate_data()
+                if filepath and (updated_comp := self._handle_image_update(uuid.UUID(comp_id_str), filepath)):
+                    dialog.component = updated_comp
+                    dialog._populate_data()
+                    self._apply_component_change(updated_comp)
 
             dialog.image_change_requested.connect(on_image_change_requested)
-            if dialog.exec_() == QDialog.Accepted:
-                inventory.update_component(component.id, dialog.get_data())
-                self.load_inventory_data()
+            if dialog.exec_() == QDialog.Accepted and not self._refuse_while_importing():
+                self._apply_component_change(inventory.update_component(component.id, dialog.get_data()))
         except (DatabaseError, ComponentNotFoundError) as e:
             self._show_message("Error", f"Could not open details: {e}", "critical")
 
     def handle_remove_components(self, component_ids: list[uuid.UUID]):
-        success_count, failure_count, messages = 0, 0, []
+        success_count, failure_count, messages, updated_components = 0, 0, [], []
         if not component_ids:
             self._show_message("Selection Error", "No components selected.", "warning")
             return
@@ -316,7 +396,7 @@ class MainController(QObject):
                     messages.append(f"- {component.part_number}: Removal cancelled.")
                     failure_count += 1;
                     continue
-                remove_component_quantity(component_id, quantity_to_remove)
+                updated_components.append(remove_component_quantity(component_id, quantity_to_remove))
                 messages.append(
                     f"- {component.part_number}: Removed {quantity_to_remove} (Remaining: {component.quantity - quantity_to_remove}).")
                 success_count += 1
@@ -329,7 +409,8 @@ class MainController(QObject):
         summary = f"Processed {len(component_ids)} component(s):\nSucceeded: {success_count}\nFailed/Cancelled: {failure_count}\n\nDetails:\n" + "\n".join(
             messages)
         self._show_message("Removal Summary", summary, "info" if failure_count == 0 else "warning")
-        if success_count > 0: self.load_inventory_data()
+        for updated_component in updated_components:
+            self._apply_component_change(updated_component)
 
     def open_generate_ideas_dialog(self, checked_ids: list[uuid.UUID]):
         if not self._api_key or "YOUR_API_KEY" in self._api_key:
@@ -368,42 +449,33 @@ class MainController(QObject):
 
     def _perform_transfer(self, destination_inventory: Inventory, transfer_data: dict):
         if not (source_inventory := self._active_inventory): return
-        original_db_url = f"sqlite:///{source_inventory.db_path if os.path.isabs(source_inventory.db_path) else os.path.join(self._app_path, source_inventory.db_path)}"
-        success_count, fail_count, messages = 0, 0, []
         try:
-            for component_id, quantity in transfer_data.items():
-                try:
-                    if not (source_component := get_component_by_id(component_id)):
-                        raise ComponentNotFoundError(f"ID {component_id} not found in source.")
-                    inventory.remove_component_quantity(component_id, quantity)
-                    dest_db_path = destination_inventory.db_path if os.path.isabs(
-                        destination_inventory.db_path) else os.path.join(self._app_path, destination_inventory.db_path)
-                    database.switch_inventory_db(f"sqlite:///{dest_db_path}")
-                    if existing_dest_comps := inventory.get_components_by_part_number(source_component.part_number):
-                        dest_comp = existing_dest_comps[0]
-                        inventory.update_component(dest_comp.id, {'quantity': dest_comp.quantity + quantity})
-                    else:
-                        inventory.add_component(part_number=source_component.part_number,
-                                                component_type=source_component.component_type,
-                                                value=source_component.value, quantity=quantity,
-                                                purchase_link=source_component.purchase_link,
-                                                datasheet_link=source_component.datasheet_link,
-                                                location=source_component.location, notes=source_component.notes,
-                                                image_path=source_component.image_path)
-                    success_count += 1
-                    messages.append(f"- Transferred {quantity} of {source_component.part_number}")
-                except Exception as e:
-                    fail_count += 1
-                    part_num = getattr(source_component, 'part_number', f"ID {component_id}")
-                    messages.append(f"- FAILED to transfer {part_num}: {e}")
-                finally:
-                    database.switch_inventory_db(original_db_url)
-        finally:
-            database.switch_inventory_db(original_db_url)
-            self.load_inventory_data()
-            summary = f"Transfer complete.\n\nSucceeded: {success_count}\nFailed: {fail_count}\n\n" + "\n".join(
-                messages)
-            self._show_message("Transfer Summary", summary, "info" if fail_count == 0 else "warning")
+            updated_components = inventory_manager.transfer_components(source_inventory, destination_inventory,
+                                                                       transfer_data, self._app_path)
+        except Exception as e:
+            self._show_message("Transfer Failed", f"Nothing was transferred to '{destination_inventory.name}':\n{e}",
+                               "critical")
+            return
+        for updated_component in updated_components:
+            self._apply_component_change(updated_component)
+        messages = [f"- Transferred {transfer_data.get(c.id, 0)} of {c.part_number}" for c in updated_components]
+        summary = f"Transfer to '{destination_inventory.name}' complete.\n\n" + "\n".join(messages)
+        self._show_message("Transfer Summary", summary, "info")
+
+    def handle_open_global_search(self):
+        if self._global_search_controller is None:
+            self._global_search_controller = GlobalSearchController(self._app_path, self._view, self)
+            self._global_search_controller.open_in_inventory_requested.connect(self._open_global_search_hit)
+        self._global_search_controller.show(self._current_search_term)
+
+    def _open_global_search_hit(self, inventory_name: str, part_number: str):
+        target = next((inv for inv in self._inventories if inv.name == inventory_name), None)
+        if target is None:
+            self._show_message("Inventory Not Found", f"Inventory '{inventory_name}' no longer exists.", "warning")
+            return
+        self.switch_inventory(target)
+        if self._active_inventory and self._active_inventory.id == target.id:
+            self._view.search_bar.setText(part_number)
 
     def open_link_in_browser(self, url: QUrl):
         if url and url.isValid():
@@ -424,14 +496,48 @@ class MainController(QObject):
         num, ok = QInputDialog.getInt(self._view, "Add Random Components", "How many components?", 20, 1, 1000)
         if ok and num > 0:
             try:
-                self._show_message("Processing...", f"Generating {num} random components...", "info")
-                for component_data in generate_random_components(num):
-                    inventory.add_component(**component_data)
+                counts = inventory.bulk_add_components(generate_random_components(num), on_conflict="skip")
                 self.load_inventory_data()
-                self._show_message("Success", f"Added {num} random components.", "info")
+                self._show_message("Success", f"Added {counts['inserted']} random components.", "info")
             except Exception as e:
                 self._show_message("Error", f"An error occurred: {e}", "critical")
 
+    def handle_rebuild_search_index(self):
+        try:
+            database.rebuild_inventory_search_index()
+            self.load_inventory_data()
+            self._show_message("Success", "The search index has been rebuilt.", "info")
+        except Exception as e:
+            self._show_message("Error", f"Could not rebuild the search index: {e}", "critical")
+
+    def handle_move_to_shared_database(self):
+        if self._import_export_controller.is_busy():
+            self._show_message("Please Wait", "Wait for the running import or export to finish first.", "info")
+            return
+        reply = QMessageBox.question(
+            self._view, "Move Inventories Into One Database",
+            f"Copy all {len(self._inventories)} inventories into one shared database?\n\n"
+            "Afterwards every inventory is opened from the shared database. The current inventory files are "
+            "left unchanged as a backup.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            counts = inventory_manager.migrate_to_shared_database(self._app_path, self._inventories)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            self._show_message("Error", f"The inventories were not moved; each keeps its own file.\n\n{e}", "critical")
+            return
+        QApplication.restoreOverrideCursor()
+        self._view.menu_bar_handler.share_database_action.setEnabled(False)
+        # Reopen the active inventory from the shared database
+        active, self._active_inventory = self._active_inventory, None
+        if active:
+            self.switch_inventory(active)
+        summary = "\n".join(f"- {name}: {count} components" for name, count in counts.items())
+        self._show_message("Success", f"All inventories now share one database.\n\n{summary}", "info")
+
     def _switch_to_adjacent_inventory(self, direction: int):
         """Helper function to switch to the next/previous inventory."""
         if not self._inventories or not self._active_inventory:
@@ -467,9 +573,10 @@ class MainController(QObject):
 
             if reply == QMessageBox.Yes:
                 inventory.delete_component_permanently(component_id)
+                self._view.remove_component(component_id)
+                self._refresh_type_filter()
                 self._show_message("Success", f"Component '{component.part_number}' has been permanently removed.",
                                    "info")
-                self.load_inventory_data()
         except Exception as e:
             self._show_message("Error", f"Could not permanently remove component: {e}", "critical")
 
@@ -0,0 +1,115 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from frontend.ui.main_window import InventoryUI
+from backend import settings_manager
+from backend.inventory import search_components
+
+
+class SearchWorkerSignals(QObject):
+    # generation, first page of results (None if the worker was cancelled before it ran)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class SearchWorker(QRunnable):
+    def __init__(self, generation: int, fetcher, order_by: str, descending: bool, limit: int):
+        super().__init__()
+        self.signals = SearchWorkerSignals()
+        self.generation = generation
+        self.fetcher = fetcher
+        self.order_by = order_by
+        self.descending = descending
+        self.limit = limit
+        self.cancelled = False
+
+    def run(self):
+        if self.cancelled:
+            self.signals.finished.emit(self.generation, None)
+            return
+        try:
+            page = self.fetcher(0, self.limit, self.order_by, self.descending)
+            self.signals.finished.emit(self.generation, page)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+
+
+class SearchController(QObject):
+    """Debounces search input and runs the first page query off the GUI thread; stale results are dropped."""
+    search_failed = pyqtSignal(str)
+
+    DEFAULT_DEBOUNCE_MS = 250
+
+    def __init__(self, view: InventoryUI, parent=None):
+        super().__init__(parent)
+        self._view = view
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._generation = 0
+        self._workers = {}
+        self._pending_query = (None, None, None)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._start_pending_query)
+        self.set_debounce_ms(settings_manager.get_setting('search_debounce_ms', str(self.DEFAULT_DEBOUNCE_MS)))
+
+    def set_debounce_ms(self, value):
+        try:
+            delay = max(0, int(value))
+        except (TypeError, ValueError):
+            delay = self.DEFAULT_DEBOUNCE_MS
+        self._timer.setInterval(delay)
+
+    def debounce_ms(self) -> int:
+        return self._timer.interval()
+
+    def schedule(self, term: str | None, backend_type: str | None, ranges: list | None = None):
+        """Runs the search once the input has been quiet for the debounce delay."""
+        self._pending_query = (term, backend_type, ranges)
+        self._timer.start()
+
+    def run_now(self, term: str | None, backend_type: str | None, ranges: list | None = None):
+        self._timer.stop()
+        self._pending_query = (term, backend_type, ranges)
+        self._start_pending_query()
+
+    @staticmethod
+    def make_fetcher(term: str | None, backend_type: str | None, ranges: list | None = None):
+        def fetch_page(offset: int, limit: int, order_by: str, descending: bool):
+            return search_components(term, backend_type, order_by, descending, limit, offset, ranges=ranges)
+        return fetch_page
+
+    def _start_pending_query(self):
+        self._cancel_running()
+        self._generation += 1
+        model = self._view.table_model
+        order_by, descending = model.sort_order()
+        worker = SearchWorker(self._generation, self.make_fetcher(*self._pending_query),
+                              order_by, descending, model.PAGE_SIZE)
+        worker.signals.finished.connect(self._handle_finished)
+        worker.signals.failed.connect(self._handle_failed)
+        self._workers[worker.generation] = worker
+        self._pool.start(worker)
+
+    def _cancel_running(self):
+        # Queued workers skip their query; one already running finishes but its result is discarded.
+        for worker in self._workers.values():
+            worker.cancelled = True
+
+    def _handle_finished(self, generation: int, page):
+        worker = self._workers.pop(generation, None)
+        if worker is None or generation != self._generation or page is None:
+            return
+        if self._view.table_model.sort_order() != (worker.order_by, worker.descending):
+            # The user re-sorted while the query ran; let the model query in its current order.
+            self._view.set_page_fetcher(worker.fetcher)
+        else:
+            self._view.set_page_fetcher(worker.fetcher, first_page=page)
+
+    def _handle_failed(self, generation: int, message: str):
+        self._workers.pop(generation, None)
+        if generation == self._generation:
+            self.search_failed.emit(message)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
@@ -9,6 +9,7 @@ from PyQt5.QtGui import QPixmap
 from backend.type_manager import type_manager
 from backend.exceptions import InvalidInputError
 from backend.models import Component
+from backend import property_index
 
 
 class AddComponentDialog(QDialog):
@@ -27,6 +28,7 @@ class AddComponentDialog(QDialog):
         type_layout = QHBoxLayout()
         self.type_input = QComboBox(self)
         self.type_input.addItems(type_manager.get_all_ui_names())
+        self._types_generation = type_manager.generation
         self.manage_types_button = QPushButton("Manage Types...")
         type_layout.addWidget(self.type_input)
         type_layout.addWidget(self.manage_types_button)
@@ -91,6 +93,9 @@ class AddComponentDialog(QDialog):
             self.image_label.setPixmap(pixmap)
 
     def refresh_type_list(self):
+        if self._types_generation == type_manager.generation:
+            return
+        self._types_generation = type_manager.generation
         current_selection = self.type_input.currentText()
         self.type_input.blockSignals(True)
         self.type_input.clear()
@@ -154,7 +159,12 @@ class AddComponentDialog(QDialog):
             'source_image_path': self._source_image_path
         }
 
-    def populate_from_component(self, component: Component, app_path: str):
+    def populate_from_component(self, component: Component, app_path: str,
+                                property_values: dict[str, str] | None = None):
+        """
+        Fills the dialog with a copy of component. property_values are its stored properties
+        (inventory.get_component_properties()); they are parsed from the value when not given.
+        """
         self.setWindowTitle("Duplicate Component")
         self.type_input.blockSignals(True)
 
@@ -164,12 +174,12 @@ class AddComponentDialog(QDialog):
 
         self.update_fields()
 
-        value_data = {k.strip(): v.strip() for p in component.value.split(',') if ':' in p for k, v in
-                      [p.split(':', 1)]}
+        if property_values is None:
+            property_values = property_index.parse_properties(component.value)
+        values = property_index.values_for(list(self.dynamic_fields), property_values)
         for prop_name, (_, prop_input) in self.dynamic_fields.items():
-            matching_key = next((k for k in value_data if prop_name.startswith(k)), None)
-            if matching_key:
-                prop_input.setText(value_data.get(matching_key, ""))
+            if prop_name in values:
+                prop_input.setText(values[prop_name])
 
         self.part_number_input.clear()
         self.part_number_input.setPlaceholderText("Enter a NEW, unique part number")
@@ -7,15 +7,21 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QPixmap
 from backend.models import Component
+from backend import property_index
 
 
 class ComponentDetailsDialog(QDialog):
     image_change_requested = pyqtSignal(str)
 
-    def __init__(self, component: Component, properties: list[str], app_path: str, parent=None):
+    def __init__(self, component: Component, properties: list[str], app_path: str, parent=None,
+                 property_values: dict[str, str] | None = None):
         super().__init__(parent)
         self.component = component
         self.properties = properties
+        # Stored properties from inventory.get_component_properties(); parsed from the value when not given
+        if property_values is None:
+            property_values = property_index.parse_properties(component.value)
+        self.property_values = property_index.values_for(properties, property_values)
         self.app_path = app_path
         self.property_inputs = {}
 
@@ -79,15 +85,6 @@ class ComponentDetailsDialog(QDialog):
         self.layout.addWidget(notes_group)
         self.layout.addWidget(button_box)
 
-    def _parse_value_string(self) -> dict:
-        parsed = {}
-        if not self.component.value: return parsed
-        for pair in self.component.value.split(','):
-            if ':' in pair:
-                key, val = pair.split(':', 1)
-                parsed[key.strip()] = val.strip()
-        return parsed
-
     def _populate_data(self):
         if self.component.image_path and (
         full_path := os.path.join(self.app_path, self.component.image_path)) and os.path.exists(full_path):
@@ -102,11 +99,9 @@ class ComponentDetailsDialog(QDialog):
         self.datasheet_link_input.setText(self.component.datasheet_link or "")
         self.notes_input.setPlainText(self.component.notes or "")
 
-        value_data = self._parse_value_string()
         for prop_name, prop_input in self.property_inputs.items():
-            matching_key = next((k for k in value_data if prop_name.startswith(k)), None)
-            if matching_key:
-                prop_input.setText(value_data.get(matching_key, ""))
+            if prop_name in self.property_values:
+                prop_input.setText(self.property_values[prop_name])
 
     def get_data(self) -> dict:
         value_parts = [f"{prop_name}: {prop_input.text().strip()}" for prop_name, prop_input in
@@ -0,0 +1,108 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QTreeWidget, QTreeWidgetItem, QHeaderView, QDialogButtonBox
+)
+from PyQt5.QtCore import Qt, pyqtSignal
+
+from backend.global_search import GlobalSearchResult
+from backend.type_manager import type_manager
+
+
+class GlobalSearchDialog(QDialog):
+    search_requested = pyqtSignal(str)
+    # Signal emits: inventory name, part number
+    open_in_inventory_requested = pyqtSignal(str, str)
+
+    # Parts shown expanded with their per-inventory rows; larger results start collapsed
+    EXPAND_LIMIT = 50
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Search All Inventories")
+        self.setMinimumSize(700, 450)
+        self.setWindowModality(Qt.NonModal)
+        self._init_ui()
+
+    def _init_ui(self):
+        self.layout = QVBoxLayout(self)
+
+        # --- Search Input ---
+        search_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search every inventory by Part Number, Value, or Location...")
+        self.search_input.returnPressed.connect(self._emit_search)
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self._emit_search)
+        search_layout.addWidget(self.search_input, 1)
+        search_layout.addWidget(self.search_button)
+        self.layout.addLayout(search_layout)
+
+        # --- Results: one row per part number with its total, one child row per inventory ---
+        self.results_tree = QTreeWidget()
+        self.results_tree.setColumnCount(5)
+        self.results_tree.setHeaderLabels(["Part Number / Inventory", "Type", "Value", "Location", "Stock"])
+        self.results_tree.setAlternatingRowColors(True)
+        self.results_tree.itemDoubleClicked.connect(self._handle_item_double_clicked)
+        header = self.results_tree.header()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.Stretch)
+        self.layout.addWidget(self.results_tree)
+
+        self.status_label = QLabel("Double-click an inventory row to open that inventory at the part.")
+        self.status_label.setWordWrap(True)
+        self.layout.addWidget(self.status_label)
+
+        # --- Buttons ---
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.close)
+        self.layout.addWidget(button_box)
+
+    def _emit_search(self):
+        self.search_requested.emit(self.search_input.text())
+
+    def set_search_text(self, text: str):
+        self.search_input.setText(text)
+
+    def set_busy(self, busy: bool):
+        self.search_button.setEnabled(not busy)
+        if busy:
+            self.status_label.setText("Searching all inventories...")
+
+    def show_result(self, result: GlobalSearchResult):
+        self.set_busy(False)
+        self.results_tree.clear()
+        expand = len(result.parts) <= self.EXPAND_LIMIT
+        for part in result.parts:
+            part_item = QTreeWidgetItem([
+                part.part_number, type_manager.get_ui_name(part.component_type) or part.component_type,
+                part.value, "", f"{part.total_quantity:,}"
+            ])
+            part_item.setData(0, Qt.UserRole, (part.hits[0].inventory_name, part.part_number))
+            font = part_item.font(0)
+            font.setBold(True)
+            part_item.setFont(0, font)
+            part_item.setFont(4, font)
+            part_item.setTextAlignment(4, Qt.AlignRight | Qt.AlignVCenter)
+            for hit in part.hits:
+                hit_item = QTreeWidgetItem([hit.inventory_name, "", "", hit.location or "", f"{hit.quantity:,}"])
+                hit_item.setData(0, Qt.UserRole, (hit.inventory_name, hit.part_number))
+                hit_item.setTextAlignment(4, Qt.AlignRight | Qt.AlignVCenter)
+                part_item.addChild(hit_item)
+            self.results_tree.addTopLevelItem(part_item)
+            part_item.setExpanded(expand)
+
+        status = (f"{len(result.parts):,} part numbers found in {result.inventories_searched} inventories "
+                  f"({result.inventories_from_cache} unchanged since the last search).")
+        if result.errors:
+            failed = "; ".join(f"{name} ({error})" for name, error in result.errors.items())
+            status += f"\nCould not search: {failed}"
+        self.status_label.setText(status)
+
+    def show_error(self, message: str):
+        self.set_busy(False)
+        self.status_label.setText(f"Search failed: {message}")
+
+    def _handle_item_double_clicked(self, item: QTreeWidgetItem, column: int):
+        target = item.data(0, Qt.UserRole)
+        if target:
+            self.open_in_inventory_requested.emit(*target)
@@ -0,0 +1,360 @@
+import os
+import uuid
+from typing import Callable
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QUrl, pyqtSignal
+from PyQt5.QtGui import QColor
+from backend.component_constants import BACKEND_TO_UI_TYPE_MAP
+
+# fetcher(offset, limit, order_by, descending) -> list of components
+PageFetcher = Callable[[int, int, str, bool], list]
+
+
+class InventoryTableModel(QAbstractTableModel):
+    component_edited = pyqtSignal(uuid.UUID, dict)
+    check_state_changed = pyqtSignal()
+    fetch_failed = pyqtSignal(str)
+
+    PART_NUMBER_COL = 0
+    TYPE_COL = 1
+    VALUE_COL = 2
+    QUANTITY_COL = 3
+    PURCHASE_LINK_COL = 4
+    DATASHEET_COL = 5
+    LOCATION_COL = 6
+    CHECKBOX_COL = 7
+
+    HEADERS = ["Part Number", "Type", "Value", "Quantity", "Purchase Link", "Datasheet", "Location", "Select"]
+    EDITABLE_COLUMNS = {VALUE_COL: "value", QUANTITY_COL: "quantity", LOCATION_COL: "location"}
+    SORT_KEYS = {
+        PART_NUMBER_COL: "part_number",
+        TYPE_COL: "component_type",
+        VALUE_COL: "value",
+        QUANTITY_COL: "quantity",
+        LOCATION_COL: "location",
+    }
+    PAGE_SIZE = 200
+    LINK_COLOR = QColor("#569cd6")
+
+    def __init__(self, app_path: str = ".", parent=None):
+        super().__init__(parent)
+        self.app_path = app_path
+        self._components = []
+        self._row_by_id: dict[uuid.UUID, int] = {}
+        self._checked_ids = set()
+        self._fetcher: PageFetcher | None = None
+        self._fetched_count = 0
+        self._exhausted = True
+        self._order_by = "part_number"
+        self._descending = False
+
+    # --- Loading ---
+    def set_components(self, components: list):
+        """Shows a fixed, already loaded list of components."""
+        self.beginResetModel()
+        self._fetcher = None
+        self._exhausted = True
+        self._components = [c for c in (components or []) if isinstance(getattr(c, 'id', None), uuid.UUID)]
+        self._fetched_count = len(self._components)
+        self._checked_ids.clear()
+        self._sort_loaded_components()
+        self._reindex_rows()
+        self.endResetModel()
+        self.check_state_changed.emit()
+
+    def set_page_fetcher(self, fetcher: PageFetcher, first_page: list | None = None):
+        """
+        Shows the rows returned by fetcher, loading them one page at a time as the view scrolls.
+        first_page can carry rows already fetched (e.g. by a background search) in the current sort order.
+        """
+        self._fetcher = fetcher
+        self.reload(first_page)
+
+    def reload(self, first_page: list | None = None):
+        self.beginResetModel()
+        self._components = []
+        self._fetched_count = 0
+        self._exhausted = self._fetcher is None
+        self._checked_ids.clear()
+        if first_page is not None:
+            self._components = [c for c in first_page if isinstance(getattr(c, 'id', None), uuid.UUID)]
+            self._fetched_count = len(first_page)
+            self._exhausted = self._exhausted or len(first_page) < self.PAGE_SIZE
+        self._reindex_rows()
+        self.endResetModel()
+        if first_page is None and self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+        self.check_state_changed.emit()
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex):
+        if not self.canFetchMore(parent):
+            return
+        try:
+            page = self._fetcher(self._fetched_count, self.PAGE_SIZE, self._order_by, self._descending)
+        except Exception as e:
+            # Exceptions must not escape a Qt virtual; stop fetching and let the view report it.
+            self._exhausted = True
+            self.fetch_failed.emit(str(e))
+            return
+
+        self._fetched_count += len(page)
+        self._exhausted = len(page) < self.PAGE_SIZE
+        page = [c for c in page if isinstance(getattr(c, 'id', None), uuid.UUID) and c.id not in self._row_by_id]
+        if not page:
+            return
+        first = len(self._components)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._components.extend(page)
+        self._reindex_rows(first)
+        self.endInsertRows()
+
+    def fetch_all(self):
+        while self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    # --- Sorting ---
+    def sort_order(self) -> tuple[str, bool]:
+        return self._order_by, self._descending
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        if column not in self.SORT_KEYS:
+            return
+        order_by, descending = self.SORT_KEYS[column], order == Qt.DescendingOrder
+        if (order_by, descending) == (self._order_by, self._descending):
+            return
+        self._order_by, self._descending = order_by, descending
+        if self._fetcher is not None:
+            checked = set(self._checked_ids)
+            self.reload()
+            self._checked_ids = checked
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._sort_loaded_components()
+        self._reindex_rows()
+        self.layoutChanged.emit()
+
+    def _sort_key(self, component):
+        # Mirrors the database ORDER BY <column>, id (NULLs first) so rows can be placed without re-querying
+        value = getattr(component, self._order_by, None)
+        return value is not None, value if value is not None else 0, component.id.hex
+
+    def _sort_loaded_components(self):
+        self._components.sort(key=self._sort_key, reverse=self._descending)
+
+    def _insert_position(self, component, skip_row: int = -1) -> int:
+        """The row component sorts into, counted as if skip_row (its current row, if any) were not there."""
+        rows = len(self._components) - (skip_row != -1)
+        key = self._sort_key(component)
+        low, high = 0, rows
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = self._sort_key(self._components[middle + (skip_row != -1 and middle >= skip_row)])
+            if (middle_key > key) if self._descending else (middle_key < key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    # --- Qt model interface ---
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._components)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self.HEADERS):
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if index.column() in self.EDITABLE_COLUMNS:
+            flags |= Qt.ItemIsEditable
+        elif index.column() == self.CHECKBOX_COL:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._components)):
+            return None
+        component, col = self._components[index.row()], index.column()
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self._display_value(component, col, role)
+        if role == Qt.CheckStateRole and col == self.CHECKBOX_COL:
+            return Qt.Checked if component.id in self._checked_ids else Qt.Unchecked
+        if role == Qt.ForegroundRole:
+            if col == self.PART_NUMBER_COL and getattr(component, 'image_path', None):
+                return self.LINK_COLOR
+            if col in (self.PURCHASE_LINK_COL, self.DATASHEET_COL) and self._link_for(component, col):
+                return self.LINK_COLOR
+        if role == Qt.TextAlignmentRole and col in (self.PURCHASE_LINK_COL, self.DATASHEET_COL, self.CHECKBOX_COL):
+            return Qt.AlignCenter
+        if role == Qt.ToolTipRole and col == self.PART_NUMBER_COL and getattr(component, 'image_path', None):
+            full_image_path = os.path.join(self.app_path, component.image_path).replace("\\", "/")
+            if os.path.exists(full_image_path):
+                return f'<img src="file:///{full_image_path}" width="250">'
+        if role == Qt.UserRole:
+            if col in (self.PURCHASE_LINK_COL, self.DATASHEET_COL):
+                return self._link_for(component, col)
+            return component.id
+        return None
+
+    def _display_value(self, component, col: int, role: int):
+        if col == self.PART_NUMBER_COL:
+            return component.part_number or ""
+        if col == self.TYPE_COL:
+            return BACKEND_TO_UI_TYPE_MAP.get(component.component_type, component.component_type)
+        if col == self.VALUE_COL:
+            return component.value or ""
+        if col == self.QUANTITY_COL:
+            try:
+                return int(component.quantity)
+            except (ValueError, TypeError):
+                return 0
+        if col in (self.PURCHASE_LINK_COL, self.DATASHEET_COL):
+            return "Link" if self._link_for(component, col) and role == Qt.DisplayRole else ""
+        if col == self.LOCATION_COL:
+            return getattr(component, 'location', None) or ""
+        return None
+
+    def _link_for(self, component, col: int) -> QUrl | None:
+        link_url = component.purchase_link if col == self.PURCHASE_LINK_COL else component.datasheet_link
+        if not link_url:
+            return None
+        url = QUrl(link_url)
+        if not url.scheme(): url.setScheme("http")
+        return url
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
+        if not index.isValid():
+            return False
+        component, col = self._components[index.row()], index.column()
+
+        if role == Qt.CheckStateRole and col == self.CHECKBOX_COL:
+            if value == Qt.Checked:
+                self._checked_ids.add(component.id)
+            else:
+                self._checked_ids.discard(component.id)
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+            self.check_state_changed.emit()
+            return True
+
+        if role == Qt.EditRole and col in self.EDITABLE_COLUMNS:
+            attr = self.EDITABLE_COLUMNS[col]
+            if attr == "quantity":
+                try:
+                    value = int(value)
+                except (ValueError, TypeError):
+                    return False
+                if value < 0:
+                    return False
+            else:
+                value = str(value)
+            if getattr(component, attr, None) == value:
+                return False
+            # The row keeps its stored value; once the backend saves the edit the saved component comes back
+            # through upsert_component, so a failed save never leaves an unsaved value on screen.
+            self.component_edited.emit(component.id, {attr: value})
+            return True
+        return False
+
+    # --- Incremental updates ---
+    def _reindex_rows(self, first: int = 0):
+        """Refreshes the id -> row lookup for the rows from first on, after they were inserted or moved."""
+        if first == 0:
+            self._row_by_id.clear()
+        for row in range(first, len(self._components)):
+            self._row_by_id[self._components[row].id] = row
+
+    def row_for_id(self, component_id: uuid.UUID) -> int:
+        return self._row_by_id.get(component_id, -1)
+
+    def upsert_component(self, component):
+        """Refreshes the row showing component in place, or inserts it at its sorted position."""
+        row = self.row_for_id(component.id)
+        if row != -1 and self._sort_key(self._components[row]) != self._sort_key(component):
+            self._move_component(row, component)
+            return
+        if row != -1:
+            self._components[row] = component
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+            return
+
+        position = self._insert_position(component)
+        if position == len(self._components) and self.canFetchMore(QModelIndex()):
+            return  # Sorts after the loaded rows; the next fetchMore picks it up at the right offset.
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._components.insert(position, component)
+        self._reindex_rows(position)
+        self.endInsertRows()
+        if self._fetcher is not None:
+            self._fetched_count += 1
+
+    def _move_component(self, row: int, component):
+        """Moves a loaded row whose sort value changed to its new sorted position."""
+        position = self._insert_position(component, skip_row=row)
+        if position == len(self._components) - 1 and self.canFetchMore(QModelIndex()):
+            # Unloaded rows may sort before it now. Drop it and fetch from one row earlier, so it comes back
+            # at its place in a later page instead of shifting the offset past a row that was never shown.
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._components[row]
+            del self._row_by_id[component.id]
+            self._reindex_rows(row)
+            self.endRemoveRows()
+            self._fetched_count -= 1
+            return
+
+        # Qt counts the destination before the move, so a row moving down lands before the row after its place
+        destination = position + 1 if position >= row else position
+        if destination not in (row, row + 1):
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+            del self._components[row]
+            self._components.insert(position, component)
+            self._reindex_rows(min(row, position))
+            self.endMoveRows()
+        else:
+            self._components[row] = component
+        self.dataChanged.emit(self.index(position, 0), self.index(position, self.columnCount() - 1))
+
+    def remove_component(self, component_id: uuid.UUID):
+        row = self.row_for_id(component_id)
+        if row == -1:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._components[row]
+        del self._row_by_id[component_id]
+        self._reindex_rows(row)
+        self.endRemoveRows()
+        if self._fetcher is not None:
+            self._fetched_count -= 1
+        if component_id in self._checked_ids:
+            self._checked_ids.discard(component_id)
+            self.check_state_changed.emit()
+
+    # --- Helpers used by the view ---
+    def component_at(self, row: int):
+        return self._components[row] if 0 <= row < len(self._components) else None
+
+    def component_id_at(self, row: int) -> uuid.UUID | None:
+        component = self.component_at(row)
+        return component.id if component else None
+
+    def checked_ids(self) -> list[uuid.UUID]:
+        return [c.id for c in self._components if c.id in self._checked_ids]
+
+    def set_all_checked(self, checked: bool):
+        if checked:
+            self.fetch_all()
+            self._checked_ids = {c.id for c in self._components}
+        else:
+            self._checked_ids.clear()
+        if self._components:
+            self.dataChanged.emit(self.index(0, self.CHECKBOX_COL),
+                                  self.index(len(self._components) - 1, self.CHECKBOX_COL), [Qt.CheckStateRole])
+        self.check_state_changed.emit()
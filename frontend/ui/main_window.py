@@ -1,15 +1,15 @@
 import uuid
 import os
 from PyQt5.QtWidgets import (
-    QMainWindow, QTableWidget, QTableWidgetItem, QPushButton,
-    QVBoxLayout, QWidget, QHBoxLayout, QCheckBox, QStyle, QAbstractItemView, QHeaderView,
+    QMainWindow, QTableView, QPushButton,
+    QVBoxLayout, QWidget, QHBoxLayout, QStyle, QAbstractItemView, QHeaderView,
     QLineEdit, QMenu, QComboBox, QLabel, QApplication
 )
-from PyQt5.QtGui import QColor, QIcon
-from PyQt5.QtCore import QUrl, Qt, pyqtSignal
-from backend.component_constants import BACKEND_TO_UI_TYPE_MAP
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QUrl, Qt, pyqtSignal, QModelIndex
 from .menu_bar import AppMenuBar
-from .custom_widgets import ComponentTableWidgetItem
+from .inventory_table_model import InventoryTableModel
+from .property_filter_panel import PropertyFilterPanel
 
 
 class InventoryUI(QMainWindow):
@@ -26,30 +26,32 @@ class InventoryUI(QMainWindow):
     component_data_updated = pyqtSignal(uuid.UUID, dict)
     details_requested = pyqtSignal(uuid.UUID)
     type_filter_changed = pyqtSignal(str)
+    property_filter_changed = pyqtSignal(list)
     duplicate_requested = pyqtSignal(uuid.UUID)
     delete_component_requested = pyqtSignal(uuid.UUID)
+    load_data_failed = pyqtSignal(str)
 
-    # --- REFACTORED: Column Constants (Img column removed) ---
-    PART_NUMBER_COL = 0
-    TYPE_COL = 1
-    VALUE_COL = 2
-    QUANTITY_COL = 3
-    PURCHASE_LINK_COL = 4
-    DATASHEET_COL = 5
-    LOCATION_COL = 6
-    CHECKBOX_COL = 7
+    # --- Column Constants (owned by the table model) ---
+    PART_NUMBER_COL = InventoryTableModel.PART_NUMBER_COL
+    TYPE_COL = InventoryTableModel.TYPE_COL
+    VALUE_COL = InventoryTableModel.VALUE_COL
+    QUANTITY_COL = InventoryTableModel.QUANTITY_COL
+    PURCHASE_LINK_COL = InventoryTableModel.PURCHASE_LINK_COL
+    DATASHEET_COL = InventoryTableModel.DATASHEET_COL
+    LOCATION_COL = InventoryTableModel.LOCATION_COL
+    CHECKBOX_COL = InventoryTableModel.CHECKBOX_COL
+
+    EDIT_TRIGGERS = QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed
 
     def __init__(self, icon_path: str | None = None, app_path: str = "."):
         super().__init__()
         self.app_path = app_path
+        self._editing_enabled = True
         self.setWindowTitle("Electronics Inventory Manager")
         self.setGeometry(100, 100, 1100, 600)
         if icon_path and os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
 
-        # This list is no longer needed and was part of the problem
-        # self._checkboxes = []
-        self._row_id_map = {}
         self._init_ui()
         self._connect_signals()
 
@@ -87,16 +89,18 @@ class InventoryUI(QMainWindow):
         self.search_bar.setPlaceholderText("Search by Part Number, Value, or Location...")
         filter_layout.addWidget(self.search_bar, 2)
         self.layout.addLayout(filter_layout)
-
-        self.table = QTableWidget()
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.property_filter_panel = PropertyFilterPanel()
+        self.layout.addWidget(self.property_filter_panel)
+
+        self.table_model = InventoryTableModel(self.app_path, self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setEditTriggers(self.EDIT_TRIGGERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.horizontalHeader().setSortIndicator(self.PART_NUMBER_COL, Qt.AscendingOrder)
         self.table.setSortingEnabled(True)
 
-        # --- REFACTORED: Column count and labels updated ---
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels([
-            "Part Number", "Type", "Value", "Quantity", "Purchase Link", "Datasheet", "Location", "Select"
-        ])
         self.table.setColumnWidth(self.PART_NUMBER_COL, 160)
         self.table.setColumnWidth(self.TYPE_COL, 100)
         self.table.setColumnWidth(self.VALUE_COL, 300)
@@ -107,30 +111,52 @@ class InventoryUI(QMainWindow):
         self.table.setColumnWidth(self.CHECKBOX_COL, 60)
         self.layout.addWidget(self.table)
 
-    def populate_type_filter(self, type_names: list[str]):
+    def populate_type_filter(self, type_names: list[str], counts: dict[str, int] | None = None,
+                             total: int | None = None):
+        """
+        Fills the type filter, keeping the selected type. With counts (per type name) and total, each entry shows
+        how many components it has, e.g. "Resistor (1,284)"; the item data holds the plain name.
+        """
+        def label(name, count):
+            return name if count is None else f"{name} ({count:,})"
+
+        selected = self.current_type_filter()
         self.type_filter_combo.blockSignals(True)
         self.type_filter_combo.clear()
-        self.type_filter_combo.addItem("All Types")
-        self.type_filter_combo.addItems(sorted(type_names))
+        self.type_filter_combo.addItem(label("All Types", total), "All Types")
+        for name in sorted(type_names):
+            self.type_filter_combo.addItem(label(name, None if counts is None else counts.get(name, 0)), name)
+        self.type_filter_combo.setCurrentIndex(max(self.type_filter_combo.findData(selected), 0))
         self.type_filter_combo.blockSignals(False)
 
+    def current_type_filter(self) -> str:
+        return self.type_filter_combo.currentData() or "All Types"
+
+    def set_filter_properties(self, property_names: list[str]):
+        """Offers range filters for property_names; an empty list hides the filter panel."""
+        self.property_filter_panel.set_properties(property_names)
+
     def _connect_signals(self):
         self.add_button.clicked.connect(self.add_component_requested)
         self.remove_button.clicked.connect(self._on_remove_clicked)
         self.generate_ideas_button.clicked.connect(self._on_generate_ideas_clicked)
         self.export_button.clicked.connect(self._on_export_clicked)
         self.import_button.clicked.connect(self._on_import_clicked)
-        self.table.cellClicked.connect(self._handle_cell_click)
+        self.table.clicked.connect(lambda index: self._handle_cell_click(index.row(), index.column()))
         self.search_bar.textChanged.connect(self.search_text_changed.emit)
-        self.table.itemDoubleClicked.connect(self._handle_double_click)
-        self.table.itemChanged.connect(self._handle_item_changed)
-        self.type_filter_combo.currentTextChanged.connect(self.type_filter_changed.emit)
+        self.table.doubleClicked.connect(self._handle_double_click)
+        self.table_model.component_edited.connect(self.component_data_updated.emit)
+        self.table_model.check_state_changed.connect(self._update_buttons_state_on_checkbox)
+        self.table_model.fetch_failed.connect(lambda message: self.load_data_failed.emit(message))
+        self.type_filter_combo.currentIndexChanged.connect(
+            lambda _: self.type_filter_changed.emit(self.current_type_filter()))
+        self.property_filter_panel.ranges_changed.connect(self.property_filter_changed.emit)
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self._show_context_menu)
 
     def _adjust_window_width(self):
         total_width = self.table.verticalHeader().width()
-        for i in range(self.table.columnCount()):
+        for i in range(self.table_model.columnCount()):
             total_width += self.table.columnWidth(i)
         scrollbar_width = self.table.style().pixelMetric(
             QStyle.PM_ScrollBarExtent) if self.table.verticalScrollBar().isVisible() else 0
@@ -150,10 +176,11 @@ class InventoryUI(QMainWindow):
         self._adjust_table_columns_for_resize()
 
     def _show_context_menu(self, position):
-        item = self.table.itemAt(position)
-        if not item: return
-        component_id = self.get_id_for_row(item.row())
-        if not component_id: return
+        index = self.table.indexAt(position)
+        if not index.isValid(): return
+        component = self.table_model.component_at(index.row())
+        if not component: return
+        component_id = component.id
 
         menu = QMenu()
         details_action = menu.addAction("More Details...")
@@ -167,6 +194,8 @@ class InventoryUI(QMainWindow):
         font = delete_action.font()
         font.setBold(True)
         delete_action.setFont(font)
+        duplicate_action.setEnabled(self._editing_enabled)
+        delete_action.setEnabled(self._editing_enabled)
 
         action = menu.exec_(self.table.mapToGlobal(position))
 
@@ -175,137 +204,40 @@ class InventoryUI(QMainWindow):
         elif action == duplicate_action:
             self.duplicate_requested.emit(component_id)
         elif action == copy_pn_action:
-            if pn_item := self.table.item(item.row(), self.PART_NUMBER_COL): QApplication.clipboard().setText(
-                pn_item.text())
+            QApplication.clipboard().setText(component.part_number or "")
         elif action == copy_val_action:
-            if val_item := self.table.item(item.row(), self.VALUE_COL): QApplication.clipboard().setText(
-                val_item.text())
+            QApplication.clipboard().setText(component.value or "")
         elif action == delete_action:
             self.delete_component_requested.emit(component_id)
 
-    def _handle_double_click(self, item: QTableWidgetItem):
-        if not (component_id := self.get_id_for_row(item.row())): return
-        if item.column() == self.PART_NUMBER_COL:
+    def _handle_double_click(self, index: QModelIndex):
+        # Value, quantity and location are edited in place through the model's editable flags
+        if index.column() == self.PART_NUMBER_COL and (component_id := self.get_id_for_row(index.row())):
             self.details_requested.emit(component_id)
-        elif item.column() in [self.VALUE_COL, self.QUANTITY_COL, self.LOCATION_COL]:
-            self.table.editItem(item)
-
-    def _handle_item_changed(self, item: QTableWidgetItem):
-        if not (component_id := self.get_id_for_row(item.row())) or not self.table.isPersistentEditorOpen(item): return
-        col, new_value, update_data = item.column(), item.text(), {}
-        if col == self.QUANTITY_COL:
-            try:
-                update_data['quantity'] = int(new_value)
-            except (ValueError, TypeError):
-                self.load_data_requested.emit(); return
-        elif col == self.VALUE_COL:
-            update_data['value'] = new_value
-        elif col == self.LOCATION_COL:
-            update_data['location'] = new_value
-        if update_data: self.component_data_updated.emit(component_id, update_data)
 
     def _handle_cell_click(self, row, column):
         if column in [self.PURCHASE_LINK_COL, self.DATASHEET_COL]:
-            if (item := self.table.item(row, column)) and (link_data := item.data(Qt.UserRole)) and isinstance(
-                    link_data, QUrl) and link_data.isValid():
+            link_data = self.table_model.data(self.table_model.index(row, column), Qt.UserRole)
+            if isinstance(link_data, QUrl) and link_data.isValid():
                 self.link_clicked.emit(link_data)
 
     def get_id_for_row(self, row: int) -> uuid.UUID | None:
-        return self._row_id_map.get(row)
+        return self.table_model.component_id_at(row)
 
     def display_data(self, components: list):
-        # 1. Preparation: Block signals and preserve state
-        self.table.setSortingEnabled(False)
-        self.table.blockSignals(True)
-        current_selection_id = self.get_selected_id()
-
-        self.table.clearContents()
-        self._row_id_map.clear()
-
-        self.table.setRowCount(len(components) if components else 0)
-
-        if not components:
-            self._update_buttons_state_on_checkbox()
-            self.table.blockSignals(False)
-            self.table.setSortingEnabled(True)
-            return
-
-        new_selection_row = -1
-        for row, component in enumerate(components):
-            # Validate the component ID
-            if not (component_id := component.id) or not isinstance(component_id, uuid.UUID):
-                self.table.setRowHidden(row, True)
-                continue
-
-            self._row_id_map[row] = component_id
-
-            if component_id == current_selection_id:
-                new_selection_row = row
-
-            part_number_text = component.part_number or ""
-            pn_item = QTableWidgetItem(part_number_text)
-            pn_item.setFlags(pn_item.flags() & ~Qt.ItemIsEditable)
-            if component.image_path:
-
-                pn_item.setForeground(QColor("#569cd6"))
-
-                full_image_path = os.path.join(self.app_path, component.image_path).replace("\\", "/")
-                if os.path.exists(full_image_path):
-                    pn_item.setToolTip(f'<img src="file:///{full_image_path}" width="250">')
-            self.table.setItem(row, self.PART_NUMBER_COL, pn_item)
-
-            ui_type = BACKEND_TO_UI_TYPE_MAP.get(component.component_type, component.component_type)
-            type_item = QTableWidgetItem(ui_type)
-            type_item.setFlags(type_item.flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, self.TYPE_COL, type_item)
-
-            self.table.setItem(row, self.VALUE_COL, QTableWidgetItem(component.value or ""))
-            self.table.setItem(row, self.LOCATION_COL, QTableWidgetItem(component.location or ""))
-
-            qty_item = QTableWidgetItem()
-            try:
-                qty_item.setData(Qt.DisplayRole, int(component.quantity))
-            except (ValueError, TypeError):
-                qty_item.setData(Qt.DisplayRole, 0)
-            self.table.setItem(row, self.QUANTITY_COL, qty_item)
-
-            def set_link_item(col_idx, link_url):
-                item = QTableWidgetItem()
-                item.setTextAlignment(Qt.AlignCenter)
-                if link_url:
-                    item.setText("Link")
-                    item.setForeground(QColor("#569cd6"))
-                    item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                    url = QUrl(link_url)
-                    if not url.scheme(): url.setScheme("http")
-                    item.setData(Qt.UserRole, url)
-                else:
-                    item.setText("")
-                    item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                self.table.setItem(row, col_idx, item)
-
-            set_link_item(self.PURCHASE_LINK_COL, component.purchase_link)
-            set_link_item(self.DATASHEET_COL, component.datasheet_link)
-
-            checkbox = QCheckBox()
-
-            cell_widget = QWidget()
-            layout = QHBoxLayout(cell_widget)
-            layout.addWidget(checkbox)
-            layout.setAlignment(Qt.AlignCenter)
-            layout.setContentsMargins(0, 0, 0, 0)
-            checkbox.stateChanged.connect(self._update_buttons_state_on_checkbox)
-            self.table.setCellWidget(row, self.CHECKBOX_COL, cell_widget)
-
-        self.table.blockSignals(False)
-        self.table.setSortingEnabled(True)
+        """Shows a fixed list of components (already loaded and filtered)."""
+        self.table_model.set_components(components)
 
-        if new_selection_row != -1:
-            self.table.selectRow(new_selection_row)
-        else:
-            self.table.clearSelection()
+    def set_page_fetcher(self, fetcher, first_page: list | None = None):
+        """Shows the components returned by fetcher, loading further pages as the user scrolls."""
+        self.table_model.set_page_fetcher(fetcher, first_page)
 
-        self._update_buttons_state_on_checkbox()
+    def upsert_component(self, component):
+        """Updates or inserts a single row, keeping scroll position, selection and check state."""
+        self.table_model.upsert_component(component)
+
+    def remove_component(self, component_id: uuid.UUID):
+        self.table_model.remove_component(component_id)
 
     def _on_remove_clicked(self):
         if ids := self.get_checked_ids(): self.remove_components_requested.emit(ids)
@@ -320,18 +252,30 @@ class InventoryUI(QMainWindow):
         self.import_requested.emit()
 
     def get_checked_ids(self) -> list[uuid.UUID]:
-        return [self._row_id_map[row] for row in range(self.table.rowCount()) if
-                (w := self.table.cellWidget(row, self.CHECKBOX_COL)) and (
-                    cb := w.findChild(QCheckBox)) and cb.isChecked() and row in self._row_id_map]
+        return self.table_model.checked_ids()
+
+    def set_editing_enabled(self, enabled: bool):
+        """
+        Enables or disables every way of changing the inventory: inline edits, adding, removing, duplicating and
+        the editing menu actions. Used while an import holds the database's write lock.
+        """
+        self._editing_enabled = enabled
+        self.table.setEditTriggers(self.EDIT_TRIGGERS if enabled else QAbstractItemView.NoEditTriggers)
+        self.add_button.setEnabled(enabled)
+        self.menu_bar_handler.set_editing_actions_enabled(enabled)
+        self._update_buttons_state_on_checkbox()
+
+    def is_editing_enabled(self) -> bool:
+        return self._editing_enabled
 
     def _update_buttons_state_on_checkbox(self):
         enable = bool(self.get_checked_ids())
-        self.remove_button.setEnabled(enable)
+        self.remove_button.setEnabled(enable and self._editing_enabled)
         self.generate_ideas_button.setEnabled(enable)
         self.selection_changed.emit(enable)
 
     def get_selected_id(self) -> uuid.UUID | None:
-        if (selected_row := self.table.currentRow()) >= 0: return self._row_id_map.get(selected_row)
+        if (selected_row := self.table.currentIndex().row()) >= 0: return self.get_id_for_row(selected_row)
         return None
 
     def _adjust_table_columns_for_resize(self):
@@ -347,11 +291,7 @@ class InventoryUI(QMainWindow):
         self._adjust_table_columns_for_resize()
 
     def select_all_items(self):
-        for row in range(self.table.rowCount()):
-            if (widget := self.table.cellWidget(row, self.CHECKBOX_COL)) and (checkbox := widget.findChild(QCheckBox)):
-                checkbox.setChecked(True)
+        self.table_model.set_all_checked(True)
 
     def deselect_all_items(self):
-        for row in range(self.table.rowCount()):
-            if (widget := self.table.cellWidget(row, self.CHECKBOX_COL)) and (checkbox := widget.findChild(QCheckBox)):
-                checkbox.setChecked(False)
\ No newline at end of file
+        self.table_model.set_all_checked(False)
@@ -51,12 +51,23 @@ class AppMenuBar:
         self.toggle_select_action = None
         self.add_random_action = None
         self.transfer_components_action = None
+        self.global_search_action = None
+        self.rebuild_search_index_action = None
+        self.share_database_action = None
         self._create_menu_bar()
 
     def set_inventory_name(self, name: str):
         if self.table_name_label:
             self.table_name_label.setText(name)
 
+    def set_editing_actions_enabled(self, enabled: bool):
+        """Enables or disables the actions that write to the inventories or their types."""
+        for action in (self.new_inventory_action, self.delete_inventory_action, self.manage_types_action,
+                       self.add_random_action, self.transfer_components_action, self.rebuild_search_index_action,
+                       self.share_database_action):
+            if action:
+                action.setEnabled(enabled)
+
     def update_toggle_action_text(self, has_selection: bool):
         if self.toggle_select_action:
             if has_selection:
@@ -87,15 +98,22 @@ class AppMenuBar:
         self.manage_types_action = QAction("Manage Component Types...", self.parent)
         self.toggle_select_action = QAction("Select All Items", self.parent)
         self.transfer_components_action = QAction("Transfer Selected Components...", self.parent)
+        self.global_search_action = QAction("Search All Inventories...", self.parent)
+        self.global_search_action.setShortcut("Ctrl+Shift+F")
         self.add_random_action = QAction("Add Random Components...", self.parent)
+        self.rebuild_search_index_action = QAction("Rebuild Search Index", self.parent)
+        self.share_database_action = QAction("Move All Inventories Into One Database...", self.parent)
 
         tools_menu.addAction(self.options_action)
         tools_menu.addAction(self.manage_types_action)
         tools_menu.addSeparator()
         tools_menu.addAction(self.toggle_select_action)
         tools_menu.addAction(self.transfer_components_action)
+        tools_menu.addAction(self.global_search_action)
         tools_menu.addSeparator()
         tools_menu.addAction(self.add_random_action)
+        tools_menu.addAction(self.rebuild_search_index_action)
+        tools_menu.addAction(self.share_database_action)
 
         # --- Inventory Name Label ---
         self.table_name_label = ScrollableElidedLabel(self.parent)
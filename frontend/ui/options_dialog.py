@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QGroupBox, QFormLayout, QLabel,
-    QLineEdit, QComboBox, QDialogButtonBox
+    QLineEdit, QComboBox, QSpinBox, QDialogButtonBox
 )
 from backend.models_custom import Inventory
 
@@ -40,6 +40,12 @@ class OptionsDialog(QDialog):
         self.startup_inventory_combo = QComboBox()
         app_layout.addRow(QLabel("Load on startup:"), self.startup_inventory_combo)
 
+        self.search_delay_spin = QSpinBox()
+        self.search_delay_spin.setRange(0, 2000)
+        self.search_delay_spin.setSingleStep(50)
+        self.search_delay_spin.setSuffix(" ms")
+        self.search_delay_spin.setToolTip("How long to wait after the last keystroke before searching.")
+        app_layout.addRow(QLabel("Search delay:"), self.search_delay_spin)
 
         app_group.setLayout(app_layout)
         self.layout.addWidget(app_group)
@@ -56,6 +62,10 @@ class OptionsDialog(QDialog):
     def _populate_fields(self, settings: dict):
         self.model_combo.setCurrentText(settings.get('ai_model', 'gpt-4o-mini'))
         self.theme_combo.setCurrentText(settings.get('theme', 'Fusion'))
+        try:
+            self.search_delay_spin.setValue(int(settings.get('search_debounce_ms', 250)))
+        except (TypeError, ValueError):
+            self.search_delay_spin.setValue(250)
 
         self.startup_inventory_combo.addItem("Last Used Inventory", "last_used")
         for inv in self._inventories:
@@ -71,7 +81,8 @@ class OptionsDialog(QDialog):
         data = {
             'ai_model': self.model_combo.currentText(),
             'theme': self.theme_combo.currentText(),
-            'startup_inventory_id': self.startup_inventory_combo.currentData()
+            'startup_inventory_id': self.startup_inventory_combo.currentData(),
+            'search_debounce_ms': self.search_delay_spin.value()
         }
         if self.api_key_input.text():
             data['api_key'] = self.api_key_input.text()
@@ -0,0 +1,75 @@
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel, QLineEdit, QPushButton
+from PyQt5.QtCore import pyqtSignal
+from backend.property_index import PropertyRange, parse_quantity
+
+
+class PropertyFilterPanel(QWidget):
+    """
+    Minimum and maximum fields for the properties of the selected type. Bounds accept unit prefixes ("4.7k",
+    "100n"); a field that is not a number is marked and ignored.
+    """
+    ranges_changed = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fields: dict[str, tuple[QLineEdit, QLineEdit]] = {}
+        self._ranges: list[PropertyRange] = []
+        self._layout = QHBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self.setVisible(False)
+
+    def set_properties(self, property_names: list[str]):
+        """Shows fields for property_names, dropping any bounds entered for the previous type."""
+        while self._layout.count():
+            widget = self._layout.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+        self._fields = {}
+        self._ranges = []
+
+        for name in property_names:
+            minimum, maximum = QLineEdit(), QLineEdit()
+            minimum.setPlaceholderText("min")
+            maximum.setPlaceholderText("max")
+            for field in (minimum, maximum):
+                field.setMaximumWidth(80)
+                field.editingFinished.connect(self._update_ranges)
+            self._layout.addWidget(QLabel(f"{name}:"))
+            self._layout.addWidget(minimum)
+            self._layout.addWidget(QLabel("–"))
+            self._layout.addWidget(maximum)
+            self._fields[name] = (minimum, maximum)
+        if property_names:
+            clear_button = QPushButton("Clear")
+            clear_button.clicked.connect(self.clear)
+            self._layout.addWidget(clear_button)
+            self._layout.addStretch(1)
+        self.setVisible(bool(property_names))
+
+    def ranges(self) -> list[PropertyRange]:
+        return list(self._ranges)
+
+    def clear(self):
+        for minimum, maximum in self._fields.values():
+            minimum.clear()
+            maximum.clear()
+        self._update_ranges()
+
+    def _bound(self, field: QLineEdit, property_name: str) -> float | None:
+        text = field.text().strip()
+        value = parse_quantity(text, property_name) if text else None
+        invalid = bool(text) and value is None
+        field.setStyleSheet("border: 1px solid red;" if invalid else "")
+        field.setToolTip(f"'{text}' is not a number" if invalid else "")
+        return value
+
+    def _update_ranges(self):
+        ranges = []
+        for name, (minimum, maximum) in self._fields.items():
+            low, high = self._bound(minimum, name), self._bound(maximum, name)
+            if low is not None or high is not None:
+                ranges.append(PropertyRange(name, low, high))
+        # editingFinished also fires when focus merely leaves a field
+        if ranges != self._ranges:
+            self._ranges = ranges
+            self.ranges_changed.emit(self.ranges())
@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PyQt5.QtWidgets import QApplication, QMessageBox, QStyleFactory
 
 # --- Manually load .env file for reliability ---
@@ -56,6 +57,7 @@ def main():
     from frontend.controllers.main_controller import MainController
 
     # --- Initialize Databases (MUST be done before using settings) ---
+    database.load_sqlite_pragmas(os.path.join(application_path, "config.ini"))
     try:
         database.initialize_databases(
             config_db_url=config_db_url_final,
@@ -95,4 +97,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Import validation uses worker processes; a frozen build must not start the GUI in them
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+from unittest.mock import patch
+
+from backend import database
+
+
+class TestInventoryEngineCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(database, "_inventory_cache", OrderedDict()),
+            patch.object(database, "inventory_engine", None),
+            patch.object(database, "InventorySession", None),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for cached in database._inventory_cache.values():
+            cached.engine.dispose()
+        for p in reversed(self.patches):
+            p.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def url(self, name):
+        return f"sqlite:///{os.path.join(self.tmp_dir, name)}"
+
+    def test_switching_back_reuses_warm_engine(self):
+        database.switch_inventory_db(self.url("a.db"))
+        first_engine, first_factory = database.inventory_engine, database.InventorySession
+        database.switch_inventory_db(self.url("b.db"))
+        self.assertIsNot(database.inventory_engine, first_engine)
+
+        with patch.object(database, "create_engine") as create_engine:
+            database.switch_inventory_db(self.url("a.db"))
+        create_engine.assert_not_called()
+        self.assertIs(database.inventory_engine, first_engine)
+        self.assertIs(database.InventorySession, first_factory)
+
+    def test_equivalent_paths_share_an_engine(self):
+        database.switch_inventory_db(self.url("a.db"))
+        engine = database.inventory_engine
+        database.switch_inventory_db(f"sqlite:///{os.path.join(self.tmp_dir, 'sub', '..', 'a.db')}")
+        self.assertIs(database.inventory_engine, engine)
+
+    def test_least_recently_used_engine_is_evicted(self):
+        with patch.object(database, "MAX_CACHED_INVENTORY_ENGINES", 2):
+            for name in ("a.db", "b.db", "a.db", "c.db"):
+                database.switch_inventory_db(self.url(name))
+        self.assertEqual(list(database._inventory_cache),
+                         [database._cache_key(self.url("a.db")), database._cache_key(self.url("c.db"))])
+
+    def test_idle_engines_are_closed_but_active_is_kept(self):
+        database.switch_inventory_db(self.url("a.db"))
+        database.switch_inventory_db(self.url("b.db"))
+        with patch.object(database, "INVENTORY_ENGINE_IDLE_SECONDS", -1):
+            database.switch_inventory_db(self.url("c.db"))
+        self.assertEqual(list(database._inventory_cache), [database._cache_key(self.url("c.db"))])
+
+    def test_opening_other_inventories_keeps_the_active_engine(self):
+        database.switch_inventory_db(self.url("a.db"))
+        active = database.inventory_engine
+        with patch.object(database, "MAX_CACHED_INVENTORY_ENGINES", 1):
+            for name in ("b.db", "c.db"):
+                database.get_inventory_engine(self.url(name))
+            self.assertIn(database._cache_key(self.url("a.db")), database._inventory_cache)
+
+            with patch.object(database, "create_engine") as create_engine:
+                database.switch_inventory_db(self.url("a.db"))
+            create_engine.assert_not_called()
+        self.assertIs(database.inventory_engine, active)
+
+    def test_release_drops_engine_and_clears_active(self):
+        database.switch_inventory_db(self.url("a.db"))
+        database.release_inventory_db(self.url("a.db"))
+        self.assertEqual(len(database._inventory_cache), 0)
+        self.assertIsNone(database.inventory_engine)
+        with self.assertRaises(RuntimeError):
+            database.get_inventory_session()
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestSqlitePragmas(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pragmas_patch = patch.object(database, "sqlite_pragmas", dict(database.DEFAULT_SQLITE_PRAGMAS))
+        self.pragmas_patch.start()
+
+    def tearDown(self):
+        self.pragmas_patch.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_config(self, text):
+        path = os.path.join(self.tmp_dir, "config.ini")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_pragmas_are_applied_on_connect(self):
+        engine = database._create_sqlite_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'a.db')}")
+        try:
+            with engine.connect() as conn:
+                self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar(), "wal")
+                self.assertEqual(conn.exec_driver_sql("PRAGMA synchronous").scalar(), 1)
+                self.assertEqual(conn.exec_driver_sql("PRAGMA temp_store").scalar(), 2)
+                self.assertEqual(conn.exec_driver_sql("PRAGMA cache_size").scalar(), -16000)
+        finally:
+            engine.dispose()
+
+    def test_config_overrides_and_rejects_bad_values(self):
+        path = self.write_config("[SQLite]\njournal_mode = delete\nsynchronous = sometimes\n"
+                                 "cache_size = lots\nbogus = 1\nmmap_size = 0\n")
+        pragmas = database.load_sqlite_pragmas(path)
+        self.assertEqual(pragmas["journal_mode"], "DELETE")
+        self.assertEqual(pragmas["synchronous"], "NORMAL")
+        self.assertEqual(pragmas["cache_size"], "-16000")
+        self.assertEqual(pragmas["mmap_size"], "0")
+        self.assertNotIn("bogus", pragmas)
+        self.assertIs(database.sqlite_pragmas, pragmas)
+
+    def test_missing_config_uses_defaults(self):
+        self.assertEqual(database.load_sqlite_pragmas(os.path.join(self.tmp_dir, "missing.ini")),
+                         database.DEFAULT_SQLITE_PRAGMAS)
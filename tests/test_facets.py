@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import facets, inventory
+from backend.component_factory import ComponentFactory
+from backend.models import Base, create_component_class
+
+
+class TestFacetCounts(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        for backend_id in ("resistor", "capacitor"):
+            ComponentFactory.register_component(
+                backend_id, create_component_class(backend_id.title(), backend_id, "Value"))
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://', connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        for target in ('backend.inventory.get_session', 'backend.facets.get_session'):
+            patcher = patch(target, side_effect=lambda: self.Session())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.engine.dispose)
+
+        inventory.add_component("R-4K7", "resistor", "Resistance (Ω): 4700", 100, None, None, "Drawer A1", None)
+        inventory.add_component("R-10K", "resistor", "Resistance (Ω): 10000", 5, None, None, "Bin C4", None)
+        inventory.add_component("C-100N", "capacitor", "Capacitance (µF): 0.1", 40, None, None, "Drawer A2", None)
+
+    def test_counts_per_type_location_and_stock(self):
+        inventory.add_component("C-1U", "capacitor", "Capacitance (µF): 1", 0, None, None, None, None)
+
+        counts = facets.get_facet_counts()
+
+        self.assertEqual(counts.by_type, {"resistor": 2, "capacitor": 2})
+        self.assertEqual(counts.by_location, {"Drawer A1": 1, "Bin C4": 1, "Drawer A2": 1, None: 1})
+        self.assertEqual((counts.in_stock, counts.out_of_stock, counts.total), (3, 1, 4))
+
+    def test_counts_are_cached_until_the_next_commit(self):
+        first = facets.get_facet_counts()
+        with patch.object(facets, "select", side_effect=AssertionError("counted again")):
+            self.assertIs(facets.get_facet_counts(), first)
+
+        component = inventory.get_components_by_part_number("R-10K")[0]
+        inventory.remove_component_quantity(component.id, 5)
+
+        counts = facets.get_facet_counts()
+        self.assertEqual((counts.in_stock, counts.out_of_stock), (2, 1))
+
+    def test_edits_update_the_cached_counts_in_place(self):
+        facets.get_facet_counts()
+        component = inventory.get_components_by_part_number("R-10K")[0]
+
+        inventory.update_component(component.id, {"quantity": 0, "location": "Drawer A1"})
+
+        with patch.object(facets, "select", side_effect=AssertionError("counted again")):
+            counts = facets.get_facet_counts()
+        self.assertEqual(counts.by_type, {"resistor": 2, "capacitor": 1})
+        self.assertEqual(counts.by_location, {"Drawer A1": 2, "Drawer A2": 1})
+        self.assertEqual((counts.in_stock, counts.out_of_stock), (2, 1))
+
+    def test_config_database_commits_keep_the_counts(self):
+        first = facets.get_facet_counts()
+        config = create_engine('sqlite://')
+        self.addCleanup(config.dispose)
+
+        with patch.object(facets.database, "config_engine", config), config.begin() as conn:
+            conn.exec_driver_sql("CREATE TABLE settings (key TEXT)")
+
+        self.assertIs(facets.get_facet_counts(), first)
+
+    def test_each_database_has_its_own_counts(self):
+        facets.get_facet_counts()
+        other = create_engine('sqlite://', connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        self.addCleanup(other.dispose)
+        Base.metadata.create_all(other)
+
+        with sessionmaker(bind=other)() as session:
+            self.assertEqual(facets.get_facet_counts(session=session).total, 0)
+        self.assertEqual(facets.get_facet_counts().total, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from backend import global_search, inventory_manager
+from backend.models_custom import Inventory
+from tests.test_inventory_manager import InventoryFilesTestCase
+
+
+class TestSearchAllInventories(InventoryFilesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        global_search.clear_cache()
+
+    def search(self, term, inventories=None):
+        return global_search.search_all_inventories(term, self.tmp_dir,
+                                                    inventories=inventories or [self.source, self.destination])
+
+    def test_totals_stock_per_part_across_inventories(self):
+        result = self.search("1")
+
+        self.assertEqual([p.part_number for p in result.parts], ["C1", "R1"])
+        resistor = result.parts[1]
+        self.assertEqual(resistor.total_quantity, 12)
+        self.assertEqual([(h.inventory_name, h.quantity, h.location) for h in resistor.hits],
+                         [("Destination", 2, "Shelf 3"), ("Source", 10, "Bin A1")])
+        self.assertEqual((result.inventories_searched, result.inventories_from_cache, result.errors), (2, 0, {}))
+
+    def test_unreadable_inventory_is_reported_not_fatal(self):
+        missing = Inventory(name="Missing", db_path="missing.db")
+
+        result = self.search("R1", [self.source, missing])
+
+        self.assertEqual([p.total_quantity for p in result.parts], [10])
+        self.assertIsInstance(result.errors["Missing"], FileNotFoundError)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "missing.db")))
+
+    def test_unchanged_files_are_served_from_cache(self):
+        self.search("R1")
+
+        result = self.search("R1")
+
+        self.assertEqual(result.inventories_from_cache, 2)
+        self.assertEqual(result.parts[0].total_quantity, 12)
+
+    def test_changed_file_is_searched_again(self):
+        self.search("R")
+        self.add(self.destination, "R2", 7)
+
+        result = self.search("R")
+
+        self.assertEqual(result.inventories_from_cache, 1)
+        self.assertEqual([(p.part_number, p.total_quantity) for p in result.parts], [("R1", 12), ("R2", 7)])
+
+
+class TestSearchSharedDatabase(InventoryFilesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        global_search.clear_cache()
+        inventory_manager.migrate_to_shared_database(self.tmp_dir, [self.source, self.destination])
+
+    def test_one_query_covers_every_inventory(self):
+        result = global_search.search_all_inventories("R1", self.tmp_dir, inventories=[self.source, self.destination])
+
+        self.assertEqual([(h.inventory_name, h.quantity) for h in result.parts[0].hits],
+                         [("Destination", 2), ("Source", 10)])
+        self.assertEqual(result.parts[0].total_quantity, 12)
+        repeated = global_search.search_all_inventories("R1", self.tmp_dir,
+                                                        inventories=[self.source, self.destination])
+        self.assertEqual(repeated.inventories_from_cache, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
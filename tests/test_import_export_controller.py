@@ -0,0 +1,77 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.import_validation import ValidationIssue, ValidationReport
+from frontend.controllers import import_export_controller
+from frontend.controllers.import_export_controller import ImportExportController
+
+
+@pytest.fixture
+def controller(qtbot):
+    main_controller = MagicMock()
+    controller = ImportExportController(None, main_controller)
+    yield controller
+    controller.cleanup()
+
+
+def shown_titles(controller):
+    return [c.args[0] for c in controller._main_controller._show_message.call_args_list]
+
+
+def test_export_runs_on_a_worker_thread(controller, qtbot):
+    gui_thread = threading.current_thread()
+    release = threading.Event()
+    calls = []
+
+    def slow_export(filename, progress_callback):
+        calls.append(threading.current_thread())
+        progress_callback(500, 1000)
+        release.wait(2)
+        progress_callback(1000, 1000)
+        return True
+
+    with patch.object(import_export_controller.QFileDialog, "getSaveFileName", return_value=("out", "CSV Files (*.csv)")), \
+            patch.object(import_export_controller, "export_inventory", side_effect=slow_export):
+        controller.handle_export_request()
+        qtbot.waitUntil(lambda: "500 of 1,000" in controller._progress_dialog.labelText(), timeout=2000)
+        assert controller.is_busy()
+        controller.handle_export_request()
+        release.set()
+        qtbot.waitUntil(lambda: not controller.is_busy(), timeout=2000)
+
+    assert calls and calls[0] is not gui_thread
+    assert shown_titles(controller) == ["Please Wait", "Export Successful"]
+    assert "out.csv" in controller._main_controller._show_message.call_args.args[1]
+
+
+def test_cancel_stops_the_import(controller, qtbot):
+    started = threading.Event()
+
+    def endless_import(filename, progress_callback, mode, skip_invalid):
+        started.set()
+        while True:
+            progress_callback(1, 0)
+            time.sleep(0.01)
+
+    report = ValidationReport(rows_checked=2, issues=[ValidationIssue(3, "Quantity", "Quantity cannot be negative.")])
+    editing_allowed = []
+    controller.editing_allowed_changed.connect(editing_allowed.append)
+    with patch.object(import_export_controller.QFileDialog, "getOpenFileName", return_value=("in.csv", "")), \
+            patch.object(controller, "_ask_import_mode", return_value="merge"), \
+            patch.object(controller, "_confirm_partial_import", return_value=True) as confirm, \
+            patch.object(import_export_controller, "validate_import", return_value=report), \
+            patch.object(import_export_controller, "import_inventory", side_effect=endless_import) as import_mock:
+        controller.handle_import_request()
+        qtbot.waitUntil(started.is_set, timeout=2000)
+        assert editing_allowed == [False]
+        controller._progress_dialog.canceled.emit()
+        qtbot.waitUntil(lambda: not controller.is_busy(), timeout=2000)
+
+    confirm.assert_called_once_with(report)
+    assert import_mock.call_args.kwargs["skip_invalid"] is True
+    assert editing_allowed == [False, True]
+    assert shown_titles(controller) == ["Import Cancelled"]
+    controller._main_controller.load_inventory_data.assert_not_called()
@@ -1,237 +1,470 @@
+import csv
+import os
+import shutil
+import tempfile
 import unittest
-import pandas as pd
-import uuid
 from unittest.mock import patch, MagicMock
 
-from backend import import_export_logic
-from backend.models import Component
-from backend.exceptions import DatabaseError, InvalidInputError, ComponentError
+from openpyxl import Workbook, load_workbook
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
-
-class MockDbComponent:
-    def __init__(self, part_number, component_type, value, quantity, purchase_link=None, datasheet_link=None):
-        self.id = uuid.uuid4()
-        self.part_number = part_number
-        self.component_type = component_type
-        self.value = value
-        self.quantity = quantity
-        self.purchase_link = purchase_link
-        self.datasheet_link = datasheet_link
-
-
-class MockCreatedComponent:
-    def __init__(self, **kwargs):
-        self.id = uuid.uuid4()
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+from backend import database, import_export_logic, file_formats
+from backend.models import Base, Component, create_component_class
+from backend.component_factory import ComponentFactory
+from backend.exceptions import DatabaseError, InvalidInputError, ComponentError, OperationCancelledError
 
 
 class TestImportExportLogic(unittest.TestCase):
 
-    @patch('backend.import_export_logic.ExcelWriter', MagicMock())
-    @patch('backend.import_export_logic.pd.DataFrame')
-    @patch('backend.import_export_logic.get_session')
-    def test_export_to_excel_success(self, mock_get_session, mock_pd_dataframe):
-        mock_session = MagicMock()
-        mock_query = MagicMock()
-        mock_ordered_query = MagicMock()
-
-        mock_comp1 = MockDbComponent("R101", "resistor", "10k", 5, "link1", "link2")
-        mock_comp2 = MockDbComponent("C202", "capacitor", "1uF", 10)
-        mock_db_data = [mock_comp1, mock_comp2]
-
-        mock_ordered_query.all.return_value = mock_db_data
-        mock_query.order_by.return_value = mock_ordered_query
-        mock_session.query.return_value = mock_query
-        mock_get_session.return_value = mock_session
-
-        mock_df_instance = MagicMock()
-        mock_pd_dataframe.return_value = mock_df_instance
-
-        mock_excel_writer_instance = MagicMock()
-        mock_excel_writer_context = MagicMock()
-        mock_excel_writer_context.__enter__.return_value = mock_excel_writer_instance
-        import_export_logic.ExcelWriter.return_value = mock_excel_writer_context
+    @classmethod
+    def setUpClass(cls):
+        for backend_id in ("resistor", "capacitor", "led"):
+            ComponentFactory.register_component(
+                backend_id, create_component_class(backend_id.title(), backend_id, "Value"))
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://', connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.addCleanup(self.engine.dispose)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        for target in ('backend.import_export_logic.get_session', 'backend.inventory.get_session'):
+            patcher = patch(target, side_effect=lambda: self.Session())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def add_existing(self, part_number):
+        with self.Session() as session:
+            session.add(ComponentFactory.create_component("resistor", part_number=part_number, value="1",
+                                                          quantity=1))
+            session.commit()
+
+    def stored_components(self):
+        with self.Session() as session:
+            return session.query(Component).order_by(Component.part_number).all()
+
+    def add_component(self, part_number, component_type, value, quantity, purchase_link=None, datasheet_link=None,
+                      **extra):
+        with self.Session() as session:
+            component = ComponentFactory.create_component(
+                component_type, part_number=part_number, value=value, quantity=quantity,
+                purchase_link=purchase_link, datasheet_link=datasheet_link, **extra)
+            session.add(component)
+            session.commit()
+            return component.id
+
+    def test_export_columns_follow_the_model(self):
+        self.assertEqual(import_export_logic.EXPORT_COLUMNS, [
+            "Part Number", "Type", "Value", "Quantity", "Purchase Link", "Datasheet Link",
+            "Location", "Notes", "Image Path", "ID"])
+
+    def test_export_to_excel_success(self):
+        r_id = self.add_component("R101", "resistor", "10k", 5, "link1", "link2", location="Drawer A1")
+        c_id = self.add_component("C202", "capacitor", "1uF with a long description", 10)
+        filename = os.path.join(self.tmp_dir, "test_export.xlsx")
 
-        filename = "test_export.xlsx"
         result = import_export_logic.export_to_excel(filename)
 
         self.assertTrue(result)
-        mock_get_session.assert_called_once()
-        mock_session.query.assert_called_once_with(Component)
-        mock_query.order_by.assert_called_once_with(Component.part_number)
-        mock_ordered_query.all.assert_called_once()
-
-        expected_df_data = [
-            {"Part Number": "R101", "Type": "resistor", "Value": "10k", "Quantity": 5, "Purchase Link": "link1",
-             "Datasheet Link": "link2"},
-            {"Part Number": "C202", "Type": "capacitor", "Value": "1uF", "Quantity": 10, "Purchase Link": None,
-             "Datasheet Link": None},
-        ]
-        mock_pd_dataframe.assert_called_once_with(expected_df_data, columns=import_export_logic.EXCEL_COLUMNS)
-
-        import_export_logic.ExcelWriter.assert_called_once_with(filename, engine='openpyxl')
-        mock_df_instance.to_excel.assert_called_once_with(mock_excel_writer_instance, sheet_name='Inventory',
-                                                          index=False, header=True)
-        mock_session.close.assert_called_once()
+        sheet = load_workbook(filename)["Inventory"]
+        self.assertEqual([list(row) for row in sheet.iter_rows(values_only=True)], [
+            import_export_logic.EXPORT_COLUMNS,
+            ["C202", "capacitor", "1uF with a long description", 10, None, None, None, None, None, str(c_id)],
+            ["R101", "resistor", "10k", 5, "link1", "link2", "Drawer A1", None, None, str(r_id)],
+        ])
+        self.assertTrue(sheet["A1"].font.bold)
+        self.assertEqual(sheet.auto_filter.ref, "A1:J3")
+        self.assertAlmostEqual(sheet.column_dimensions["C"].width, (len("1uF with a long description") + 2) * 1.2)
+        self.assertAlmostEqual(sheet.column_dimensions["D"].width, (len("Quantity") + 2) * 1.2)
+        self.assertAlmostEqual(sheet.column_dimensions["J"].width, (36 + 2) * 1.2)
+
+    def test_export_to_excel_streams_and_reports_progress(self):
+        for i in range(5):
+            self.add_component(f"PN{i}", "resistor", "1k", i)
+        progress = []
+        with patch.object(import_export_logic, "EXPORT_CHUNK_SIZE", 2):
+            import_export_logic.export_to_excel(os.path.join(self.tmp_dir, "progress.xlsx"),
+                                                progress_callback=lambda *p: progress.append(p))
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+
+    def test_export_counts_and_widths_cover_only_the_shared_inventory(self):
+        self.add_component("R101", "resistor", "1k", 1, inventory_id="main")
+        self.add_component("R102", "resistor", "1k", 1, inventory_id="main")
+        self.add_component("C202", "capacitor", "a value far longer than any in the main inventory", 1,
+                           inventory_id="other")
+        progress = []
+        scoped = database._scoped_sessionmaker(self.engine, "main")
+        filename = os.path.join(self.tmp_dir, "shared.xlsx")
+        with patch('backend.import_export_logic.get_session', side_effect=lambda: scoped()):
+            import_export_logic.export_to_excel(filename, progress_callback=lambda *p: progress.append(p))
+        self.assertEqual(progress, [(2, 2)])
+        sheet = load_workbook(filename)["Inventory"]
+        self.assertEqual(sheet.max_row, 3)
+        self.assertAlmostEqual(sheet.column_dimensions["C"].width, (len("Value") + 2) * 1.2)
+
+    def test_export_round_trips_every_field_through_import(self):
+        self.add_component("R101", "resistor", "=10k, 1% tolerance", 5, "link1", "link2", location="Drawer A1",
+                           notes="  Hand-sorted.\nCheck the 2nd reel.  ", image_path="images/r101.png")
+        self.add_component("C202", "capacitor", "10uF", 0)
+        columns = [c.name for c in Component.__table__.columns]
+        before = [tuple(getattr(c, name) for name in columns) for c in self.stored_components()]
+
+        filename = os.path.join(self.tmp_dir, "round_trip.xlsx")
+        import_export_logic.export_to_excel(filename)
+        import_export_logic.import_from_excel(filename)
+
+        after = [tuple(getattr(c, name) for name in columns) for c in self.stored_components()]
+        self.assertEqual(after, before)
+
+    def test_import_accepts_column_names_as_headers(self):
+        filename = self.write_workbook({
+            "part_number": ["PN101"], "COMPONENT_TYPE": ["resistor"], "value": ["1k"], "Quantity": [3],
+            "location": ["Bin 4"], "Unrelated Column": ["ignored"]
+        })
+        import_export_logic.import_from_excel(filename)
+        stored = self.stored_components()
+        self.assertEqual([(c.part_number, c.location) for c in stored], [("PN101", "Bin 4")])
+
+    def test_import_rejects_invalid_id(self):
+        filename = self.write_workbook({
+            "Part Number": ["PN101"], "Type": ["resistor"], "Value": ["1k"], "Quantity": [3], "ID": ["nope"]
+        })
+        with self.assertRaisesRegex(InvalidInputError, "row 2.*Invalid ID 'nope'"):
+            import_export_logic.import_from_excel(filename)
 
     @patch('backend.import_export_logic.get_session')
     def test_export_to_excel_db_error(self, mock_get_session):
         mock_session = MagicMock()
-        mock_session.query.side_effect = Exception("DB connection failed")
+        mock_session.execute.side_effect = OperationalError("SELECT", {}, Exception("DB connection failed"))
         mock_get_session.return_value = mock_session
 
-        filename = "test_export_fail.xlsx"
+        filename = os.path.join(self.tmp_dir, "test_export_fail.xlsx")
         with self.assertRaisesRegex(DatabaseError, "Failed to fetch components for export"):
             import_export_logic.export_to_excel(filename)
 
         mock_session.close.assert_called_once()
+        self.assertFalse(os.path.exists(filename))
 
-    @patch('backend.import_export_logic.ExcelWriter')
-    @patch('backend.import_export_logic.pd.DataFrame')
-    @patch('backend.import_export_logic.get_session')
-    def test_export_to_excel_io_error(self, mock_get_session, mock_pd_dataframe, mock_excel_writer):
-        mock_session = MagicMock()
-        mock_get_session.return_value = mock_session
-        mock_ordered_query = MagicMock()
-        mock_ordered_query.all.return_value = [MockDbComponent("T1", "transistor", "2N2222", 1)]
-        mock_query = MagicMock()
-        mock_query.order_by.return_value = mock_ordered_query
-        mock_session.query.return_value = mock_query
-        mock_pd_dataframe.return_value = MagicMock()
-
-        mock_excel_writer.side_effect = IOError("Permission denied")
-
-        filename = "test_export_io_fail.xlsx"
+    def test_export_to_excel_io_error(self):
+        self.add_component("T1", "resistor", "2N2222", 1)
+        filename = os.path.join(self.tmp_dir, "missing_dir", "test_export_io_fail.xlsx")
         with self.assertRaisesRegex(IOError, "Failed to write Excel file"):
             import_export_logic.export_to_excel(filename)
 
-        mock_session.close.assert_called_once()
-
-    @patch('backend.import_export_logic.ComponentFactory.create_component')
-    @patch('backend.import_export_logic.get_session')
-    @patch('backend.import_export_logic.pd.read_excel')
-    def test_import_from_excel_success(self, mock_read_excel, mock_get_session, mock_create_component):
-        mock_data = {
+    def write_workbook(self, data: dict, name="import.xlsx"):
+        """Writes data ({header: [values]}) as the first sheet of a new workbook and returns its path."""
+        workbook = Workbook()
+        sheet = workbook.active
+        headers = list(data)
+        sheet.append(headers)
+        for row in zip(*(data[h] for h in headers)):
+            sheet.append(list(row))
+        path = os.path.join(self.tmp_dir, name)
+        workbook.save(path)
+        return path
+
+    def test_import_from_excel_success(self):
+        filename = self.write_workbook({
             "Part Number": ["PN101", "PN102", " PN103 "],
             "Type": ["Resistor", " capacitor ", "LED"],
             "Value": ["1k", "10uF", " 5mm Red "],
-            "Quantity": [50, 10, 100],
+            "Quantity": [50, 10.0, "100"],
             "Purchase Link": ["link1", None, " "],
             "Datasheet Link": [None, "link_ds_2", "link_ds_3"]
-        }
-        mock_df = pd.DataFrame(mock_data)
-        mock_read_excel.return_value = mock_df
+        })
+        self.add_existing("OLD1")
 
-        mock_session = MagicMock()
-        mock_get_session.return_value = mock_session
-
-        mock_create_component.side_effect = lambda **kwargs: MockCreatedComponent(**kwargs)
-
-        filename = "test_import.xlsx"
         result = import_export_logic.import_from_excel(filename)
 
         self.assertTrue(result)
-        mock_read_excel.assert_called_once_with(filename, engine='openpyxl')
-        mock_get_session.assert_called_once()
-        mock_session.query.assert_called_once_with(Component)
-        mock_session.query(Component).delete.assert_called_once()
-
-        self.assertEqual(mock_create_component.call_count, 3)
-        mock_create_component.assert_any_call(component_type='resistor', part_number='PN101', value='1k', quantity=50,
-                                              purchase_link='link1', datasheet_link=None)
-        mock_create_component.assert_any_call(component_type='capacitor', part_number='PN102', value='10uF',
-                                              quantity=10, purchase_link=None, datasheet_link='link_ds_2')
-        mock_create_component.assert_any_call(component_type='led', part_number='PN103', value='5mm Red', quantity=100,
-                                              purchase_link=None, datasheet_link='link_ds_3')
-
-        self.assertEqual(mock_session.add.call_count, 3)
-        mock_session.commit.assert_called_once()
-        mock_session.rollback.assert_not_called()
-        mock_session.close.assert_called_once()
-
-    @patch('backend.import_export_logic.pd.read_excel')
-    def test_import_from_excel_file_not_found(self, mock_read_excel):
-        mock_read_excel.side_effect = FileNotFoundError("File missing")
-        filename = "non_existent.xlsx"
+        imported = {c.part_number: c for c in self.stored_components()}
+        self.assertEqual(set(imported), {"PN101", "PN102", "PN103"})
+        self.assertEqual((imported["PN101"].component_type, imported["PN101"].value, imported["PN101"].quantity,
+                          imported["PN101"].purchase_link, imported["PN101"].datasheet_link),
+                         ("resistor", "1k", 50, "link1", None))
+        self.assertEqual((imported["PN102"].component_type, imported["PN102"].quantity,
+                          imported["PN102"].purchase_link, imported["PN102"].datasheet_link),
+                         ("capacitor", 10, None, "link_ds_2"))
+        self.assertEqual((imported["PN103"].component_type, imported["PN103"].value, imported["PN103"].quantity,
+                          imported["PN103"].purchase_link), ("led", "5mm Red", 100, None))
+
+    def test_import_from_excel_streams_in_chunks_and_reports_progress(self):
+        count = 25
+        filename = self.write_workbook({
+            "Part Number": [f"PN{i:03d}" for i in range(count)],
+            "Type": ["resistor"] * count,
+            "Value": ["1k"] * count,
+            "Quantity": list(range(count)),
+        })
+        progress = []
+        with patch('backend.import_export_logic.bulk_add_components',
+                   wraps=import_export_logic.bulk_add_components) as bulk_add:
+            import_export_logic.import_from_excel(filename, progress_callback=lambda *p: progress.append(p),
+                                                  chunk_size=10)
+
+        self.assertEqual([len(c.args[0]) for c in bulk_add.call_args_list], [10, 10, 5])
+        self.assertEqual(progress, [(10, 25), (20, 25), (25, 25)])
+        self.assertEqual(len(self.stored_components()), count)
+
+    def test_import_from_excel_skips_blank_rows(self):
+        filename = self.write_workbook({
+            "Part Number": ["PN101", None, "PN102"], "Type": ["Resistor", None, "Resistor"],
+            "Value": ["1k", " ", "2k"], "Quantity": [1, None, 2]
+        })
+        import_export_logic.import_from_excel(filename)
+        self.assertEqual([c.part_number for c in self.stored_components()], ["PN101", "PN102"])
+
+    def test_csv_export_round_trips_every_field_through_import(self):
+        self.add_component("PN001", "resistor", "10k", 5, location="Bin A1", notes="=10% tolerance\n")
+        self.add_component("PN002", "led", "Red", 0)
+        before = [(c.id, c.part_number, c.quantity, c.location, c.notes) for c in self.stored_components()]
+        filename = os.path.join(self.tmp_dir, "inventory.csv")
+
+        self.assertTrue(import_export_logic.export_inventory(filename))
+        summary = import_export_logic.import_inventory(filename, mode="merge")
+
+        self.assertEqual(summary["unchanged"], 2)
+        self.assertEqual([(c.id, c.part_number, c.quantity, c.location, c.notes) for c in self.stored_components()],
+                         before)
+
+    def test_csv_export_keeps_formula_like_text_from_running_in_excel(self):
+        self.add_component("PN001", "resistor", "=10% tolerance", 5, location="-40 C shelf", notes="'=kept")
+        filename = os.path.join(self.tmp_dir, "inventory.csv")
+
+        import_export_logic.export_inventory(filename)
+        with open(filename, encoding="utf-8-sig", newline="") as f:
+            row = next(row for row in csv.reader(f) if row[0] == "PN001")
+        self.assertIn("'=10% tolerance", row)
+        self.assertIn("'-40 C shelf", row)
+        self.assertIn("''=kept", row)
+
+        self.assertEqual(import_export_logic.import_inventory(filename, mode="merge")["unchanged"], 1)
+        self.assertEqual(self.stored_components()[0].value, "=10% tolerance")
+
+    def test_xlsm_files_can_be_imported_but_not_exported(self):
+        self.assertIs(file_formats.format_for_filename("inventory.xlsm"), file_formats.EXCEL)
+        self.assertNotIn(".xlsm", file_formats.EXCEL.file_filter)
+        with self.assertRaisesRegex(InvalidInputError, "Unsupported file type '.xlsm'"):
+            import_export_logic.export_inventory(os.path.join(self.tmp_dir, "inventory.xlsm"))
+
+    def test_csv_import_reports_invalid_rows(self):
+        filename = os.path.join(self.tmp_dir, "bad.csv")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write("Part Number,Type,Value,Quantity\nPN101,Resistor,1k,many\n")
+        with self.assertRaisesRegex(InvalidInputError, "row 2"):
+            import_export_logic.import_inventory(filename)
+
+    @unittest.skipUnless(file_formats.pq, "pyarrow is not installed")
+    def test_parquet_export_round_trips_through_import(self):
+        self.add_component("PN001", "resistor", "10k", 5, notes="note")
+        filename = os.path.join(self.tmp_dir, "inventory.parquet")
+
+        import_export_logic.export_inventory(filename)
+        self.assertEqual(file_formats.pq.read_schema(filename).field("Quantity").type, file_formats.pa.int64())
+        summary = import_export_logic.import_inventory(filename, mode="merge")
+
+        self.assertEqual(summary["unchanged"], 1)
+
+    def test_unsupported_extension_is_rejected(self):
+        with self.assertRaisesRegex(InvalidInputError, "Unsupported file type '.txt'"):
+            import_export_logic.export_inventory(os.path.join(self.tmp_dir, "inventory.txt"))
+
+    def test_unavailable_format_names_the_missing_package(self):
+        with patch.object(file_formats.ParquetFormat, "is_available", return_value=False):
+            self.assertNotIn(file_formats.PARQUET, file_formats.available_formats())
+            with self.assertRaisesRegex(InvalidInputError, "pyarrow"):
+                file_formats.format_for_filename("inventory.parquet")
+
+    def test_validate_import_reports_every_invalid_row(self):
+        filename = self.write_workbook({
+            "Part Number": ["PN1", "PN2", "PN3", "PN1"], "Type": ["Resistor", "Diode", "Resistor", "Resistor"],
+            "Value": ["1k", "2k", None, "1k"], "Quantity": [1, -2, 3, 1]
+        })
+        report = import_export_logic.validate_import(filename, workers=1)
+        self.assertEqual([(issue.row, issue.column) for issue in report.issues],
+                         [(3, "Type"), (3, "Quantity"), (4, "Value"), (5, "Part Number")])
+        self.assertEqual((report.rows_checked, report.valid_rows), (4, 1))
+        self.assertEqual(self.stored_components(), [])
+
+    def test_import_can_skip_invalid_rows(self):
+        self.add_existing("PN2")
+        self.add_existing("GONE")
+        filename = self.write_workbook({
+            "Part Number": ["PN1", "PN2", "PN1"], "Type": ["Resistor", "Resistor", "Resistor"],
+            "Value": ["1k", "2k", "3k"], "Quantity": [1, "lots", 1]
+        })
+        summary = import_export_logic.import_inventory(filename, mode="merge", skip_invalid=True)
+        self.assertEqual(summary, {"inserted": 1, "updated": 0, "deleted": 1, "unchanged": 0, "skipped": 2})
+        # The invalid PN2 row is left out but still keeps the stored PN2 from being deleted
+        self.assertEqual([(c.part_number, c.value) for c in self.stored_components()], [("PN1", "1k"), ("PN2", "1")])
+
+    def test_rows_skipped_after_the_last_chunk_are_not_deleted(self):
+        for part_number in ("A", "B", "C"):
+            self.add_existing(part_number)
+        filename = self.write_workbook({
+            "Part Number": ["A", "B", "C"], "Type": ["Resistor"] * 3, "Value": ["1k"] * 3, "Quantity": [1, 1, -5]
+        })
+        summary = import_export_logic.import_inventory(filename, chunk_size=2, mode="merge", skip_invalid=True)
+
+        self.assertEqual((summary["deleted"], summary["skipped"]), (0, 1))
+        self.assertEqual([c.part_number for c in self.stored_components()], ["A", "B", "C"])
+
+    def test_cancelled_import_rolls_back(self):
+        self.add_existing("OLD1")
+        filename = self.write_workbook({
+            "Part Number": ["PN1", "PN2", "PN3"], "Type": ["Resistor"] * 3, "Value": ["1k"] * 3, "Quantity": [1] * 3
+        })
+
+        def cancel_after_first_chunk(rows_done, rows_total):
+            if rows_done >= 1:
+                raise OperationCancelledError()
+
+        with self.assertRaises(OperationCancelledError):
+            import_export_logic.import_inventory(filename, progress_callback=cancel_after_first_chunk, chunk_size=1)
+        self.assertEqual([c.part_number for c in self.stored_components()], ["OLD1"])
+
+    def test_cancelled_export_removes_the_partial_file(self):
+        self.add_component("PN001", "resistor", "10k", 5)
+        filename = os.path.join(self.tmp_dir, "cancelled.csv")
+
+        def cancel(rows_done, rows_total):
+            raise OperationCancelledError()
+
+        with self.assertRaises(OperationCancelledError):
+            import_export_logic.export_inventory(filename, progress_callback=cancel)
+        self.assertFalse(os.path.exists(filename))
+
+    def test_import_from_excel_file_not_found(self):
+        filename = os.path.join(self.tmp_dir, "non_existent.xlsx")
         with self.assertRaisesRegex(FileNotFoundError, "Import file not found"):
             import_export_logic.import_from_excel(filename)
 
-    @patch('backend.import_export_logic.pd.read_excel')
-    def test_import_from_excel_read_error(self, mock_read_excel):
-        mock_read_excel.side_effect = Exception("Cannot parse file")
-        filename = "corrupted.xlsx"
+    def test_import_from_excel_read_error(self):
+        filename = os.path.join(self.tmp_dir, "corrupted.xlsx")
+        with open(filename, "w") as f:
+            f.write("not a workbook")
         with self.assertRaisesRegex(InvalidInputError, "Failed to read or parse Excel file"):
             import_export_logic.import_from_excel(filename)
 
-    @patch('backend.import_export_logic.pd.read_excel')
-    def test_import_from_excel_missing_column(self, mock_read_excel):
-        mock_data = {
+    def test_import_from_excel_missing_column(self):
+        filename = self.write_workbook({
             "Part Number": ["PN101"],
             "Type": ["Resistor"],
             "Quantity": [50]
-        }
-        mock_df = pd.DataFrame(mock_data)
-        mock_read_excel.return_value = mock_df
-        filename = "missing_col.xlsx"
+        })
         with self.assertRaisesRegex(InvalidInputError, "missing required columns: Value"):
             import_export_logic.import_from_excel(filename)
 
-    @patch('backend.import_export_logic.pd.read_excel')
-    def test_import_from_excel_invalid_row_data(self, mock_read_excel):
-        mock_data = {
+    def test_import_from_excel_invalid_row_data(self):
+        filename = self.write_workbook({
             "Part Number": ["PN101"], "Type": ["Resistor"], "Value": ["1k"], "Quantity": [-5]
-        }
-        mock_df = pd.DataFrame(mock_data)
-        mock_read_excel.return_value = mock_df
-        filename = "invalid_row.xlsx"
+        })
+        self.add_existing("OLD1")
         with self.assertRaisesRegex(InvalidInputError, "Invalid data found in row 2.*Quantity cannot be negative"):
             import_export_logic.import_from_excel(filename)
+        self.assertEqual([c.part_number for c in self.stored_components()], ["OLD1"])
 
-    @patch('backend.import_export_logic.ComponentFactory.create_component')
-    @patch('backend.import_export_logic.get_session')
-    @patch('backend.import_export_logic.pd.read_excel')
-    def test_import_from_excel_component_creation_error(self, mock_read_excel, mock_get_session, mock_create_component):
-        mock_data = {
-            "Part Number": ["PN101"], "Type": ["UnknownType"], "Value": ["1"], "Quantity": [1]
-        }
-        mock_df = pd.DataFrame(mock_data)
-        mock_read_excel.return_value = mock_df
-        mock_session = MagicMock()
-        mock_get_session.return_value = mock_session
-        mock_create_component.side_effect = ValueError("Invalid type")
+    def test_import_from_excel_component_creation_error(self):
+        filename = self.write_workbook({
+            "Part Number": ["PN101", "PN102"], "Type": ["Resistor", "UnknownType"], "Value": ["1", "2"],
+            "Quantity": [1, 1]
+        })
+        self.add_existing("OLD1")
+
+        with self.assertRaisesRegex(ComponentError, "row 3.*Unknown component type 'unknowntype'"):
+            import_export_logic.import_from_excel(filename, chunk_size=1)
+
+        self.assertEqual([c.part_number for c in self.stored_components()], ["OLD1"])
 
-        filename = "invalid_comp_type.xlsx"
-        with self.assertRaisesRegex(ComponentError, "Failed to create component for Part Number 'PN101'"):
+    def test_import_from_excel_duplicate_part_numbers(self):
+        filename = self.write_workbook({
+            "Part Number": ["PN101", "PN101"], "Type": ["Resistor", "Resistor"], "Value": ["1k", "2k"],
+            "Quantity": [1, 2]
+        })
+        self.add_existing("OLD1")
+
+        with self.assertRaisesRegex(ComponentError, "row 3.*'PN101' appears more than once"):
             import_export_logic.import_from_excel(filename)
 
-        mock_session.query(Component).delete.assert_called_once()
-        mock_session.add.assert_not_called()
-        mock_session.commit.assert_not_called()
-        mock_session.rollback.assert_called_once()
-        mock_session.close.assert_called_once()
+        self.assertEqual([c.part_number for c in self.stored_components()], ["OLD1"])
+
+    def test_import_replace_returns_summary(self):
+        self.add_existing("OLD1")
+        filename = self.write_workbook({"Part Number": ["PN1"], "Type": ["resistor"], "Value": ["1k"], "Quantity": [1]})
+        summary = import_export_logic.import_from_excel(filename)
+        self.assertEqual(summary, {"inserted": 1, "updated": 0, "deleted": 1, "unchanged": 0, "skipped": 0})
+
+    def test_import_merge_applies_only_the_differences(self):
+        keep_id = self.add_component("KEEP", "resistor", "1k", 1, location="Bin 1", image_path="images/keep.png")
+        change_id = self.add_component("CHANGE", "resistor", "2k", 2, location="Bin 2", notes="Keep my notes")
+        self.add_component("GONE", "resistor", "3k", 3)
+        filename = self.write_workbook({
+            "Part Number": ["KEEP", "CHANGE", "NEW"],
+            "Type": ["resistor", "resistor", "capacitor"],
+            "Value": ["1k", "2k2", "10uF"],
+            "Quantity": [1, 5, 7],
+            "Location": ["Bin 1", "Bin 2", "Bin 3"],
+        })
+
+        with patch('backend.import_export_logic.bulk_add_components',
+                   wraps=import_export_logic.bulk_add_components) as bulk_add:
+            summary = import_export_logic.import_from_excel(filename, mode="merge")
+
+        self.assertEqual(summary, {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": 1, "skipped": 0})
+        self.assertEqual([row["part_number"] for row in bulk_add.call_args.args[0]], ["NEW"])
+        stored = {c.part_number: c for c in self.stored_components()}
+        self.assertEqual(set(stored), {"KEEP", "CHANGE", "NEW"})
+        self.assertEqual((stored["KEEP"].id, stored["KEEP"].image_path), (keep_id, "images/keep.png"))
+        self.assertEqual((stored["CHANGE"].id, stored["CHANGE"].value, stored["CHANGE"].quantity,
+                          stored["CHANGE"].notes), (change_id, "2k2", 5, "Keep my notes"))
+        self.assertEqual((stored["NEW"].component_type, stored["NEW"].location), ("capacitor", "Bin 3"))
+
+    def test_import_merge_can_keep_missing_components(self):
+        self.add_existing("OLD1")
+        filename = self.write_workbook({"Part Number": ["PN1"], "Type": ["resistor"], "Value": ["1k"], "Quantity": [1]})
+        summary = import_export_logic.import_from_excel(filename, mode="merge", delete_missing=False, chunk_size=1)
+        self.assertEqual(summary, {"inserted": 1, "updated": 0, "deleted": 0, "unchanged": 0, "skipped": 0})
+        self.assertEqual([c.part_number for c in self.stored_components()], ["OLD1", "PN1"])
+
+    def test_import_merge_of_own_export_changes_nothing(self):
+        for i in range(5):
+            self.add_component(f"PN{i}", "resistor", "1k", i, notes=f"note {i}")
+        filename = os.path.join(self.tmp_dir, "sync.xlsx")
+        import_export_logic.export_to_excel(filename)
+        summary = import_export_logic.import_from_excel(filename, mode="merge", chunk_size=2)
+        self.assertEqual(summary, {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 5, "skipped": 0})
+
+    def test_import_merge_error_rolls_back(self):
+        self.add_existing("OLD1")
+        filename = self.write_workbook({
+            "Part Number": ["OLD1", "PN2"], "Type": ["resistor", "resistor"], "Value": ["9", "1k"],
+            "Quantity": [1, -1]
+        })
+        with self.assertRaises(InvalidInputError):
+            import_export_logic.import_from_excel(filename, mode="merge", chunk_size=1)
+        self.assertEqual([(c.part_number, c.value) for c in self.stored_components()], [("OLD1", "1")])
+        with self.assertRaises(InvalidInputError):
+            import_export_logic.import_from_excel(filename, mode="upsert")
 
-    @patch('backend.import_export_logic.ComponentFactory.create_component')
     @patch('backend.import_export_logic.get_session')
-    @patch('backend.import_export_logic.pd.read_excel')
-    def test_import_from_excel_db_commit_error(self, mock_read_excel, mock_get_session, mock_create_component):
-        mock_data = {
+    def test_import_from_excel_db_commit_error(self, mock_get_session):
+        filename = self.write_workbook({
             "Part Number": ["PN101"], "Type": ["Resistor"], "Value": ["1k"], "Quantity": [50]
-        }
-        mock_df = pd.DataFrame(mock_data)
-        mock_read_excel.return_value = mock_df
+        })
 
         mock_session = MagicMock()
         mock_session.commit.side_effect = Exception("DB commit failed")
+        mock_session.execute.return_value.scalars.return_value = []
         mock_get_session.return_value = mock_session
-        mock_create_component.return_value = MockCreatedComponent()
 
-        filename = "db_commit_fail.xlsx"
         with self.assertRaisesRegex(DatabaseError, "Database error during import"):
             import_export_logic.import_from_excel(filename)
 
         mock_session.query(Component).delete.assert_called_once()
-        mock_session.add.assert_called_once()
         mock_session.commit.assert_called_once()
         mock_session.rollback.assert_called_once()
         mock_session.close.assert_called_once()
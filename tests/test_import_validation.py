@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import patch
+
+from backend import import_validation
+from backend.import_validation import RowChecker, ValidationIssue, validate_rows
+
+COLUMNS = ("part_number", "component_type", "value", "quantity")
+
+
+def make_checker():
+    return RowChecker(
+        column_index={field: index for index, field in enumerate(COLUMNS)},
+        column_names={"part_number": "Part Number", "component_type": "Type", "value": "Value",
+                      "quantity": "Quantity"},
+        type_properties={"resistor": ["Resistance (Ω)", "Tolerance (%)"], "led": []},
+    )
+
+
+class TestRowChecker(unittest.TestCase):
+
+    def test_reports_every_problem_in_a_row(self):
+        component_data, problems = make_checker().check(("", "Diode", None, -1))
+        self.assertIsNone(component_data)
+        self.assertEqual(problems, [
+            ("part_number", "Part Number cannot be empty."),
+            ("component_type", "Unknown component type 'diode'."),
+            ("value", "Value cannot be empty."),
+            ("quantity", "Quantity cannot be negative."),
+        ])
+
+    def test_checks_values_against_the_type_properties(self):
+        checker = make_checker()
+        self.assertEqual(checker.check(("R1", "Resistor", "Resistance (Ω): 10k, Tolerance: 5", 1))[1], [])
+        self.assertEqual(checker.check(("R2", "Resistor", "10k", 1))[1], [])
+        self.assertEqual(checker.check(("L1", "LED", "Color: Red", 1))[1], [])
+        self.assertEqual(checker.check(("R3", "Resistor", "Resistance (Ω): 10k, Power: 1W", 1))[1],
+                         [("value", "Unknown property 'Power'. Expected: Resistance (Ω), Tolerance (%).")])
+        self.assertEqual(checker.check(("R4", "Resistor", "Resistance (Ω): ", 1))[1],
+                         [("value", "Property 'Resistance (Ω)' has no value.")])
+
+
+class TestValidateRows(unittest.TestCase):
+
+    def rows(self, count):
+        rows = [(f"R{i}", "resistor", "10k", i) for i in range(count)]
+        rows[3] = ("R3", "resistor", "10k", "many")
+        rows[7] = ("R1", "resistor", "10k", 1)
+        rows[8] = (None, None, None, None)
+        return rows
+
+    def test_collects_all_issues_in_row_order(self):
+        progress = []
+        report = validate_rows(self.rows(10), make_checker(), chunk_size=4, workers=1,
+                               progress_callback=lambda *p: progress.append(p))
+        self.assertEqual(report.issues, [
+            ValidationIssue(5, "Quantity", "Invalid quantity 'many'."),
+            ValidationIssue(9, "Part Number", "Part number 'R1' appears more than once (first in row 3)."),
+        ])
+        self.assertEqual(report.rows_checked, 9)
+        self.assertEqual(report.valid_rows, 7)
+        self.assertEqual(progress, [(4, 4), (8, 8), (10, 10)])
+
+    def test_large_files_are_checked_in_worker_processes(self):
+        with patch.object(import_validation, "PARALLEL_VALIDATION_MIN_ROWS", 4), \
+                patch.object(import_validation, "ProcessPoolExecutor",
+                             wraps=import_validation.ProcessPoolExecutor) as pool:
+            report = validate_rows(self.rows(40), make_checker(), chunk_size=4, workers=2)
+        pool.assert_called_once_with(max_workers=2)
+        self.assertEqual(report, validate_rows(self.rows(40), make_checker(), chunk_size=4, workers=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,16 @@ import unittest
 import uuid
 from unittest.mock import patch, MagicMock
 
-from backend import inventory
-from backend.models import Component
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import inventory, search_index, property_index
+from backend.models import Base, Component, ComponentSummary, create_component_class
+from backend.component_factory import ComponentFactory
 from backend.exceptions import (
     InvalidInputError, InvalidQuantityError, ComponentNotFoundError, StockError,
-    DatabaseError
+    DatabaseError, DuplicateComponentError
 )
 
 
@@ -282,26 +287,27 @@ class TestInventory(unittest.TestCase):
     def test_get_all_components_success(self, mock_get_session):
         mock_session = MagicMock()
         mock_get_session.return_value = mock_session
-        mock_components_list = [self.mock_comp1, self.mock_comp2]
-
-        mock_session.query.return_value.order_by.return_value.all.return_value = mock_components_list
+        row = (uuid.uuid4(), "R1", "resistor", "Resistance (Ω): 100", 10, None, None, "Drawer A1", None, None)
+        mock_session.execute.return_value = [row]
 
         result = inventory.get_all_components()
 
-        mock_session.query.assert_called_once_with(Component)
-        mock_session.query.return_value.order_by.assert_called_once()
+        mock_session.query.assert_not_called()
+        mock_session.execute.assert_called_once()
         mock_session.close.assert_called_once()
-        self.assertEqual(result, mock_components_list)
+        self.assertEqual(len(result), 1)
+        self.assertIsInstance(result[0], ComponentSummary)
+        self.assertEqual((result[0].id, result[0].part_number, result[0].location), (row[0], "R1", "Drawer A1"))
+        self.assertFalse(hasattr(result[0], "notes"))
 
     @patch('backend.inventory.get_session')
     def test_get_all_components_empty(self, mock_get_session):
         mock_session = MagicMock()
         mock_get_session.return_value = mock_session
-        mock_session.query.return_value.order_by.return_value.all.return_value = []
+        mock_session.execute.return_value = []
 
         result = inventory.get_all_components()
 
-        mock_session.query.assert_called_once_with(Component)
         mock_session.close.assert_called_once()
         self.assertEqual(result, [])
 
@@ -309,7 +315,7 @@ class TestInventory(unittest.TestCase):
     def test_get_all_components_database_error(self, mock_get_session):
         mock_session = MagicMock()
         mock_get_session.return_value = mock_session
-        mock_session.query.return_value.order_by.return_value.all.side_effect = Exception("DB Read All Error")
+        mock_session.execute.side_effect = Exception("DB Read All Error")
 
         with self.assertRaisesRegex(DatabaseError, "Error while fetching all components: DB Read All Error"):
             inventory.get_all_components()
@@ -472,5 +478,291 @@ class TestInventory(unittest.TestCase):
         mock_session.close.assert_called_once()
 
 
+class TestSearchComponents(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        for backend_id in ("resistor", "capacitor"):
+            ComponentFactory.register_component(
+                backend_id, create_component_class(backend_id.title(), backend_id, "Value"))
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://', connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        patcher = patch('backend.inventory.get_session', side_effect=lambda: self.Session())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.engine.dispose)
+
+        inventory.add_component("R-4K7", "resistor", "Resistance (Ω): 4700", 100, None, None, "Drawer A1", None)
+        inventory.add_component("R-10K", "resistor", "Resistance (Ω): 10000", 5, None, None, "Bin C4", None)
+        inventory.add_component("C-100N", "capacitor", "Capacitance (µF): 0.1", 40, None, None, "Drawer A2", None)
+
+    def test_search_without_filters_returns_all_sorted_by_part_number(self):
+        result = inventory.search_components()
+        self.assertEqual([c.part_number for c in result], ["C-100N", "R-10K", "R-4K7"])
+
+    def test_search_term_matches_part_number_value_and_location_case_insensitive(self):
+        self.assertEqual([c.part_number for c in inventory.search_components("r-4k")], ["R-4K7"])
+        self.assertEqual([c.part_number for c in inventory.search_components("10000")], ["R-10K"])
+        self.assertEqual([c.part_number for c in inventory.search_components("drawer")], ["C-100N", "R-4K7"])
+
+    def test_search_term_escapes_like_wildcards(self):
+        self.assertEqual(inventory.search_components("%"), [])
+        self.assertEqual(inventory.search_components("_"), [])
+
+    def test_search_by_type(self):
+        result = inventory.search_components(backend_type="resistor")
+        self.assertEqual([c.part_number for c in result], ["R-10K", "R-4K7"])
+        result = inventory.search_components("drawer", backend_type="resistor")
+        self.assertEqual([c.part_number for c in result], ["R-4K7"])
+
+    def test_search_order_limit_and_offset(self):
+        result = inventory.search_components(order_by="quantity", descending=True)
+        self.assertEqual([c.quantity for c in result], [100, 40, 5])
+        result = inventory.search_components(order_by="quantity", limit=1, offset=1)
+        self.assertEqual([c.part_number for c in result], ["C-100N"])
+
+    def test_search_lists_summaries_and_loads_full_component_by_id(self):
+        component_id = inventory.get_components_by_part_number("R-4K7")[0].id
+        inventory.update_component(component_id, {"notes": "Reel of 5000", "image_path": "assets/r.png"})
+
+        listed = next(c for c in inventory.search_components() if c.id == component_id)
+
+        self.assertIsInstance(listed, ComponentSummary)
+        self.assertEqual((listed.part_number, listed.quantity, listed.image_path), ("R-4K7", 100, "assets/r.png"))
+        self.assertFalse(hasattr(listed, "notes"))
+        self.assertEqual(inventory.get_component_by_id(component_id).notes, "Reel of 5000")
+
+    def test_component_matches_search(self):
+        component = inventory.get_components_by_part_number("R-4K7")[0]
+        self.assertTrue(inventory.component_matches_search(component.id))
+        self.assertTrue(inventory.component_matches_search(component.id, "drawer", "resistor"))
+        self.assertFalse(inventory.component_matches_search(component.id, "drawer", "capacitor"))
+        self.assertFalse(inventory.component_matches_search(component.id, "bin"))
+
+    def test_search_rejects_unknown_sort_column(self):
+        with self.assertRaises(InvalidInputError):
+            inventory.search_components(order_by="notes")
+
+
+class TestFullTextSearch(TestSearchComponents):
+
+    def setUp(self):
+        super().setUp()
+        # Index created over existing rows must be populated; rows added afterwards go through the triggers
+        self.assertTrue(search_index.ensure_search_index(self.engine))
+        inventory.add_component("L-22U", "resistor", "Inductance (H): 0.000022", 3, None, None, "Shelf B2",
+                                "Shielded power inductor")
+        inventory.delete_component_permanently(inventory.get_components_by_part_number("L-22U")[0].id)
+        inventory.add_component("C-47U", "capacitor", "Capacitance (µF): 47", 8, None, None, "Shelf B2",
+                                "Low ESR electrolytic")
+
+    def test_search_without_filters_returns_all_sorted_by_part_number(self):
+        result = inventory.search_components()
+        self.assertEqual([c.part_number for c in result], ["C-100N", "C-47U", "R-10K", "R-4K7"])
+
+    def test_search_term_matches_substrings_not_only_token_prefixes(self):
+        self.assertEqual([c.part_number for c in inventory.search_components("700")], ["R-4K7"])
+        self.assertEqual([c.part_number for c in inventory.search_components("K7")], ["R-4K7"])
+        self.assertEqual([c.part_number for c in inventory.search_components("rawer")], ["C-100N", "R-4K7"])
+
+    def test_search_term_tokens_are_looked_up_in_the_index_including_notes(self):
+        component = inventory.get_components_by_part_number("C-47U")[0]
+        with patch.object(inventory, "_escape_like", side_effect=AssertionError("scanned with LIKE")):
+            self.assertEqual([c.part_number for c in inventory.search_components("low esr")], ["C-47U"])
+            self.assertTrue(inventory.component_matches_search(component.id, "electro", "capacitor"))
+        self.assertEqual(inventory.search_components("shielded"), [])
+
+    def test_search_order_limit_and_offset(self):
+        result = inventory.search_components(order_by="quantity", descending=True)
+        self.assertEqual([c.quantity for c in result], [100, 40, 8, 5])
+        result = inventory.search_components(order_by="quantity", limit=1, offset=1)
+        self.assertEqual([c.part_number for c in result], ["C-47U"])
+
+    def test_notes_are_indexed_and_deleted_rows_are_gone(self):
+        self.assertEqual([c.part_number for c in inventory.full_text_search("electrolytic")], ["C-47U"])
+        self.assertEqual(inventory.full_text_search("shielded"), [])
+
+    def test_updates_are_reindexed(self):
+        component = inventory.get_components_by_part_number("R-10K")[0]
+        inventory.update_component(component.id, {"location": "Reel 9"})
+        self.assertEqual([c.part_number for c in inventory.full_text_search("reel")], ["R-10K"])
+        self.assertEqual(inventory.full_text_search("bin"), [])
+
+    def test_full_text_search_prefix_and_token_modes(self):
+        self.assertEqual([c.part_number for c in inventory.full_text_search("resist 470")], ["R-4K7"])
+        self.assertEqual(inventory.full_text_search("resist", prefix=False), [])
+        self.assertEqual(len(inventory.full_text_search("resistance", prefix=False)), 2)
+        self.assertEqual(inventory.full_text_search("  ()  "), [])
+
+    def test_index_survives_vacuum(self):
+        # VACUUM renumbers the implicit rowids of components; the index is keyed on search keys instead
+        inventory.delete_component_permanently(inventory.get_components_by_part_number("R-4K7")[0].id)
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+        self.assertEqual([c.part_number for c in inventory.full_text_search("drawer")], ["C-100N"])
+        self.assertEqual([c.part_number for c in inventory.full_text_search("electrolytic")], ["C-47U"])
+
+    def test_rebuild_restores_out_of_sync_index(self):
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(f"INSERT INTO {search_index.FTS_TABLE_NAME}({search_index.FTS_TABLE_NAME}) "
+                                 "VALUES ('delete-all')")
+        self.assertEqual(inventory.full_text_search("drawer"), [])
+        search_index.rebuild_search_index(self.engine)
+        self.assertEqual(sorted(c.part_number for c in inventory.full_text_search("drawer")), ["C-100N", "R-4K7"])
+
+
+class TestBulkAddComponents(unittest.TestCase):
+
+    setUpClass = TestSearchComponents.setUpClass
+    setUp = TestSearchComponents.setUp
+
+    def rows(self, *part_numbers, quantity=1):
+        return [{"part_number": pn, "component_type": "Resistor", "value": "1k", "quantity": quantity,
+                 "purchase_link": "", "location": "Tray 9"} for pn in part_numbers]
+
+    def test_inserts_all_rows_in_one_statement(self):
+        counts = inventory.bulk_add_components(self.rows("R-1", "R-2", "R-3"))
+        self.assertEqual(counts, {"inserted": 3, "updated": 0, "skipped": 0})
+        added = inventory.get_components_by_part_number("R-2")[0]
+        self.assertEqual(added.component_type, "resistor")
+        self.assertIsNone(added.purchase_link)
+        self.assertIsInstance(added.id, uuid.UUID)
+        self.assertEqual([c.part_number for c in inventory.search_components("tray")], ["R-1", "R-2", "R-3"])
+
+    def test_error_mode_rejects_existing_part_numbers_and_writes_nothing(self):
+        with self.assertRaisesRegex(DuplicateComponentError, "R-4K7"):
+            inventory.bulk_add_components(self.rows("R-NEW", "R-4K7"))
+        self.assertEqual(inventory.get_components_by_part_number("R-NEW"), [])
+        with self.assertRaises(DuplicateComponentError):
+            inventory.bulk_add_components(self.rows("R-X", "R-X"))
+
+    def test_skip_mode_keeps_existing_and_first_occurrence(self):
+        counts = inventory.bulk_add_components(self.rows("R-4K7", "R-X", "R-X"), on_conflict="skip")
+        self.assertEqual(counts, {"inserted": 1, "updated": 0, "skipped": 2})
+        self.assertEqual(inventory.get_components_by_part_number("R-4K7")[0].quantity, 100)
+
+    def test_replace_mode_updates_existing_rows_in_place(self):
+        original_id = inventory.get_components_by_part_number("R-4K7")[0].id
+        counts = inventory.bulk_add_components(self.rows("R-4K7", "R-Y", quantity=7), on_conflict="replace")
+        self.assertEqual(counts, {"inserted": 1, "updated": 1, "skipped": 0})
+        replaced = inventory.get_components_by_part_number("R-4K7")[0]
+        self.assertEqual((replaced.id, replaced.quantity, replaced.location), (original_id, 7, "Tray 9"))
+
+    def test_invalid_rows_are_rejected_before_writing(self):
+        bad_rows = [
+            {"part_number": "", "component_type": "resistor", "value": "1", "quantity": 1},
+            {"part_number": "X", "component_type": "flux_capacitor", "value": "1", "quantity": 1},
+            {"part_number": "X", "component_type": "resistor", "value": "1", "quantity": -1},
+            {"part_number": "X", "component_type": "resistor", "value": "1", "quantity": 1, "colour": "red"},
+        ]
+        for row in bad_rows:
+            with self.assertRaises(InvalidInputError if row["quantity"] >= 0 else InvalidQuantityError):
+                inventory.bulk_add_components(self.rows("R-OK") + [row])
+        self.assertEqual(inventory.get_components_by_part_number("R-OK"), [])
+        with self.assertRaises(InvalidInputError):
+            inventory.bulk_add_components([], on_conflict="merge")
+
+
+class TestPropertyIndex(unittest.TestCase):
+
+    setUpClass = TestSearchComponents.setUpClass
+
+    def setUp(self):
+        TestSearchComponents.setUp(self)
+        # Index created over existing rows must be populated; rows added afterwards go through the triggers
+        with self.engine.begin() as conn:
+            property_index.rebuild_property_index(conn)
+        inventory.add_component("R-1K", "resistor", "Resistance (Ω): 1000, Tolerance (%): 1", 20, None, None,
+                                None, None)
+
+    def properties(self, part_number):
+        return inventory.get_component_properties(inventory.get_components_by_part_number(part_number)[0].id)
+
+    def test_values_are_split_into_properties(self):
+        self.assertEqual(self.properties("R-4K7"), {"Resistance (Ω)": "4700"})
+        self.assertEqual(list(self.properties("R-1K").items()), [("Resistance (Ω)", "1000"), ("Tolerance (%)", "1")])
+
+    def test_search_by_property_value(self):
+        result = inventory.search_components(properties={"Resistance (Ω)": "1000"})
+        self.assertEqual([c.part_number for c in result], ["R-1K"])
+        self.assertEqual(inventory.search_components(properties={"Resistance (Ω)": "1000", "Tolerance (%)": "5"}), [])
+        component = result[0]
+        self.assertTrue(inventory.component_matches_search(component.id, properties={"Tolerance (%)": "1"}))
+
+    def test_updates_and_deletes_keep_properties_in_step(self):
+        component = inventory.get_components_by_part_number("R-1K")[0]
+        inventory.update_component(component.id, {"value": "Resistance (Ω): 1000, Tolerance (%): 5"})
+        self.assertEqual(self.properties("R-1K")["Tolerance (%)"], "5")
+        inventory.bulk_add_components([{"part_number": "R-1K", "component_type": "resistor", "value": "1k",
+                                        "quantity": 1}], on_conflict="replace")
+        self.assertEqual(self.properties("R-1K"), {})
+        inventory.delete_component_permanently(component.id)
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(property_index.property_table.select().where(
+                property_index.property_table.c.component_id == component.id)).all(), [])
+
+    def test_index_splits_like_parse_properties(self):
+        values = ["1k", "Pins: 8, Package: DIP, Pins: 14", 'Note: say "hi" \\ ok', "Size:, : 4, Colour: red\ngreen"]
+        inventory.bulk_add_components([{"part_number": f"X-{i}", "component_type": "resistor", "value": value,
+                                        "quantity": 1} for i, value in enumerate(values)])
+        for i, value in enumerate(values):
+            self.assertEqual(self.properties(f"X-{i}"), property_index.parse_properties(value.replace("\n", " ")))
+        self.assertEqual(self.properties("X-1"), {"Pins": "8", "Package": "DIP"})
+
+    def test_range_filters_compare_numbers_with_unit_prefixes(self):
+        inventory.bulk_add_components([
+            {"part_number": "R-4K7B", "component_type": "resistor", "value": "Resistance (Ω): 4.7k, Tolerance (%): 1",
+             "quantity": 1},
+            {"part_number": "R-1M", "component_type": "resistor", "value": "Resistance (Ω): 1 MΩ", "quantity": 1},
+            {"part_number": "C-100N-B", "component_type": "capacitor", "value": "Capacitance (µF): 100n",
+             "quantity": 1},
+        ])
+        Range = property_index.PropertyRange
+
+        def search(*ranges, **filters):
+            return [c.part_number for c in inventory.search_components(ranges=list(ranges), **filters)]
+
+        self.assertEqual(search(Range("Resistance (Ω)", 4700, 10000)), ["R-10K", "R-4K7", "R-4K7B"])
+        self.assertEqual(search(Range("Resistance (Ω)", 4700, 10000), Range("Tolerance (%)", maximum=1)), ["R-4K7B"])
+        self.assertEqual(search(Range("Resistance (Ω)", minimum=1e6)), ["R-1M"])
+        # 100n in a µF property is 0.1 µF, the same as the plain 0.1 of C-100N
+        self.assertEqual(search(Range("Capacitance (µF)", 0.1, 0.1)), ["C-100N", "C-100N-B"])
+        self.assertEqual(search(Range("Capacitance (µF)", 0.1, 0.1), backend_type="resistor"), [])
+        component = inventory.get_components_by_part_number("R-1M")[0]
+        self.assertFalse(inventory.component_matches_search(component.id, ranges=[Range("Resistance (Ω)", 0, 1e5)]))
+
+    def test_parse_quantity_applies_prefixes_relative_to_the_property_unit(self):
+        cases = [("4.7k", "Resistance (Ω)", 4700), ("4.7 kΩ", "Resistance (Ω)", 4700), ("10µF", "Capacitance (µF)", 10),
+                 ("10uF", "Capacitance (µF)", 10), ("470p", "Capacitance (µF)", 0.00047), ("25V", "Voltage (V)", 25),
+                 ("500 mA", "Current Rating (A)", 0.5), ("5", "Tolerance (%)", 5), ("-40", "Temperature", -40)]
+        for value, name, expected in cases:
+            self.assertAlmostEqual(property_index.parse_quantity(value, name), expected, msg=value)
+        for value in ("", "DIP-8", ".", "+"):
+            self.assertIsNone(property_index.parse_quantity(value, "Package"))
+
+    def test_index_reads_numbers_like_parse_quantity(self):
+        # The triggers parse in SQL, so any connection can write components; this keeps the two parsers in step
+        values = ["4.7k", "1 MΩ", "100n", "10µF", "2.2 mF", "+.5", "1.2.3", "n/a", "33 volts", "-40", "3.3μ",
+                  "1G", "7 K", "100 mAh", "20 pF", "1e3", "0.5 V/µs", "-.25m", "12V", "4k7"]
+        names = ["Resistance (Ω)", "Capacitance (µF)", "Voltage (V)", "Size (mm", "Slew Rate (V/µs)", "Capacity (mAh)",
+                 "Load Capacitance (pF)", "Rds(on) (Ω)", "Temperature range C", "Frequency (MHz)"]
+        inventory.bulk_add_components([{"part_number": f"X-{i}-{j}", "component_type": "resistor",
+                                        "value": f"{name}: {value}", "quantity": 1}
+                                       for i, name in enumerate(names) for j, value in enumerate(values)])
+        table = property_index.property_table
+        with self.engine.connect() as conn:
+            rows = conn.execute(table.select().where(table.c.name.in_(names))).all()
+        self.assertIn(None, {row.numeric_value for row in rows})
+        for row in rows:
+            self.assertEqual(row.numeric_value, property_index.parse_quantity(row.value, row.name), row.value)
+
+    def test_values_for_matches_shortened_names(self):
+        self.assertEqual(property_index.values_for(["Resistance (Ω)", "Tolerance (%)"], {"Resistance": "4.7k"}),
+                         {"Resistance (Ω)": "4.7k"})
+
+
 if __name__ == '__main__':
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,196 @@
+import os
+import shutil
+import tempfile
+import unittest
+import uuid
+from collections import OrderedDict
+from unittest.mock import patch
+
+from sqlalchemy import text
+
+from backend import database, inventory, inventory_manager, search_index
+from backend.exceptions import InvalidInputError, StockError, ComponentNotFoundError, InvalidQuantityError
+from backend.component_factory import ComponentFactory
+from backend.models import Component, create_component_class
+from backend.models_custom import Inventory
+
+
+class InventoryFilesTestCase(unittest.TestCase):
+    """Two inventory files in a temp dir: a source with R1 and C1, and a destination with R1."""
+
+    @classmethod
+    def setUpClass(cls):
+        ComponentFactory.register_component("resistor", create_component_class("Resistor", "resistor", "Value"))
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(database, "_inventory_cache", OrderedDict()),
+            patch.object(database, "inventory_engine", None),
+            patch.object(database, "InventorySession", None),
+        ]
+        for p in self.patches:
+            p.start()
+        self.source = Inventory(id="source-id", name="Source", db_path="source.db")
+        self.destination = Inventory(id="destination-id", name="Destination",
+                                     db_path=os.path.join(self.tmp_dir, "destination.db"))
+        self.resistor_id = self.add(self.source, "R1", 10, location="Bin A1", notes="1% metal film")
+        self.capacitor_id = self.add(self.source, "C1", 5)
+        self.add(self.destination, "R1", 2, location="Shelf 3")
+
+    def tearDown(self):
+        for cached in database._inventory_cache.values():
+            cached.engine.dispose()
+        for p in reversed(self.patches):
+            p.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def session(self, inventory):
+        path = inventory_manager.get_inventory_db_path(inventory, self.tmp_dir)
+        return database._open_inventory_db(f"sqlite:///{path}")[1]()
+
+    def add(self, inventory, part_number, quantity, **fields):
+        with self.session(inventory) as session:
+            component = ComponentFactory.create_component("resistor", part_number=part_number, value="1k",
+                                                          quantity=quantity, **fields)
+            session.add(component)
+            session.commit()
+            return component.id
+
+    def stock(self, inventory):
+        with self.session(inventory) as session:
+            return {c.part_number: (c.quantity, c.location, c.notes) for c in session.query(Component)}
+
+
+class TestTransferComponents(InventoryFilesTestCase):
+
+    def transfer(self, quantities):
+        return inventory_manager.transfer_components(self.source, self.destination, quantities, self.tmp_dir)
+
+    def test_moves_all_quantities_in_one_go(self):
+        updated = self.transfer({self.resistor_id: 3, self.capacitor_id: 5})
+
+        self.assertEqual({c.part_number: c.quantity for c in updated}, {"R1": 7, "C1": 0})
+        self.assertEqual(self.stock(self.source), {"R1": (7, "Bin A1", "1% metal film"), "C1": (0, None, None)})
+        # Existing parts keep their own details; new parts are copied from the source
+        self.assertEqual(self.stock(self.destination), {"R1": (5, "Shelf 3", None), "C1": (5, None, None)})
+        with self.session(self.destination) as session:
+            self.assertNotEqual(session.query(Component).filter_by(part_number="C1").one().id, self.capacitor_id)
+            # The destination's own triggers keep its search index in step
+            self.assertEqual(session.execute(text(
+                f"SELECT COUNT(*) FROM {search_index.FTS_TABLE_NAME} WHERE {search_index.FTS_TABLE_NAME} MATCH 'C1'"
+            )).scalar(), 1)
+        self.assertIsNone(database.inventory_engine)
+
+    def test_insufficient_stock_rolls_back_every_part(self):
+        before = self.stock(self.source), self.stock(self.destination)
+        with self.assertRaisesRegex(StockError, "Not enough stock for C1. Available: 5"):
+            self.transfer({self.resistor_id: 3, self.capacitor_id: 6})
+        self.assertEqual((self.stock(self.source), self.stock(self.destination)), before)
+
+    def test_unknown_component_is_rejected(self):
+        with self.assertRaises(ComponentNotFoundError):
+            self.transfer({self.resistor_id: 1, uuid.uuid4(): 1})
+        self.assertEqual(self.stock(self.source)["R1"][0], 10)
+
+    def test_invalid_requests_are_rejected(self):
+        with self.assertRaises(InvalidQuantityError):
+            self.transfer({self.resistor_id: 0})
+        with self.assertRaisesRegex(InvalidInputError, "same"):
+            inventory_manager.transfer_components(self.source, self.source, {self.resistor_id: 1}, self.tmp_dir)
+
+    def test_can_run_again_on_the_same_connection(self):
+        self.transfer({self.resistor_id: 1})
+        self.transfer({self.resistor_id: 1})
+        self.assertEqual(self.stock(self.destination)["R1"][0], 4)
+
+
+class TestRunOnAllInventories(InventoryFilesTestCase):
+
+    def test_runs_in_every_inventory_without_switching(self):
+        database.switch_inventory_db(f"sqlite:///{os.path.join(self.tmp_dir, 'source.db')}")
+        active = database.inventory_engine
+        missing = Inventory(name="Missing", db_path="missing.db")
+
+        results = inventory_manager.run_on_all_inventories(
+            lambda session: inventory.delete_components_by_type("resistor", session=session),
+            self.tmp_dir, [self.destination, missing, self.source])
+
+        self.assertEqual(list(results), ["Destination", "Missing", "Source"])
+        self.assertEqual((results["Source"], results["Destination"]), (2, 1))
+        self.assertIsInstance(results["Missing"], FileNotFoundError)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "missing.db")))
+        self.assertEqual((self.stock(self.source), self.stock(self.destination)), ({}, {}))
+        self.assertIs(database.inventory_engine, active)
+
+    def test_failed_inventory_is_rolled_back(self):
+        def delete_then_fail(session):
+            inventory.delete_components_by_type("resistor", session=session)
+            raise RuntimeError("disk full")
+
+        results = inventory_manager.run_on_all_inventories(delete_then_fail, self.tmp_dir, [self.source])
+
+        self.assertEqual(str(results["Source"]), "disk full")
+        self.assertEqual(len(self.stock(self.source)), 2)
+
+    def test_read_only_sessions_cannot_write(self):
+        results = inventory_manager.run_on_all_inventories(
+            lambda session: inventory.delete_components_by_type("resistor", session=session),
+            self.tmp_dir, [self.source], read_only=True)
+
+        self.assertIsInstance(results["Source"], Exception)
+        self.assertEqual(len(self.stock(self.source)), 2)
+
+
+class TestSharedDatabase(InventoryFilesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.counts = inventory_manager.migrate_to_shared_database(self.tmp_dir, [self.destination, self.source])
+        self.shared_path = os.path.join(self.tmp_dir, inventory_manager.SHARED_DATABASE_FILENAME)
+
+    def shared_rows(self):
+        with database.inventory_file_session(self.shared_path) as session:
+            return sorted((c.inventory_id, c.part_number, c.quantity) for c in session.query(Component))
+
+    def test_migration_copies_every_inventory_and_keeps_the_files(self):
+        self.assertEqual(self.counts, {"Destination": 1, "Source": 2})
+        self.assertEqual(inventory_manager.get_shared_db_path(self.tmp_dir), self.shared_path)
+        self.assertEqual(self.shared_rows(), [("destination-id", "R1", 2), ("source-id", "C1", 5),
+                                              ("source-id", "R1", 10)])
+        self.assertEqual(len(self.stock(self.source)), 2)
+        with self.assertRaises(InvalidInputError):
+            inventory_manager.migrate_to_shared_database(self.tmp_dir, [self.source])
+
+    def test_active_inventory_only_sees_its_own_components(self):
+        inventory_manager.open_inventory(self.destination, self.tmp_dir)
+
+        self.assertEqual([c.quantity for c in inventory.search_components("R1")], [2])
+        # Part numbers are unique per inventory, not across the shared database
+        inventory.add_component("C1", "resistor", "1k", 4, None, None, None, None)
+        inventory.bulk_add_components([{"part_number": "R2", "component_type": "resistor", "value": "1k",
+                                        "quantity": 1, "id": self.resistor_id}])
+        self.assertEqual(inventory.delete_components_by_type("resistor"), 3)
+        self.assertEqual(self.shared_rows(), [("source-id", "C1", 5), ("source-id", "R1", 10)])
+
+    def test_transfer_stays_within_the_shared_database(self):
+        updated = inventory_manager.transfer_components(self.source, self.destination,
+                                                        {self.resistor_id: 3, self.capacitor_id: 5}, self.tmp_dir)
+
+        self.assertEqual({c.part_number: c.quantity for c in updated}, {"R1": 7, "C1": 0})
+        self.assertEqual(self.shared_rows(), [("destination-id", "C1", 5), ("destination-id", "R1", 5),
+                                              ("source-id", "C1", 0), ("source-id", "R1", 7)])
+        with self.assertRaises(StockError):
+            inventory_manager.transfer_components(self.source, self.destination, {self.resistor_id: 8}, self.tmp_dir)
+
+    def test_run_on_all_inventories_is_limited_per_inventory(self):
+        results = inventory_manager.run_on_all_inventories(
+            lambda session: inventory.delete_components_by_type("resistor", session=session),
+            self.tmp_dir, [self.source])
+
+        self.assertEqual(results, {"Source": 2})
+        self.assertEqual(self.shared_rows(), [("destination-id", "R1", 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,16 +2,18 @@ import pytest
 import uuid
 from unittest.mock import patch
 
-from PyQt5.QtWidgets import QCheckBox
 from PyQt5.QtCore import QUrl, Qt
+from PyQt5.QtWidgets import QAbstractItemView
 
 from frontend.ui.main_window import InventoryUI
 from frontend.ui import utils as ui_utils
 from backend import component_constants
+from backend.property_index import PropertyRange
 
 
 class MockComponent:
-    def __init__(self, id, part_number, component_type, value, quantity, purchase_link=None, datasheet_link=None):
+    def __init__(self, id, part_number, component_type, value, quantity, purchase_link=None, datasheet_link=None,
+                 location=None, image_path=None):
         self.id = id
         self.part_number = part_number
         self.component_type = component_type
@@ -19,6 +21,8 @@ class MockComponent:
         self.quantity = quantity
         self.purchase_link = purchase_link
         self.datasheet_link = datasheet_link
+        self.location = location
+        self.image_path = image_path
 
 
 MOCK_COMPONENTS = [
@@ -48,26 +52,37 @@ def test_window_initialization(window):
     assert not window.generate_ideas_button.isEnabled()
 
 
+def cell(window, row, col, role=Qt.DisplayRole):
+    model = window.table_model
+    return model.data(model.index(row, col), role)
+
+
+def set_checked(window, row, checked=True):
+    model = window.table_model
+    model.setData(model.index(row, window.CHECKBOX_COL), Qt.Checked if checked else Qt.Unchecked, Qt.CheckStateRole)
+
+
 def test_display_data_populates_table(window):
     window.display_data(MOCK_COMPONENTS)
-    assert window.table.rowCount() == len(MOCK_COMPONENTS)
-    assert window.table.item(0, window.PART_NUMBER_COL).text() == "R101"
+    assert window.table_model.rowCount() == len(MOCK_COMPONENTS)
+    assert cell(window, 0, window.PART_NUMBER_COL) == "C202"
+    assert cell(window, 1, window.PART_NUMBER_COL) == "R101"
     expected_ui_type = component_constants.BACKEND_TO_UI_TYPE_MAP.get("resistor", "resistor")
-    assert window.table.item(0, window.TYPE_COL).text() == expected_ui_type
-    assert window.table.item(0, window.VALUE_COL).text() == "10k Ohms"
-    assert window.table.item(0, window.QUANTITY_COL).text() == "50"
-    assert window.table.item(0, window.QUANTITY_COL).data(Qt.EditRole) == 50
-    assert window.table.item(0, window.PURCHASE_LINK_COL).text() == "Link"
-    assert window.table.item(0, window.DATASHEET_COL).text() == "Link"
-    assert window.table.cellWidget(0, window.CHECKBOX_COL) is not None
-    assert window.table.item(2, window.PURCHASE_LINK_COL).text() == ""
-    assert window.table.item(2, window.DATASHEET_COL).text() == ""
-    assert window.table.cellWidget(2, window.CHECKBOX_COL) is not None
+    assert cell(window, 1, window.TYPE_COL) == expected_ui_type
+    assert cell(window, 1, window.VALUE_COL) == "10k Ohms"
+    assert cell(window, 1, window.QUANTITY_COL) == 50
+    assert cell(window, 1, window.QUANTITY_COL, Qt.EditRole) == 50
+    assert cell(window, 1, window.PURCHASE_LINK_COL) == "Link"
+    assert cell(window, 1, window.DATASHEET_COL) == "Link"
+    assert cell(window, 1, window.CHECKBOX_COL, Qt.CheckStateRole) == Qt.Unchecked
+    assert cell(window, 2, window.PURCHASE_LINK_COL) == ""
+    assert cell(window, 2, window.DATASHEET_COL) == ""
+    assert window.table_model.flags(window.table_model.index(2, window.CHECKBOX_COL)) & Qt.ItemIsUserCheckable
 
 
 def test_display_data_empty(window):
     window.display_data([])
-    assert window.table.rowCount() == 0
+    assert window.table_model.rowCount() == 0
 
 
 def test_button_signals_simple(window, qtbot):
@@ -86,27 +101,18 @@ def test_checkbox_enables_buttons(window):
     window.display_data(MOCK_COMPONENTS)
     assert not window.remove_button.isEnabled()
     assert not window.generate_ideas_button.isEnabled()
-    cell_widget = window.table.cellWidget(0, window.CHECKBOX_COL)
-    checkbox = cell_widget.findChild(QCheckBox)
-    assert checkbox is not None
-    checkbox.setChecked(True)
-    window._update_buttons_state_on_checkbox()
+    set_checked(window, 0)
     assert window.remove_button.isEnabled()
     assert window.generate_ideas_button.isEnabled()
-    checkbox.setChecked(False)
-    window._update_buttons_state_on_checkbox()
+    set_checked(window, 0, False)
     assert not window.remove_button.isEnabled()
     assert not window.generate_ideas_button.isEnabled()
 
 
 def test_get_checked_ids(window):
     window.display_data(MOCK_COMPONENTS)
-    checkbox0_widget = window.table.cellWidget(0, window.CHECKBOX_COL)
-    checkbox0 = checkbox0_widget.findChild(QCheckBox)
-    checkbox2_widget = window.table.cellWidget(2, window.CHECKBOX_COL)
-    checkbox2 = checkbox2_widget.findChild(QCheckBox)
-    checkbox0.setChecked(True)
-    checkbox2.setChecked(True)
+    set_checked(window, 1)
+    set_checked(window, 2)
     checked_ids = window.get_checked_ids()
     assert len(checked_ids) == 2
     assert MOCK_COMPONENTS[0].id in checked_ids
@@ -123,14 +129,11 @@ def test_get_checked_ids_empty(window):
 
 def test_remove_button_signal_with_checked(window, qtbot):
     window.display_data(MOCK_COMPONENTS)
-    checkbox0_widget = window.table.cellWidget(0, window.CHECKBOX_COL)
-    checkbox0 = checkbox0_widget.findChild(QCheckBox)
     assert not window.remove_button.isEnabled()
     with qtbot.waitSignal(window.remove_components_requested, timeout=100, raising=False) as blocker:
         qtbot.mouseClick(window.remove_button, Qt.LeftButton)
     assert not blocker.signal_triggered
-    checkbox0.setChecked(True)
-    window._update_buttons_state_on_checkbox()
+    set_checked(window, 1)
     assert window.remove_button.isEnabled()
     with qtbot.waitSignal(window.remove_components_requested, timeout=500) as blocker:
         qtbot.mouseClick(window.remove_button, Qt.LeftButton)
@@ -140,14 +143,11 @@ def test_remove_button_signal_with_checked(window, qtbot):
 
 def test_generate_ideas_button_signal_with_checked(window, qtbot):
     window.display_data(MOCK_COMPONENTS)
-    checkbox1_widget = window.table.cellWidget(1, window.CHECKBOX_COL)
-    checkbox1 = checkbox1_widget.findChild(QCheckBox)
     assert not window.generate_ideas_button.isEnabled()
     with qtbot.waitSignal(window.generate_ideas_requested, timeout=100, raising=False) as blocker:
         qtbot.mouseClick(window.generate_ideas_button, Qt.LeftButton)
     assert not blocker.signal_triggered
-    checkbox1.setChecked(True)
-    window._update_buttons_state_on_checkbox()
+    set_checked(window, 0)
     assert window.generate_ideas_button.isEnabled()
     with qtbot.waitSignal(window.generate_ideas_requested, timeout=500) as blocker:
         qtbot.mouseClick(window.generate_ideas_button, Qt.LeftButton)
@@ -158,11 +158,11 @@ def test_generate_ideas_button_signal_with_checked(window, qtbot):
 def test_handle_cell_click_links(window, qtbot):
     window.display_data(MOCK_COMPONENTS)
     with qtbot.waitSignal(window.link_clicked, timeout=500) as blocker:
-        window._handle_cell_click(0, window.PURCHASE_LINK_COL)
+        window._handle_cell_click(1, window.PURCHASE_LINK_COL)
     assert blocker.signal_triggered
     assert blocker.args == [QUrl(MOCK_COMPONENTS[0].purchase_link)]
     with qtbot.waitSignal(window.link_clicked, timeout=500) as blocker:
-        window._handle_cell_click(0, window.DATASHEET_COL)
+        window._handle_cell_click(1, window.DATASHEET_COL)
     assert blocker.signal_triggered
     assert blocker.args == [QUrl(MOCK_COMPONENTS[0].datasheet_link)]
 
@@ -173,5 +173,174 @@ def test_handle_cell_click_no_link(window, qtbot):
         window._handle_cell_click(2, window.PURCHASE_LINK_COL)
     assert not blocker.signal_triggered
     with qtbot.waitSignal(window.link_clicked, timeout=100, raising=False) as blocker:
-        window._handle_cell_click(0, window.PART_NUMBER_COL)
+        window._handle_cell_click(1, window.PART_NUMBER_COL)
     assert not blocker.signal_triggered
+
+
+def make_fetcher(components, calls):
+    def fetch(offset, limit, order_by, descending):
+        calls.append((offset, limit, order_by, descending))
+        ordered = sorted(components, key=lambda c: getattr(c, order_by), reverse=descending)
+        return ordered[offset:offset + limit]
+    return fetch
+
+
+def test_page_fetcher_loads_rows_lazily(window):
+    components = [MockComponent(uuid.uuid4(), f"PN{i:04d}", "resistor", "1k", i) for i in range(450)]
+    calls = []
+    window.table_model.PAGE_SIZE = 200
+    window.set_page_fetcher(make_fetcher(components, calls))
+    model = window.table_model
+    assert model.rowCount() == 200
+    assert calls == [(0, 200, "part_number", False)]
+    assert model.canFetchMore(model.index(-1, -1))
+    model.fetch_all()
+    assert model.rowCount() == 450
+    assert not model.canFetchMore(model.index(-1, -1))
+    assert [c[0] for c in calls] == [0, 200, 400]
+
+
+def test_sorting_with_page_fetcher_requeries(window):
+    calls = []
+    window.set_page_fetcher(make_fetcher(MOCK_COMPONENTS, calls))
+    window.table.sortByColumn(window.QUANTITY_COL, Qt.DescendingOrder)
+    assert calls[-1][2:] == ("quantity", True)
+    assert [cell(window, row, window.QUANTITY_COL) for row in range(3)] == [50, 25, 10]
+
+
+def test_inline_edit_emits_update(window, qtbot):
+    component = MockComponent(uuid.uuid4(), "R101", "resistor", "10k Ohms", 50)
+    window.display_data([component])
+    model = window.table_model
+    with qtbot.waitSignal(window.component_data_updated, timeout=500) as blocker:
+        assert model.setData(model.index(0, window.QUANTITY_COL), "7", Qt.EditRole)
+    assert blocker.args == [component.id, {"quantity": 7}]
+    # The row only changes once the saved component comes back from the backend
+    assert cell(window, 0, window.QUANTITY_COL) == 50
+    window.upsert_component(MockComponent(component.id, "R101", "resistor", "10k Ohms", 7))
+    assert cell(window, 0, window.QUANTITY_COL) == 7
+    assert not model.setData(model.index(0, window.QUANTITY_COL), "abc", Qt.EditRole)
+    assert not model.flags(model.index(0, window.PART_NUMBER_COL)) & Qt.ItemIsEditable
+
+
+def test_upsert_updates_row_in_place_and_keeps_check_state(window):
+    components = [MockComponent(uuid.uuid4(), pn, "resistor", "1k", 1) for pn in ("A1", "B2", "C3")]
+    window.display_data(components)
+    set_checked(window, 1)
+    updated = MockComponent(components[1].id, "B2", "resistor", "2k", 99)
+    window.upsert_component(updated)
+    assert window.table_model.rowCount() == 3
+    assert cell(window, 1, window.QUANTITY_COL) == 99
+    assert window.get_checked_ids() == [components[1].id]
+
+
+def test_upsert_inserts_new_row_at_sorted_position(window):
+    components = [MockComponent(uuid.uuid4(), pn, "resistor", "1k", 1) for pn in ("A1", "C3")]
+    window.display_data(components)
+    window.table.selectRow(1)
+    inserted = MockComponent(uuid.uuid4(), "B2", "resistor", "1k", 1)
+    window.upsert_component(inserted)
+    assert [cell(window, row, window.PART_NUMBER_COL) for row in range(3)] == ["A1", "B2", "C3"]
+    assert [window.table_model.row_for_id(c.id) for c in (components[0], inserted, components[1])] == [0, 1, 2]
+    assert window.get_selected_id() == components[1].id
+
+
+def test_upsert_after_loaded_pages_is_left_to_fetch_more(window):
+    components = [MockComponent(uuid.uuid4(), f"PN{i:04d}", "resistor", "1k", i) for i in range(10)]
+    calls = []
+    window.table_model.PAGE_SIZE = 4
+    window.set_page_fetcher(make_fetcher(components, calls))
+    late = MockComponent(uuid.uuid4(), "PN9999", "resistor", "1k", 1)
+    early = MockComponent(uuid.uuid4(), "PN0001A", "resistor", "1k", 1)
+    components.extend([late, early])
+    window.upsert_component(late)
+    window.upsert_component(early)
+    assert window.table_model.rowCount() == 5
+    window.table_model.fetch_all()
+    part_numbers = [cell(window, row, window.PART_NUMBER_COL) for row in range(window.table_model.rowCount())]
+    assert part_numbers == sorted(c.part_number for c in components)
+
+
+def test_upsert_moves_row_whose_sort_value_changed(window):
+    components = [MockComponent(uuid.uuid4(), f"P{i:03d}", "resistor", "1k", i) for i in range(250)]
+    window.table_model.PAGE_SIZE = 200
+    window.set_page_fetcher(make_fetcher(components, []))
+    window.table.sortByColumn(window.QUANTITY_COL, Qt.AscendingOrder)
+    model = window.table_model
+    window.table.selectRow(150)
+
+    components[150] = MockComponent(components[150].id, "P150", "resistor", "1k", -1)
+    window.upsert_component(components[150])
+    assert cell(window, 0, window.PART_NUMBER_COL) == "P150"
+    assert model.row_for_id(components[0].id) == 1
+    assert window.get_selected_id() == components[150].id
+
+    # Now sorts after the loaded rows: dropped, and fetched again at its place
+    components[10] = MockComponent(components[10].id, "P010", "resistor", "1k", 10000)
+    window.upsert_component(components[10])
+    assert model.rowCount() == 199 and model.row_for_id(components[10].id) == -1
+    model.fetch_all()
+    part_numbers = [cell(window, row, window.PART_NUMBER_COL) for row in range(model.rowCount())]
+    assert part_numbers == [c.part_number for c in sorted(components, key=lambda c: c.quantity)]
+
+
+def test_remove_component_drops_row_and_check(window):
+    components = [MockComponent(uuid.uuid4(), pn, "resistor", "1k", 1) for pn in ("A1", "B2")]
+    window.display_data(components)
+    set_checked(window, 0)
+    window.remove_component(components[0].id)
+    assert window.table_model.rowCount() == 1
+    assert window.table_model.row_for_id(components[0].id) == -1
+    assert window.table_model.row_for_id(components[1].id) == 0
+    assert window.get_checked_ids() == []
+    assert not window.remove_button.isEnabled()
+
+
+def test_property_filter_panel_emits_parsed_ranges(window, qtbot):
+    panel = window.property_filter_panel
+    assert panel.isHidden()
+    window.set_filter_properties(["Resistance (Ω)", "Tolerance (%)"])
+    assert not panel.isHidden()
+    minimum, maximum = panel._fields["Resistance (Ω)"]
+    minimum.setText("4.7k")
+    maximum.setText("10k")
+    with qtbot.waitSignal(window.property_filter_changed) as blocker:
+        maximum.editingFinished.emit()
+    assert blocker.args == [[PropertyRange("Resistance (Ω)", 4700, 10000)]]
+
+    panel._fields["Tolerance (%)"][1].setText("one")
+    with qtbot.assertNotEmitted(window.property_filter_changed):
+        panel._fields["Tolerance (%)"][1].editingFinished.emit()
+    with qtbot.waitSignal(window.property_filter_changed) as blocker:
+        panel.clear()
+    assert blocker.args == [[]]
+    window.set_filter_properties([])
+    assert panel.isHidden()
+
+
+def test_type_filter_shows_counts_and_keeps_selection(window, qtbot):
+    window.populate_type_filter(["Resistor", "Capacitor"])
+    window.type_filter_combo.setCurrentIndex(window.type_filter_combo.findData("Resistor"))
+    with qtbot.assertNotEmitted(window.type_filter_changed):
+        window.populate_type_filter(["Capacitor", "Resistor"], {"Resistor": 1284, "Capacitor": 3}, 1287)
+    combo = window.type_filter_combo
+    assert [combo.itemText(i) for i in range(combo.count())] == ["All Types (1,287)", "Capacitor (3)",
+                                                                 "Resistor (1,284)"]
+    assert window.current_type_filter() == "Resistor"
+    with qtbot.waitSignal(window.type_filter_changed) as blocker:
+        combo.setCurrentIndex(0)
+    assert blocker.args == ["All Types"]
+
+
+def test_editing_can_be_disabled_while_importing(window):
+    components = [MockComponent(uuid.uuid4(), "A1", "resistor", "1k", 1)]
+    window.display_data(components)
+    set_checked(window, 0)
+    window.set_editing_enabled(False)
+    assert not window.add_button.isEnabled()
+    assert not window.remove_button.isEnabled()
+    assert window.table.editTriggers() == QAbstractItemView.NoEditTriggers
+    assert not window.menu_bar_handler.add_random_action.isEnabled()
+    window.set_editing_enabled(True)
+    assert window.remove_button.isEnabled()
+    assert window.table.editTriggers() == window.EDIT_TRIGGERS
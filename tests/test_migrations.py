@@ -0,0 +1,116 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from backend import migrations, property_index
+from backend.models import Base
+
+LEGACY_SCHEMA = """CREATE TABLE components (
+    id CHAR(32) NOT NULL PRIMARY KEY,
+    part_number VARCHAR NOT NULL,
+    component_type VARCHAR NOT NULL,
+    value VARCHAR NOT NULL,
+    quantity INTEGER NOT NULL,
+    purchase_link VARCHAR,
+    datasheet_link VARCHAR
+)"""
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def _create_legacy_table(self, part_numbers=("R1", "C1")):
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(LEGACY_SCHEMA)
+            for i, part_number in enumerate(part_numbers):
+                conn.exec_driver_sql(
+                    "INSERT INTO components VALUES (?, ?, 'resistor', '1k', 1, NULL, NULL)",
+                    (f"{i:032x}", part_number))
+
+    def _indexes(self):
+        return {ix["name"]: ix for ix in inspect(self.engine).get_indexes("components")}
+
+    def test_legacy_file_is_upgraded_in_place(self):
+        self._create_legacy_table()
+        self.assertEqual(migrations.run_migrations(self.engine), migrations.SCHEMA_VERSION)
+
+        columns = {c["name"] for c in inspect(self.engine).get_columns("components")}
+        self.assertTrue({"location", "notes", "image_path"} <= columns)
+        indexes = self._indexes()
+        self.assertTrue(indexes["ix_components_part_number"]["unique"])
+        self.assertIn("ix_components_component_type", indexes)
+        self.assertIn("ix_components_location", indexes)
+        with self.engine.connect() as conn:
+            self.assertEqual(migrations.get_schema_version(conn), migrations.SCHEMA_VERSION)
+            self.assertEqual(conn.exec_driver_sql("SELECT COUNT(*) FROM components").scalar(), 2)
+
+    def test_existing_values_are_parsed_into_properties(self):
+        self._create_legacy_table()
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE components SET value = 'Resistance (Ω): 4.7k, Tolerance (%): 5' "
+                                 "WHERE part_number = 'R1'")
+        migrations.run_migrations(self.engine)
+
+        with self.engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"SELECT component_type, name, value, numeric_value "
+                                        f"FROM {property_index.PROPERTY_TABLE_NAME} ORDER BY position").all()
+        self.assertEqual(rows, [("resistor", "Resistance (Ω)", "4.7k", 4700.0),
+                                ("resistor", "Tolerance (%)", "5", 5.0)])
+
+    def test_property_triggers_work_for_any_sqlite_client(self):
+        # The triggers parse numbers in plain SQL, so files edited with e.g. the sqlite3 shell stay indexed
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        path = os.path.join(tmp_dir, "inventory.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        migrations.run_migrations(engine)
+        engine.dispose()
+
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute("INSERT INTO components (id, part_number, component_type, value, quantity) "
+                         f"VALUES ('{0:032x}', 'R1', 'resistor', 'Resistance (Ω): 2.2k', 1)")
+            rows = conn.execute(
+                f"SELECT component_type, name, numeric_value FROM {property_index.PROPERTY_TABLE_NAME}").fetchall()
+        self.assertEqual(rows, [("resistor", "Resistance (Ω)", 2200.0)])
+
+    def test_duplicate_part_numbers_get_non_unique_index(self):
+        self._create_legacy_table(part_numbers=("R1", "R1"))
+        migrations.run_migrations(self.engine)
+        self.assertFalse(self._indexes()["ix_components_part_number"]["unique"])
+
+    def test_new_database_matches_migrated_schema(self):
+        Base.metadata.create_all(self.engine)
+        migrations.run_migrations(self.engine)
+        indexes = self._indexes()
+        self.assertEqual(set(indexes), {"ix_components_part_number", "ix_components_component_type",
+                                        "ix_components_location"})
+        self.assertTrue(indexes["ix_components_part_number"]["unique"])
+
+    def test_current_database_is_left_alone(self):
+        Base.metadata.create_all(self.engine)
+        migrations.run_migrations(self.engine)
+        with patch.object(migrations, "_create_lookup_indexes") as step:
+            migrations.run_migrations(self.engine)
+        step.assert_not_called()
+
+    def test_newer_database_is_not_downgraded(self):
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version = {migrations.SCHEMA_VERSION + 1}")
+        self.assertEqual(migrations.run_migrations(self.engine), migrations.SCHEMA_VERSION + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import pytest
+import uuid
+from unittest.mock import patch
+
+from frontend.ui.main_window import InventoryUI
+from frontend.ui import utils as ui_utils
+from frontend.controllers import search_controller
+from frontend.controllers.search_controller import SearchController
+
+
+class MockComponent:
+    def __init__(self, part_number):
+        self.id = uuid.uuid4()
+        self.part_number = part_number
+        self.component_type = "resistor"
+        self.value = "1k"
+        self.quantity = 1
+        self.purchase_link = None
+        self.datasheet_link = None
+        self.location = None
+        self.image_path = None
+
+
+COMPONENTS = [MockComponent(pn) for pn in ("A1", "B2", "AB3")]
+
+
+def fake_search(term=None, backend_type=None, order_by="part_number", descending=False, limit=None, offset=0,
+                ranges=None):
+    rows = sorted((c for c in COMPONENTS if not term or term in c.part_number),
+                  key=lambda c: getattr(c, order_by), reverse=descending)
+    return rows[offset:offset + limit]
+
+
+@pytest.fixture
+def controller(qtbot):
+    with patch.object(ui_utils, 'load_stylesheet', return_value=""), \
+         patch.object(search_controller.settings_manager, 'get_setting', return_value="20"), \
+         patch.object(search_controller, 'search_components', side_effect=fake_search) as search_mock:
+        view = InventoryUI()
+        qtbot.addWidget(view)
+        controller = SearchController(view)
+        controller.search_mock = search_mock
+        yield controller
+        controller.wait_for_done()
+
+
+def part_numbers(view):
+    model = view.table_model
+    return [model.component_at(row).part_number for row in range(model.rowCount())]
+
+
+def test_debounce_coalesces_keystrokes(controller, qtbot):
+    assert controller.debounce_ms() == 20
+    for term in ("A", "AB"):
+        controller.schedule(term, None)
+    qtbot.waitUntil(lambda: controller.search_mock.call_count == 1 and not controller._workers, timeout=2000)
+    qtbot.wait(50)
+    assert controller.search_mock.call_count == 1
+    assert part_numbers(controller._view) == ["AB3"]
+
+
+def test_run_now_supersedes_pending_search(controller, qtbot):
+    controller.schedule("B", None)
+    controller.run_now("A", None)
+    qtbot.waitUntil(lambda: not controller._workers, timeout=2000)
+    qtbot.wait(50)
+    assert [c.kwargs.get("term", c.args[0]) for c in controller.search_mock.call_args_list] == ["A"]
+    assert part_numbers(controller._view) == ["A1", "AB3"]
+
+
+def test_stale_result_is_dropped(controller, qtbot):
+    controller.run_now("B", None)
+    controller.run_now("A", None)
+    qtbot.waitUntil(lambda: not controller._workers, timeout=2000)
+    assert part_numbers(controller._view) == ["A1", "AB3"]
+
+
+def test_failure_is_reported(controller, qtbot):
+    controller.search_mock.side_effect = RuntimeError("db gone")
+    with qtbot.waitSignal(controller.search_failed, timeout=2000) as blocker:
+        controller.run_now("A", None)
+    assert blocker.args == ["db gone"]
+
+
+def test_invalid_delay_falls_back_to_default(controller):
+    controller.set_debounce_ms("abc")
+    assert controller.debounce_ms() == SearchController.DEFAULT_DEBOUNCE_MS
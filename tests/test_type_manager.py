@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import database, inventory_manager
+from backend.component_factory import ComponentFactory
+from backend.models_custom import Base as ConfigBase
+from backend.type_manager import TypeManager
+
+
+class TestTypeRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        ConfigBase.metadata.create_all(self.engine)
+        self.patches = [
+            patch.object(database, "ConfigSession", sessionmaker(bind=self.engine)),
+            patch.dict(ComponentFactory._component_types),
+        ]
+        for p in self.patches:
+            p.start()
+        # A fresh registry instead of the shared singleton
+        self.types = object.__new__(TypeManager)
+        self.types.__init__()
+        self.types.load_types()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+        self.engine.dispose()
+
+    def test_sorted_views_are_reused_until_types_change(self):
+        names = self.types.get_all_ui_names()
+        self.assertEqual(list(names), sorted(names))
+        self.assertIs(self.types.get_all_ui_names(), names)
+        self.assertEqual(self.types.get_all_custom_ui_names(), ())
+
+    def test_add_and_delete_update_the_registry_in_place(self):
+        generation = self.types.generation
+        with patch.object(self.types, "load_types") as load_types:
+            self.assertTrue(self.types.add_new_type("Gizmo", ["Size (mm)"])[0])
+            self.assertTrue(self.types.add_new_type("Adapter", ["Pins"])[0])
+            with patch.object(inventory_manager, "run_on_all_inventories", return_value={"Main": 0}):
+                self.assertTrue(self.types.delete_custom_type("Gizmo", "unused")[0])
+        load_types.assert_not_called()
+
+        self.assertEqual(self.types.generation, generation + 3)
+        self.assertEqual(self.types.get_all_custom_ui_names(), ("Adapter",))
+        self.assertIn("Adapter", self.types.get_all_ui_names())
+        self.assertNotIn("Gizmo", self.types.get_all_ui_names())
+        self.assertEqual(list(self.types.get_all_ui_names()), sorted(self.types.get_all_ui_names()))
+        self.assertTrue(ComponentFactory.is_registered("adapter"))
+        self.assertFalse(ComponentFactory.is_registered("gizmo"))
+        self.assertEqual(self.types.get_properties("Adapter"), ["Pins"])
+
+    def test_custom_names_are_read_without_the_config_db(self):
+        self.types.add_new_type("Gizmo", ["Size (mm)"])
+        with patch("backend.type_manager.get_config_session", side_effect=AssertionError("config DB queried")):
+            self.assertEqual(self.types.get_all_custom_ui_names(), ("Gizmo",))
+
+    def test_reload_matches_incremental_state(self):
+        self.types.add_new_type("Gizmo", ["Size (mm)"])
+        names, custom = self.types.get_all_ui_names(), self.types.get_all_custom_ui_names()
+
+        self.types.load_types()
+
+        self.assertEqual((self.types.get_all_ui_names(), self.types.get_all_custom_ui_names()), (names, custom))
+
+
+if __name__ == '__main__':
+    unittest.main()